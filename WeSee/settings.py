@@ -10,8 +10,11 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
+from django.core.exceptions import ImproperlyConfigured
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -78,13 +81,66 @@ WSGI_APPLICATION = "WeSee.wsgi.application"
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
-
-DATABASES = {
-    "default": {
-        "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
+#
+# WESEE_DATABASE selects the database:
+#   "sqlite" (default): local development and tests
+#   "postgres": production, configured by POSTGRES_DB, POSTGRES_USER,
+#       POSTGRES_PASSWORD, POSTGRES_HOST and POSTGRES_PORT. Connections persist
+#       for POSTGRES_CONN_MAX_AGE seconds per process, or come from a pool of
+#       up to POSTGRES_POOL_MAX_SIZE connections per process when that is set
+
+WESEE_DATABASE = os.environ.get("WESEE_DATABASE", "sqlite")
+
+if WESEE_DATABASE == "postgres":
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.postgresql",
+            "NAME": os.environ.get("POSTGRES_DB", "wesee"),
+            "USER": os.environ.get("POSTGRES_USER", "wesee"),
+            "PASSWORD": os.environ.get("POSTGRES_PASSWORD", ""),
+            "HOST": os.environ.get("POSTGRES_HOST", "localhost"),
+            "PORT": os.environ.get("POSTGRES_PORT", "5432"),
+            "CONN_MAX_AGE": int(os.environ.get("POSTGRES_CONN_MAX_AGE", 60)),
+            # Drop persistent connections the server closed instead of failing
+            "CONN_HEALTH_CHECKS": True,
+            "OPTIONS": {},
+        }
     }
-}
+    if os.environ.get("POSTGRES_POOL_MAX_SIZE"):
+        # psycopg's pool replaces persistent connections (needs psycopg[pool])
+        DATABASES["default"]["CONN_MAX_AGE"] = 0
+        DATABASES["default"]["OPTIONS"]["pool"] = {
+            "min_size": 1,
+            "max_size": int(os.environ["POSTGRES_POOL_MAX_SIZE"]),
+        }
+elif WESEE_DATABASE == "sqlite":
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": BASE_DIR / "db.sqlite3",
+            "OPTIONS": {
+                # Seconds a writer waits for the lock before "database is locked"
+                "timeout": 20,
+                # Take the write lock when a transaction starts, so concurrent
+                # writers queue on the timeout instead of failing to upgrade a
+                # read lock mid-transaction
+                "transaction_mode": "IMMEDIATE",
+                # WAL lets readers run alongside the writer; with it, NORMAL
+                # sync is still crash-safe and fsyncs far less often
+                "init_command": (
+                    "PRAGMA journal_mode=WAL;"
+                    "PRAGMA synchronous=NORMAL;"
+                    "PRAGMA temp_store=MEMORY;"
+                    "PRAGMA cache_size=-20000;"  # KiB
+                    "PRAGMA mmap_size=134217728;"  # bytes
+                ),
+            },
+        }
+    }
+else:
+    raise ImproperlyConfigured(
+        f"WESEE_DATABASE must be 'sqlite' or 'postgres', not {WESEE_DATABASE!r}"
+    )
 
 
 # Password validation
@@ -151,3 +207,148 @@ CELERY_ACCEPT_CONTENT = ["json"]
 CELERY_TASK_SERIALIZER = "json"
 CELERY_RESULT_SERIALIZER = "json"
 CELERY_TIMEZONE = TIME_ZONE
+
+# Browser-bound scrapes and LLM-bound CV generation run on separate queues, each
+# consumed by its own worker pool, so a backlog of one never starves the other
+CELERY_TASK_DEFAULT_QUEUE = "default"
+CELERY_TASK_ROUTES = {
+    "scraper.tasks.scrape_linkedin_profile_task": {"queue": "scraping"},
+    "cv_agent.tasks.create_cv_task": {"queue": "cv"},
+}
+# Both tasks are acked late (redelivered if their worker dies), so the broker
+# must not redeliver a message before the longest task can finish
+CELERY_BROKER_TRANSPORT_OPTIONS = {"visibility_timeout": 2 * 60 * 60}  # seconds
+
+# Periodic tasks, run by `celery -A WeSee beat` alongside the workers
+CELERY_BEAT_SCHEDULE = {
+    "prune-task-history": {
+        "task": "scraper.tasks.prune_task_history_task",
+        "schedule": 60 * 60,  # seconds
+    },
+}
+
+# Worker presets, started with `python manage.py celery_worker <profile>`:
+#   python manage.py celery_worker scraping  # Chrome-bound scrapes
+#   python manage.py celery_worker cv        # LLM-bound CV generation
+#   python manage.py celery_worker default   # everything else
+# Long tasks use a prefetch multiplier of 1 so an idle process never waits
+# behind a task reserved by a busy one
+CELERY_WORKER_PROFILES = {
+    # Every process holds its own Chrome driver pool (~300 MB per driver), so
+    # size by memory and by the number of scraper accounts
+    "scraping": {
+        "queues": ["scraping"],
+        "pool": "prefork",
+        "concurrency": 2,
+        "prefetch_multiplier": 1,
+    },
+    # CV tasks mostly wait on LLM API calls, so threads overlap many of them
+    "cv": {
+        "queues": ["cv"],
+        "pool": "threads",
+        "concurrency": 8,
+        "prefetch_multiplier": 1,
+    },
+    "default": {
+        "queues": ["default"],
+        "pool": "prefork",
+        "concurrency": 2,
+        "prefetch_multiplier": 4,
+    },
+}
+
+# LinkedIn scraper driver pool (one pool per Celery worker process)
+SCRAPER_DRIVER_POOL_SIZE = 1
+SCRAPER_DRIVER_MAX_USES = 20
+SCRAPER_DRIVER_MAX_AGE = 60 * 60  # seconds
+# "standard" loads every page in full. "lean" blocks images, fonts, media and
+# trackers via DevTools and loads pages with the eager strategy; it is opt-in
+# until benchmark_driver / replay_scrapes show it scrapes the same profiles.
+SCRAPER_DRIVER_MODE = os.environ.get("SCRAPER_DRIVER_MODE", "standard")
+
+# Scraper account scheduling
+SCRAPER_ACCOUNT_COOLDOWN = 30  # seconds an account rests after a lease or release
+SCRAPER_ACCOUNT_LEASE_TIMEOUT = 15 * 60  # reclaim leases held longer than this
+SCRAPER_ACCOUNT_FAILURE_THRESHOLD = 3  # consecutive failures before benching
+SCRAPER_ACCOUNT_BENCH_BASE = 5 * 60  # doubles with every further failure
+SCRAPER_ACCOUNT_BENCH_MAX = 6 * 60 * 60
+SCRAPER_ACCOUNT_CHALLENGE_BENCH = 24 * 60 * 60
+SCRAPER_ACCOUNT_RETRY_DELAY = 30  # seconds a task waits when no account is free
+SCRAPER_ACCOUNT_MAX_RETRIES = 20
+
+# Batch scraping
+SCRAPER_BATCH_MAX_SIZE = 5000  # URLs accepted per batch request
+SCRAPER_BATCH_PARALLELISM = 4  # tasks from one batch running at once
+
+# Scrapes started but not updated for this long no longer block new requests
+SCRAPER_IN_FLIGHT_TIMEOUT = 30 * 60  # seconds
+
+# Task status polling: clients sending a status response's ETag back in
+# If-None-Match may add ?wait=<seconds> to hold the poll until the task changes.
+# Each held poll occupies a server worker for up to TASK_STATUS_MAX_WAIT
+TASK_STATUS_MAX_WAIT = 30  # seconds
+TASK_STATUS_POLL_INTERVAL = 0.5  # seconds between checks of a held poll
+
+# Task progress events, published by the Celery tasks over Redis pub/sub and
+# streamed to clients from /api/scrape/events/<id>/ and /api/cv/events/<id>/.
+# Streaming needs an ASGI server, e.g. `uvicorn WeSee.asgi:application`
+TASK_EVENTS_REDIS_URL = CELERY_BROKER_URL
+TASK_EVENTS_HEARTBEAT = 15  # seconds between keep-alive comments
+TASK_EVENTS_MAX_DURATION = 10 * 60  # seconds before a stream is closed
+
+# Task history retention (scraper.utils.retention): finished scraping and CV
+# tasks lose their result payloads after TASK_COMPACT_AFTER and are deleted
+# after TASK_DELETE_AFTER, appended to JSON lines files in TASK_ARCHIVE_DIR
+# first when it is set
+TASK_COMPACT_AFTER = 7 * 24 * 60 * 60  # seconds
+TASK_DELETE_AFTER = 90 * 24 * 60 * 60  # seconds
+TASK_ARCHIVE_DIR = None
+TASK_RETENTION_BATCH_SIZE = 1000  # rows per DELETE/UPDATE
+TASK_RETENTION_MAX_BATCHES = 50  # per model and step in one run
+
+# Caches. The profile cache fronts stored profile reads. Profiles are saved by
+# the scraping workers but read by the web and CV processes, so by default it
+# is a RedisCache shared by all of them: invalidating a profile on save
+# reaches every reader, and the hit/miss counters cover every process.
+# PROFILE_CACHE_URL="" makes it a per-process LocMemCache (an LRU bounded by
+# MAX_ENTRIES) instead; since other processes' saves cannot invalidate it,
+# its entries are checked against the stored profile's fingerprint before
+# being served and absent profiles are not cached (PROFILE_CACHE_VERIFY).
+PROFILE_CACHE_URL = os.environ.get("PROFILE_CACHE_URL", "redis://localhost:6379/1")
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "profiles": (
+        {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": PROFILE_CACHE_URL,
+        }
+        if PROFILE_CACHE_URL
+        else {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "profiles",
+            "OPTIONS": {"MAX_ENTRIES": 1000},
+        }
+    ),
+}
+PROFILE_CACHE_ALIAS = "profiles"
+PROFILE_CACHE_VERIFY = not PROFILE_CACHE_URL
+
+# Runs the tests against an in-process profile cache, without Redis
+TEST_RUNNER = "WeSee.test_runner.WeSeeTestRunner"
+PROFILE_CACHE_TIMEOUT = 60 * 60  # seconds
+
+# Stored profile freshness: fresh profiles are served as-is, stale ones are
+# served while a background re-scrape runs, older ones are re-scraped first
+PROFILE_FRESH_TTL = 7 * 24 * 60 * 60  # seconds
+PROFILE_STALE_TTL = 30 * 24 * 60 * 60  # seconds
+
+# Profile extraction engine: "selenium" walks the page element by element via
+# linkedin_scraper.Person, "html" captures each section's page source once and
+# parses it in-process (scraper.scrapers.html_extractor)
+SCRAPER_EXTRACTION_ENGINE = "selenium"
+
+# When set, every scraped profile's pages are saved under this directory for
+# offline replay with `manage.py replay_scrapes`
+SCRAPER_RECORD_DIR = None
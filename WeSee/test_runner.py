@@ -0,0 +1,31 @@
+# Test runner that needs no Redis server
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+
+class WeSeeTestRunner(DiscoverRunner):
+    """
+    Run the tests against an in-process profile cache
+
+    Tests run in a single process, so a LocMemCache shares entries and
+    invalidations with every reader just like the shared Redis cache does;
+    PROFILE_CACHE_VERIFY keeps its configured value.
+    """
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self._cache_settings = override_settings(
+            CACHES={
+                **settings.CACHES,
+                settings.PROFILE_CACHE_ALIAS: {
+                    "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+                    "LOCATION": "profiles",
+                },
+            }
+        )
+        self._cache_settings.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self._cache_settings.disable()
+        super().teardown_test_environment(**kwargs)
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-17 13:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("cv_agent", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="cvtask",
+            index=models.Index(fields=["created_at"], name="cvtask_created"),
+        ),
+        migrations.AddIndex(
+            model_name="cvtask",
+            index=models.Index(
+                fields=["status", "created_at"], name="cvtask_status_created"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="cvtask",
+            index=models.Index(
+                fields=["status", "updated_at"], name="cvtask_status_updated"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="cvtask",
+            index=models.Index(
+                fields=["linkedin_url", "status"], name="cvtask_url_status"
+            ),
+        ),
+    ]
@@ -27,3 +27,13 @@ class CVTask(models.Model):
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            # Default ordering
+            models.Index(fields=["created_at"], name="cvtask_created"),
+            # Tasks in a status by age
+            models.Index(fields=["status", "created_at"], name="cvtask_status_created"),
+            # Finished tasks due for retention
+            models.Index(fields=["status", "updated_at"], name="cvtask_status_updated"),
+            # A profile's CV tasks in a status
+            models.Index(fields=["linkedin_url", "status"], name="cvtask_url_status"),
+        ]
@@ -1,6 +1,7 @@
 import logging
 from celery import shared_task
 
+from scraper.utils.task_state import start_task, transition_task
 from users.utils import get_user_data_by_linkedin_url
 from .models import CVTask
 from .services.wesee.main import run
@@ -8,28 +9,28 @@ from .services.wesee.main import run
 logger = logging.getLogger(__name__)
 
 
-@shared_task(bind=True)
+@shared_task(bind=True, acks_late=True)
 def create_cv_task(self, task_id, linkedin_url, job_description):
     """
     Celery task to create a customized CV using the WeSee crew
     """
     # Update task status to STARTED
     try:
-        task_record = CVTask.objects.get(task_id=task_id)
-        task_record.status = "STARTED"
-        task_record.save()
+        task_record = CVTask.objects.defer("job_description", "result").get(
+            task_id=task_id
+        )
     except CVTask.DoesNotExist:
         logger.error(f"CV Task record not found for task_id: {task_id}")
         return
+    if not start_task(task_record):
+        return
 
     try:
         # Get LinkedIn data from database
         linkedin_data = get_user_data_by_linkedin_url(linkedin_url)
         if not linkedin_data:
             error_msg = f"Failed to retrieve LinkedIn data for URL: {linkedin_url}"
-            task_record.status = "FAILURE"
-            task_record.error_message = error_msg
-            task_record.save()
+            transition_task(task_record, "FAILURE", error_message=error_msg)
             logger.error(error_msg)
             return {"success": False, "error": error_msg}
 
@@ -47,9 +48,7 @@ def create_cv_task(self, task_id, linkedin_url, job_description):
             cv_content = str(result)
 
         # Update task with success result
-        task_record.status = "SUCCESS"
-        task_record.result = cv_content
-        task_record.save()
+        transition_task(task_record, "SUCCESS", result=cv_content)
 
         logger.info(f"Successfully created CV for LinkedIn profile: {linkedin_url}")
         return {"success": True, "cv_content": cv_content}
@@ -61,9 +60,7 @@ def create_cv_task(self, task_id, linkedin_url, job_description):
         error_msg = f"CV creation failed: {str(e)}"
         full_traceback = traceback.format_exc()
 
-        task_record.status = "FAILURE"
-        task_record.error_message = error_msg
-        task_record.save()
+        transition_task(task_record, "FAILURE", error_message=error_msg)
 
         logger.error(f"Unexpected error in CV creation: {str(e)}")
         logger.error(f"Full traceback: {full_traceback}")
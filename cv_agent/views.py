@@ -6,7 +6,9 @@ from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 from rest_framework import status
 
-from users.utils import user_exists_in_db
+from scraper.utils.polling import not_modified_response, with_etag
+from scraper.utils.task_events import task_events_response
+from users.utils import canonicalize_linkedin_url, user_exists_in_db
 from .models import CVTask
 from .tasks import create_cv_task
 
@@ -25,7 +27,7 @@ def create_cv_view(request):
         "job_description": "Job description text..."
     }
     """
-    linkedin_url = request.data.get('linkedin_url')
+    linkedin_url = canonicalize_linkedin_url(request.data.get('linkedin_url'))
     job_description = request.data.get('job_description')
     
     # Validate required fields
@@ -90,7 +92,17 @@ def create_cv_view(request):
 def get_cv_task_status(request, task_id):
     """
     Get the status and result of a CV task.
+
+    Responses carry an ETag; polls sending it back in If-None-Match get
+    304 Not Modified while the task is unchanged, and ``?wait=<seconds>``
+    holds such a poll until the task changes or the wait runs out.
     """
+    not_modified = not_modified_response(
+        request, CVTask.objects.filter(task_id=task_id)
+    )
+    if not_modified is not None:
+        return not_modified
+
     try:
         cv_task = CVTask.objects.get(task_id=task_id)
         
@@ -107,7 +119,8 @@ def get_cv_task_status(request, task_id):
         elif cv_task.status == "FAILURE" and cv_task.error_message:
             response_data["error"] = cv_task.error_message
             
-        return Response(response_data, status=status.HTTP_200_OK)
+        response = Response(response_data, status=status.HTTP_200_OK)
+        return with_etag(response, cv_task.updated_at)
         
     except CVTask.DoesNotExist:
         return Response(
@@ -120,3 +133,10 @@ def get_cv_task_status(request, task_id):
             {"error": f"Failed to retrieve task status: {str(e)}"}, 
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
         )
+
+
+async def cv_task_events(request, task_id):
+    """
+    Stream the state transitions of a CV task as server-sent events.
+    """
+    return task_events_response(CVTask, task_id)
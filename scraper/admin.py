@@ -3,18 +3,55 @@ import json
 from django.contrib import admin
 from django.utils.html import format_html
 
-from .models import Scraper, ScrapingTask
+from .models import Scraper, ScrapingBatch, ScrapingTask
+from .utils.timing import timing_percentiles
+
+# Most recent tasks summarized by the task list's timing percentiles
+TIMING_SUMMARY_SAMPLE_SIZE = 1000
 
 
 @admin.register(Scraper)
 class ScraperAdmin(admin.ModelAdmin):
-    list_display = ("name", "email", "created_at", "updated_at")
-    list_filter = ("created_at", "updated_at")
+    list_display = (
+        "name",
+        "email",
+        "active_leases",
+        "success_count",
+        "failure_count",
+        "avg_latency",
+        "last_used_at",
+        "benched_until",
+    )
+    list_filter = ("created_at", "updated_at", "benched_until")
     search_fields = ("name", "email")
-    readonly_fields = ("created_at", "updated_at")
+    readonly_fields = (
+        "active_leases",
+        "last_used_at",
+        "consecutive_failures",
+        "success_count",
+        "failure_count",
+        "avg_latency",
+        "created_at",
+        "updated_at",
+    )
 
     fieldsets = (
         ("Basic Information", {"fields": ("name", "email", "password")}),
+        (
+            "Scheduling",
+            {
+                "fields": (
+                    "max_concurrent_leases",
+                    "benched_until",
+                    "active_leases",
+                    "last_used_at",
+                    "consecutive_failures",
+                    "success_count",
+                    "failure_count",
+                    "avg_latency",
+                )
+            },
+        ),
         (
             "Timestamps",
             {"fields": ("created_at", "updated_at"), "classes": ("collapse",)},
@@ -26,6 +63,18 @@ class ScraperAdmin(admin.ModelAdmin):
     ordering = ("-created_at",)
 
 
+@admin.register(ScrapingBatch)
+class ScrapingBatchAdmin(admin.ModelAdmin):
+    list_display = ("batch_id", "total_tasks", "created_at", "updated_at")
+    list_filter = ("created_at",)
+    search_fields = ("batch_id",)
+    readonly_fields = ("batch_id", "total_tasks", "created_at", "updated_at")
+
+    # Customize the admin list view
+    list_per_page = 25
+    ordering = ("-created_at",)
+
+
 @admin.register(ScrapingTask)
 class ScrapingTaskAdmin(admin.ModelAdmin):
     list_display = (
@@ -36,24 +85,39 @@ class ScrapingTaskAdmin(admin.ModelAdmin):
         "updated_at",
         "has_result",
         "has_error",
+        "total_time",
     )
     list_filter = ("status", "created_at", "updated_at")
-    search_fields = ("task_id", "linkedin_url")
+    search_fields = ("task_id", "linkedin_url", "batch__batch_id")
     readonly_fields = (
         "task_id",
+        "batch",
+        "user",
+        "profile_fingerprint",
         "created_at",
         "updated_at",
         "formatted_result",
         "formatted_error",
+        "formatted_timings",
     )
 
     fieldsets = (
-        ("Task Information", {"fields": ("task_id", "linkedin_url", "status")}),
-        ("Results", {"fields": ("formatted_result",), "classes": ("collapse",)}),
+        (
+            "Task Information",
+            {"fields": ("task_id", "batch", "linkedin_url", "status")},
+        ),
+        (
+            "Results",
+            {
+                "fields": ("user", "profile_fingerprint", "formatted_result"),
+                "classes": ("collapse",),
+            },
+        ),
         (
             "Error Details",
             {"fields": ("error_message", "formatted_error"), "classes": ("collapse",)},
         ),
+        ("Timings", {"fields": ("formatted_timings",), "classes": ("collapse",)}),
         (
             "Timestamps",
             {"fields": ("created_at", "updated_at"), "classes": ("collapse",)},
@@ -64,6 +128,21 @@ class ScrapingTaskAdmin(admin.ModelAdmin):
     list_per_page = 25
     ordering = ("-created_at",)
 
+    def changelist_view(self, request, extra_context=None):
+        """Add per-phase timing percentiles of the filtered tasks to the list"""
+        response = super().changelist_view(request, extra_context)
+
+        changelist = getattr(response, "context_data", {}).get("cl")
+        if changelist is not None:
+            timings = (
+                changelist.queryset.exclude(timings={})
+                .order_by("-created_at")
+                .values_list("timings", flat=True)[:TIMING_SUMMARY_SAMPLE_SIZE]
+            )
+            response.context_data["timing_percentiles"] = timing_percentiles(timings)
+
+        return response
+
     def has_result(self, obj):
         """Display if task has results"""
         return bool(obj.result)
@@ -110,3 +189,25 @@ class ScrapingTaskAdmin(admin.ModelAdmin):
         return "No error message"
 
     formatted_error.short_description = "Formatted Error Message"
+
+    def total_time(self, obj):
+        """Display the task's total duration in seconds"""
+        total = (obj.timings or {}).get("total")
+        return f"{total:.1f}s" if total is not None else "-"
+
+    total_time.short_description = "Total Time"
+
+    def formatted_timings(self, obj):
+        """Display seconds spent per scrape phase"""
+        if obj.timings:
+            return format_html(
+                '<pre style="white-space: pre-wrap; background: #f8f9fa; '
+                'padding: 10px; border: 1px solid #dee2e6; border-radius: 4px;">{}</pre>',
+                "\n".join(
+                    f"{phase:<15}{seconds:>9.3f}s"
+                    for phase, seconds in obj.timings.items()
+                ),
+            )
+        return "No timings recorded"
+
+    formatted_timings.short_description = "Seconds per Phase"
@@ -0,0 +1,158 @@
+import json
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from scraper.scrapers.driver_pool import (
+    ChromeDriverPool,
+    PooledDriver,
+    build_chrome_driver,
+)
+from scraper.scrapers.linkedin_scraper import LinkedInPersonScraper
+from scraper.scrapers.recordings import recorded_profiles, serve_recordings
+from scraper.scrapers.sessions import ensure_session
+from scraper.utils.account_scheduler import lease_account, release_account
+from users.models import PROFILE_SECTIONS
+
+from .benchmark_extraction import DEFAULT_FIXTURES_DIR
+
+DRIVER_MODES = ("standard", "lean")
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare bytes transferred and time-to-extract between Chrome driver modes. "
+        "Scrapes the given LinkedIn profile URLs with a leased scraper account, or "
+        "the saved fixture profiles from a local HTTP server when no URL is given."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "urls",
+            nargs="*",
+            help="LinkedIn profile URLs to scrape (default: saved fixture profiles)",
+        )
+        parser.add_argument(
+            "--fixtures",
+            default=DEFAULT_FIXTURES_DIR,
+            help="Directory containing saved profiles under in/<slug>/",
+        )
+        parser.add_argument(
+            "--iterations",
+            type=int,
+            default=3,
+            help="Scrapes per profile and driver mode",
+        )
+        parser.add_argument(
+            "--modes",
+            nargs="+",
+            choices=DRIVER_MODES,
+            default=list(DRIVER_MODES),
+            help="Driver modes to compare",
+        )
+        parser.add_argument(
+            "--sections",
+            nargs="*",
+            choices=PROFILE_SECTIONS,
+            default=list(PROFILE_SECTIONS),
+            help="Profile sections to scrape",
+        )
+
+    def handle(self, *args, **options):
+        server = None
+        account = None
+        urls = options["urls"]
+
+        if not urls:
+            server, urls = self._serve_fixtures(options["fixtures"])
+        else:
+            account = lease_account()
+
+        self.stdout.write(
+            f"Benchmarking {len(urls)} profile(s) with the "
+            f"{settings.SCRAPER_EXTRACTION_ENGINE} extraction engine\n"
+        )
+
+        try:
+            results = {
+                mode: self._benchmark_mode(
+                    mode, urls, account, options["iterations"], options["sections"]
+                )
+                for mode in options["modes"]
+            }
+        finally:
+            if account is not None:
+                # A benchmark says nothing about the account's health
+                release_account(account, success=None)
+            if server is not None:
+                server.shutdown()
+
+        for mode, (seconds, transferred, blocked) in results.items():
+            runs = len(seconds)
+            self.stdout.write(
+                f"{mode}: {sum(seconds) / runs:.2f} s/profile, "
+                f"{sum(transferred) / runs / 1024:.0f} KiB/profile, "
+                f"{sum(blocked) / runs:.0f} blocked requests/profile"
+            )
+
+    def _serve_fixtures(self, fixtures_dir):
+        server, base_url = serve_recordings(fixtures_dir)
+        urls = [
+            f"{base_url}/in/{slug}/" for slug, _, _ in recorded_profiles(fixtures_dir)
+        ]
+        return server, urls
+
+    def _benchmark_mode(self, mode, urls, account, iterations, sections):
+        """Scrape every URL with a fresh driver in ``mode``, sampling each run"""
+        driver = build_chrome_driver(mode=mode, log_network=True)
+        scraper = LinkedInPersonScraper(driver_pool=ChromeDriverPool(size=1))
+        scraper.driver = driver
+        seconds, transferred, blocked = [], [], []
+
+        try:
+            if account is not None:
+                ensure_session(PooledDriver(driver=driver), account)
+
+            for url in urls:
+                for _ in range(iterations):
+                    # Drop log entries from earlier navigations
+                    driver.get_log("performance")
+
+                    started_at = time.perf_counter()
+                    person_data = scraper._extract(url, sections)
+                    seconds.append(time.perf_counter() - started_at)
+
+                    run_bytes, run_blocked = network_stats(
+                        driver.get_log("performance")
+                    )
+                    transferred.append(run_bytes)
+                    blocked.append(run_blocked)
+
+                    self.stdout.write(
+                        f"  {mode} {url}: {seconds[-1]:.2f}s, "
+                        f"{run_bytes / 1024:.0f} KiB, {run_blocked} blocked "
+                        f"({person_data['name'] or 'no name extracted'})"
+                    )
+        finally:
+            driver.quit()
+
+        return seconds, transferred, blocked
+
+
+def network_stats(log_entries):
+    """
+    Sum bytes received and count blocked requests in a DevTools performance log
+
+    Returns:
+        tuple: (bytes transferred, number of blocked requests)
+    """
+    transferred = blocked = 0
+    for entry in log_entries:
+        message = json.loads(entry["message"])["message"]
+        if message["method"] == "Network.loadingFinished":
+            transferred += message["params"].get("encodedDataLength", 0)
+        elif message["method"] == "Network.loadingFailed":
+            if message["params"].get("blockedReason"):
+                blocked += 1
+    return transferred, blocked
@@ -0,0 +1,114 @@
+import os
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from scraper.scrapers.driver_pool import ChromeDriverPool, build_chrome_driver
+from scraper.scrapers.html_extractor import extract_person_data, load_saved_pages
+from scraper.scrapers.linkedin_scraper import LinkedInPersonScraper
+from scraper.scrapers.recordings import serve_recordings
+
+DEFAULT_FIXTURES_DIR = os.path.join(
+    settings.BASE_DIR, "scraper", "fixtures", "linkedin"
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark LinkedIn profile extraction offline against saved HTML pages. "
+        "Always times the in-process HTML parser; with --selenium, also serves the "
+        "pages to a local Chrome and times capture+parse against the Selenium path."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--fixtures",
+            default=DEFAULT_FIXTURES_DIR,
+            help="Directory containing saved profiles under in/<slug>/",
+        )
+        parser.add_argument(
+            "--iterations",
+            type=int,
+            default=200,
+            help="Parse iterations per profile for the HTML extractor",
+        )
+        parser.add_argument(
+            "--selenium",
+            action="store_true",
+            help="Also benchmark both engines through a headless Chrome",
+        )
+
+    def handle(self, *args, **options):
+        fixtures_dir = options["fixtures"]
+        profiles_dir = os.path.join(fixtures_dir, "in")
+        slugs = sorted(
+            slug
+            for slug in os.listdir(profiles_dir)
+            if os.path.isdir(os.path.join(profiles_dir, slug))
+        )
+        if not slugs:
+            self.stderr.write(f"No saved profiles found in {profiles_dir}")
+            return
+
+        self.stdout.write(f"Benchmarking {len(slugs)} saved profile(s)\n")
+        self._benchmark_parser(profiles_dir, slugs, options["iterations"])
+
+        if options["selenium"]:
+            self._benchmark_browser(fixtures_dir, slugs)
+
+    def _benchmark_parser(self, profiles_dir, slugs, iterations):
+        total = 0.0
+        for slug in slugs:
+            pages = load_saved_pages(os.path.join(profiles_dir, slug))
+            started_at = time.perf_counter()
+            for _ in range(iterations):
+                extract_person_data(pages, f"https://www.linkedin.com/in/{slug}/")
+            elapsed = time.perf_counter() - started_at
+            total += elapsed
+            self.stdout.write(
+                f"  html parse  {slug}: {elapsed / iterations * 1000:.2f} ms/profile"
+            )
+
+        runs = iterations * len(slugs)
+        self.stdout.write(
+            f"html parse: {total / runs * 1000:.2f} ms/profile, "
+            f"{runs / total:.1f} profiles/s\n"
+        )
+
+    def _benchmark_browser(self, fixtures_dir, slugs):
+        server, base_url = serve_recordings(fixtures_dir)
+
+        scraper = LinkedInPersonScraper(driver_pool=ChromeDriverPool(size=1))
+        scraper.driver = build_chrome_driver()
+        timings = {"selenium": [], "html": []}
+
+        try:
+            for slug in slugs:
+                linkedin_url = f"{base_url}/in/{slug}/"
+
+                started_at = time.perf_counter()
+                selenium_data = scraper._extract_with_selenium(linkedin_url)
+                timings["selenium"].append(time.perf_counter() - started_at)
+
+                started_at = time.perf_counter()
+                html_data = extract_person_data(
+                    scraper._capture_pages(linkedin_url), linkedin_url
+                )
+                timings["html"].append(time.perf_counter() - started_at)
+
+                same = "match" if selenium_data == html_data else "DIFFERS"
+                self.stdout.write(
+                    f"  browser {slug}: selenium {timings['selenium'][-1]:.2f}s, "
+                    f"html {timings['html'][-1]:.2f}s ({same})"
+                )
+        finally:
+            scraper.driver.quit()
+            server.shutdown()
+
+        for engine, samples in timings.items():
+            total = sum(samples)
+            self.stdout.write(
+                f"{engine} extraction via browser: {total / len(samples):.2f} s/profile, "
+                f"{len(samples) / total:.2f} profiles/s"
+            )
@@ -0,0 +1,61 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from WeSee.celery import app as celery_app
+
+
+def worker_argv(profile, concurrency=None):
+    """
+    Build the ``celery worker`` arguments for a CELERY_WORKER_PROFILES preset
+
+    Args:
+        profile (str): Name of the preset
+        concurrency (int): Overrides the preset's concurrency
+
+    Returns:
+        list: Arguments for ``celery -A WeSee``
+    """
+    preset = settings.CELERY_WORKER_PROFILES[profile]
+    return [
+        "worker",
+        f"--hostname={profile}@%h",
+        f"--queues={','.join(preset['queues'])}",
+        f"--pool={preset['pool']}",
+        f"--concurrency={concurrency or preset['concurrency']}",
+        f"--prefetch-multiplier={preset['prefetch_multiplier']}",
+        "--loglevel=INFO",
+    ]
+
+
+class Command(BaseCommand):
+    help = (
+        "Start a Celery worker for one of the CELERY_WORKER_PROFILES presets "
+        "(scraping, cv or default), consuming that preset's queues with its "
+        "pool, concurrency and prefetch multiplier."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "profile",
+            choices=sorted(settings.CELERY_WORKER_PROFILES),
+            help="Worker preset to start",
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=None,
+            help="Override the preset's number of processes or threads",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Print the equivalent celery command instead of starting a worker",
+        )
+
+    def handle(self, *args, **options):
+        argv = worker_argv(options["profile"], options["concurrency"])
+        if options["dry_run"]:
+            self.stdout.write(f"celery -A WeSee {' '.join(argv)}")
+            return
+
+        celery_app.worker_main(argv)
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from scraper.utils.retention import prune_task_history
+
+
+class Command(BaseCommand):
+    help = (
+        "Apply the task history retention policy now: strip payloads of finished "
+        "scraping and CV tasks older than TASK_COMPACT_AFTER and delete those "
+        "older than TASK_DELETE_AFTER. Runs hourly under Celery beat."
+    )
+
+    def handle(self, *args, **options):
+        report = prune_task_history()
+
+        self.stdout.write(
+            f"{'model':<25}{'deleted':>10}{'freed':>12}{'compacted':>12}{'freed':>12}"
+        )
+        for label, counts in report.items():
+            self.stdout.write(
+                f"{label:<25}{counts['deleted']:>10}"
+                f"{_size(counts.get('deleted_bytes')):>12}"
+                f"{counts.get('compacted', ''):>12}"
+                f"{_size(counts.get('compacted_bytes')):>12}"
+            )
+
+
+def _size(num_bytes):
+    if num_bytes is None:
+        return ""
+    return f"{num_bytes / 1024:.1f} KiB"
@@ -0,0 +1,154 @@
+import functools
+import time
+from contextlib import ExitStack
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from scraper.scrapers.driver_pool import ChromeDriverPool, build_chrome_driver
+from scraper.scrapers.linkedin_scraper import LinkedInPersonScraper
+from scraper.scrapers.recordings import recorded_profiles, serve_recordings
+from scraper.utils.timing import PhaseTimer, timing_percentiles
+from users.models import PROFILE_SECTIONS
+from users.utils import save_scraped_user_data
+
+from .benchmark_extraction import DEFAULT_FIXTURES_DIR
+
+# Keys that legitimately differ between a replay and its recording
+UNCOMPARED_KEYS = ("linkedin_url", "sections")
+
+
+class Command(BaseCommand):
+    help = (
+        "Replay recorded LinkedIn profile pages through the scraper pipeline "
+        "(driver lease, navigation, extraction and a rolled-back database save) "
+        "from a local HTTP server, and report latency and throughput. Record "
+        "pages by setting SCRAPER_RECORD_DIR while scraping."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--recordings",
+            default=DEFAULT_FIXTURES_DIR,
+            help="Directory holding recorded profiles under in/<slug>/",
+        )
+        parser.add_argument(
+            "--iterations",
+            type=int,
+            default=5,
+            help="Replays per profile",
+        )
+        parser.add_argument(
+            "--engine",
+            choices=("html", "selenium"),
+            default="html",
+            help="Extraction engine to replay with",
+        )
+        parser.add_argument(
+            "--driver-mode",
+            choices=("standard", "lean"),
+            default=None,
+            help="Chrome driver mode (default: SCRAPER_DRIVER_MODE)",
+        )
+
+    def handle(self, *args, **options):
+        profiles = recorded_profiles(options["recordings"])
+        if not profiles:
+            self.stderr.write(f"No recorded profiles found in {options['recordings']}")
+            return
+
+        server, base_url = serve_recordings(options["recordings"])
+        pool = ChromeDriverPool(
+            size=1,
+            max_uses=0,
+            max_age=0,
+            factory=functools.partial(build_chrome_driver, mode=options["driver_mode"]),
+        )
+        all_timings = []
+        mismatches = 0
+
+        self.stdout.write(
+            f"Replaying {len(profiles)} recorded profile(s) x {options['iterations']} "
+            f"with the {options['engine']} engine\n"
+        )
+        started_at = time.perf_counter()
+
+        try:
+            for slug, _, expected in profiles:
+                url = f"{base_url}/in/{slug}/"
+                timings = [
+                    self._replay(pool, options["engine"], slug, url, expected)
+                    for _ in range(options["iterations"])
+                ]
+                mismatches += sum(1 for _, matched in timings if not matched)
+                timings = [run_timings for run_timings, _ in timings]
+                all_timings.extend(timings)
+
+                totals = [run_timings["total"] for run_timings in timings]
+                self.stdout.write(
+                    f"  {slug}: {sum(totals) / len(totals):.3f} s/profile "
+                    f"(min {min(totals):.3f}, max {max(totals):.3f})"
+                )
+        finally:
+            pool.close()
+            server.shutdown()
+
+        elapsed = time.perf_counter() - started_at
+        self.stdout.write(
+            f"\n{len(all_timings)} replays in {elapsed:.2f}s: "
+            f"{len(all_timings) / elapsed:.2f} profiles/s\n"
+        )
+
+        self.stdout.write(
+            f"{'phase':<15}{'samples':>8}{'p50':>10}{'p90':>10}{'p99':>10}"
+        )
+        for phase, count, values in timing_percentiles(all_timings):
+            self.stdout.write(
+                f"{phase:<15}{count:>8}" + "".join(f"{v:>10.3f}" for v in values)
+            )
+
+        if mismatches:
+            self.stderr.write(
+                f"\n{mismatches} replay(s) extracted data differing from the recording"
+            )
+
+    def _replay(self, pool, engine, slug, url, expected):
+        """
+        Scrape one recorded profile through the pipeline
+
+        Returns:
+            tuple: (timings dict, whether the data matched the recording)
+        """
+        timer = PhaseTimer()
+        scraper = LinkedInPersonScraper(
+            driver_pool=pool, timer=timer, extraction_engine=engine
+        )
+        # Never re-record the recordings being replayed
+        scraper.record_dir = None
+
+        sections = PROFILE_SECTIONS
+        if expected is not None:
+            sections = [section for section in PROFILE_SECTIONS if section in expected]
+
+        with ExitStack() as stack:
+            with timer.phase("driver_lease"):
+                scraper.driver = stack.enter_context(pool.lease()).driver
+            person_data = scraper._extract(url, sections)
+
+        matched = expected is None or _comparable(person_data) == _comparable(expected)
+
+        person_data["linkedin_url"] = (expected or {}).get(
+            "linkedin_url", f"https://www.linkedin.com/in/{slug}/"
+        )
+        with timer.phase("db_save"), transaction.atomic():
+            save_scraped_user_data(person_data)
+            # Keep replays from touching stored profiles
+            transaction.set_rollback(True)
+
+        return timer.as_dict(), matched
+
+
+def _comparable(person_data):
+    return {
+        key: value for key, value in person_data.items() if key not in UNCOMPARED_KEYS
+    }
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-17 12:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("scraper", "0002_scrapingtask"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ScraperSession",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("cookies", models.JSONField(default=list)),
+                ("local_storage", models.JSONField(default=dict)),
+                ("last_validated_at", models.DateTimeField(blank=True, null=True)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "scraper",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="session",
+                        to="scraper.scraper",
+                    ),
+                ),
+            ],
+        ),
+    ]
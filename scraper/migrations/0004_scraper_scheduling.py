@@ -0,0 +1,53 @@
+# Generated by Django 5.2.18 on 2026-10-17 12:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("scraper", "0003_scrapersession"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="scraper",
+            name="active_leases",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="scraper",
+            name="avg_latency",
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="scraper",
+            name="benched_until",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="scraper",
+            name="consecutive_failures",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="scraper",
+            name="failure_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="scraper",
+            name="last_used_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="scraper",
+            name="max_concurrent_leases",
+            field=models.PositiveSmallIntegerField(default=1),
+        ),
+        migrations.AddField(
+            model_name="scraper",
+            name="success_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
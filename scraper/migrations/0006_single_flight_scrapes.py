@@ -0,0 +1,42 @@
+# Generated by Django 5.2.18 on 2026-10-17 12:45
+
+from django.db import migrations, models
+
+
+def fail_duplicate_in_flight_tasks(apps, schema_editor):
+    """Keep only the newest pending/started task per URL so the constraint holds"""
+    ScrapingTask = apps.get_model("scraper", "ScrapingTask")
+
+    seen_urls = set()
+    duplicate_ids = []
+    in_flight = ScrapingTask.objects.filter(status__in=["PENDING", "STARTED"])
+    for task_pk, linkedin_url in in_flight.order_by("-created_at").values_list(
+        "pk", "linkedin_url"
+    ):
+        if linkedin_url in seen_urls:
+            duplicate_ids.append(task_pk)
+        seen_urls.add(linkedin_url)
+
+    ScrapingTask.objects.filter(pk__in=duplicate_ids).update(
+        status="FAILURE",
+        error_message="Superseded by a newer scrape of the same profile",
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("scraper", "0005_scrapingbatch"),
+    ]
+
+    operations = [
+        migrations.RunPython(fail_duplicate_in_flight_tasks, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="scrapingtask",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("status__in", ["PENDING", "STARTED"])),
+                fields=("linkedin_url",),
+                name="unique_in_flight_scrape_per_url",
+            ),
+        ),
+    ]
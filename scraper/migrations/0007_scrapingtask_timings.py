@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 13:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("scraper", "0006_single_flight_scrapes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="scrapingtask",
+            name="timings",
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 5.2.18 on 2026-10-17 13:21
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def replace_result_copies_with_references(apps, schema_editor):
+    """Point successful tasks at their stored profile and drop their copy of it"""
+    ScrapingTask = apps.get_model("scraper", "ScrapingTask")
+    User = apps.get_model("users", "User")
+
+    users = {
+        linkedin_url: (pk, fingerprint)
+        for pk, linkedin_url, fingerprint in User.objects.values_list(
+            "pk", "linkedin_url", "content_fingerprint"
+        ).iterator()
+    }
+    tasks = ScrapingTask.objects.filter(status="SUCCESS", result__has_key="data")
+    for task in tasks.only("pk", "linkedin_url", "result").iterator():
+        if task.linkedin_url not in users:
+            continue
+        user_id, fingerprint = users[task.linkedin_url]
+        result = {key: value for key, value in task.result.items() if key != "data"}
+        ScrapingTask.objects.filter(pk=task.pk).update(
+            result=result, user_id=user_id, profile_fingerprint=fingerprint
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("scraper", "0007_scrapingtask_timings"),
+        ("users", "0005_user_profile_snapshot"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="scrapingtask",
+            name="profile_fingerprint",
+            field=models.CharField(blank=True, default="", max_length=64),
+        ),
+        migrations.AddField(
+            model_name="scrapingtask",
+            name="user",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="scraping_tasks",
+                to="users.user",
+            ),
+        ),
+        migrations.RunPython(
+            replace_result_copies_with_references, migrations.RunPython.noop
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 5.2.18 on 2026-10-17 13:25
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("scraper", "0008_scraping_task_profile_reference"),
+        ("users", "0006_child_user_position_indexes"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="scrapingtask",
+            name="batch",
+            field=models.ForeignKey(
+                blank=True,
+                db_index=False,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="tasks",
+                to="scraper.scrapingbatch",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="scrapingtask",
+            index=models.Index(fields=["created_at"], name="scrapingtask_created"),
+        ),
+        migrations.AddIndex(
+            model_name="scrapingtask",
+            index=models.Index(
+                fields=["status", "created_at"], name="scrapingtask_status_created"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="scrapingtask",
+            index=models.Index(
+                fields=["status", "updated_at"], name="scrapingtask_status_updated"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="scrapingtask",
+            index=models.Index(
+                fields=["linkedin_url", "status"], name="scrapingtask_url_status"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="scrapingtask",
+            index=models.Index(
+                fields=["batch", "status"], name="scrapingtask_batch_status"
+            ),
+        ),
+    ]
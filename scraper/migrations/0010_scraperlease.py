@@ -0,0 +1,55 @@
+# Generated by Django 5.2.18 on 2026-10-17 13:38
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def record_active_leases(apps, schema_editor):
+    """
+    Record the leases counted by active_leases, as of the account's last lease
+
+    Until now an account's leases all dated from its last_used_at.
+    """
+    Scraper = apps.get_model("scraper", "Scraper")
+    ScraperLease = apps.get_model("scraper", "ScraperLease")
+
+    ScraperLease.objects.bulk_create(
+        ScraperLease(scraper=account, leased_at=account.last_used_at or timezone.now())
+        for account in Scraper.objects.filter(active_leases__gt=0)
+        for _ in range(account.active_leases)
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("scraper", "0009_scrapingtask_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ScraperLease",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("leased_at", models.DateTimeField()),
+                (
+                    "scraper",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="leases",
+                        to="scraper.scraper",
+                    ),
+                ),
+            ],
+        ),
+        migrations.RunPython(record_active_leases, migrations.RunPython.noop),
+    ]
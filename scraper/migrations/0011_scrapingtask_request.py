@@ -0,0 +1,47 @@
+# Generated by Django 5.2.18 on 2026-10-17 14:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("scraper", "0010_scraperlease"),
+        ("users", "0006_child_user_position_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="scrapingtask",
+            name="max_age",
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="scrapingtask",
+            name="sections",
+            field=models.JSONField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name="scrapingtask",
+            name="status",
+            field=models.CharField(
+                choices=[
+                    ("WAITING", "Waiting"),
+                    ("PENDING", "Pending"),
+                    ("STARTED", "Started"),
+                    ("SUCCESS", "Success"),
+                    ("FAILURE", "Failure"),
+                ],
+                default="PENDING",
+                max_length=10,
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="scrapingtask",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("status", "WAITING")),
+                fields=("linkedin_url",),
+                name="unique_waiting_scrape_per_url",
+            ),
+        ),
+    ]
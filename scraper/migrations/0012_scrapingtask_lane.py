@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-17 14:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("scraper", "0011_scrapingtask_request"),
+        ("users", "0006_child_user_position_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="scrapingtask",
+            name="lane",
+            field=models.PositiveSmallIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="scrapingtask",
+            name="position",
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name="scrapingtask",
+            index=models.Index(
+                fields=["batch", "lane", "status", "position"],
+                name="scrapingtask_batch_lane",
+            ),
+        ),
+    ]
@@ -6,6 +6,17 @@ class Scraper(models.Model):
     name = models.CharField(max_length=255, null=False, blank=False)
     email = models.EmailField(unique=True, null=False, blank=False)
     password = models.CharField(max_length=255, null=False, blank=False)
+
+    # Scheduling state, maintained by scraper.utils.account_scheduler
+    max_concurrent_leases = models.PositiveSmallIntegerField(default=1)
+    active_leases = models.PositiveIntegerField(default=0)
+    last_used_at = models.DateTimeField(null=True, blank=True)
+    benched_until = models.DateTimeField(null=True, blank=True)
+    consecutive_failures = models.PositiveIntegerField(default=0)
+    success_count = models.PositiveIntegerField(default=0)
+    failure_count = models.PositiveIntegerField(default=0)
+    avg_latency = models.FloatField(null=True, blank=True)  # seconds, EWMA
+
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -13,8 +24,58 @@ class Scraper(models.Model):
         return self.name
 
 
+class ScraperLease(models.Model):
+    """
+    One scrape's lease of a Scraper account, so abandoned leases can be
+    reclaimed one by one (see scraper.utils.account_scheduler)
+    """
+
+    scraper = models.ForeignKey(
+        Scraper, related_name="leases", on_delete=models.CASCADE
+    )
+    leased_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"Lease of {self.scraper} since {self.leased_at}"
+
+
+class ScraperSession(models.Model):
+    """
+    Authenticated LinkedIn browser state for a Scraper account, so drivers can
+    restore it instead of logging in on every scrape
+    """
+
+    scraper = models.OneToOneField(
+        Scraper, related_name="session", on_delete=models.CASCADE
+    )
+    cookies = models.JSONField(default=list)
+    local_storage = models.JSONField(default=dict)
+    last_validated_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Session for {self.scraper}"
+
+
+class ScrapingBatch(models.Model):
+    """A group of scraping tasks submitted together through the batch endpoint"""
+
+    batch_id = models.CharField(max_length=255, unique=True)
+    total_tasks = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Batch {self.batch_id} ({self.total_tasks} tasks)"
+
+    class Meta:
+        ordering = ["-created_at"]
+
+
 class ScrapingTask(models.Model):
     TASK_STATUS_CHOICES = [
+        ("WAITING", "Waiting"),
         ("PENDING", "Pending"),
         ("STARTED", "Started"),
         ("SUCCESS", "Success"),
@@ -22,12 +83,42 @@ class ScrapingTask(models.Model):
     ]
 
     task_id = models.CharField(max_length=255, unique=True)
+    batch = models.ForeignKey(
+        ScrapingBatch,
+        related_name="tasks",
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        # Indexed together with status in Meta.indexes
+        db_index=False,
+    )
+    # Lane of the batch the task is scraped in, and its place in the batch;
+    # each task queues the next PENDING one of its lane when it ends
+    lane = models.PositiveSmallIntegerField(null=True, blank=True)
+    position = models.PositiveIntegerField(null=True, blank=True)
     linkedin_url = models.URLField()
     status = models.CharField(
         max_length=10, choices=TASK_STATUS_CHOICES, default="PENDING"
     )
+    # What was requested: the PROFILE_SECTIONS to scrape (all when null) and
+    # the oldest stored profile accepted in seconds (freshness policy when null)
+    sections = models.JSONField(null=True, blank=True)
+    max_age = models.PositiveIntegerField(null=True, blank=True)
+    # Outcome of the task; the profile itself is resolved from ``user`` when
+    # read, and only copied in here if it could not be stored
     result = models.JSONField(null=True, blank=True)
+    user = models.ForeignKey(
+        "users.User",
+        related_name="scraping_tasks",
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+    )
+    # users.User.content_fingerprint of the profile the task returned
+    profile_fingerprint = models.CharField(max_length=64, blank=True, default="")
     error_message = models.TextField(null=True, blank=True)
+    # Seconds spent per scrape phase (see scraper.utils.timing.SCRAPE_PHASES)
+    timings = models.JSONField(default=dict, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -36,3 +127,40 @@ class ScrapingTask(models.Model):
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            # Default ordering and the admin's date filters
+            models.Index(fields=["created_at"], name="scrapingtask_created"),
+            # Tasks in a status by age, e.g. failures in the last hour
+            models.Index(
+                fields=["status", "created_at"], name="scrapingtask_status_created"
+            ),
+            # Finished tasks due for retention, stale in-flight tasks
+            models.Index(
+                fields=["status", "updated_at"], name="scrapingtask_status_updated"
+            ),
+            # A profile's tasks in a status
+            models.Index(
+                fields=["linkedin_url", "status"], name="scrapingtask_url_status"
+            ),
+            # Per-status counts of a batch
+            models.Index(fields=["batch", "status"], name="scrapingtask_batch_status"),
+            # The next task of a batch lane
+            models.Index(
+                fields=["batch", "lane", "status", "position"],
+                name="scrapingtask_batch_lane",
+            ),
+        ]
+        constraints = [
+            # Single-flight: at most one pending or running scrape per profile
+            models.UniqueConstraint(
+                fields=["linkedin_url"],
+                condition=models.Q(status__in=["PENDING", "STARTED"]),
+                name="unique_in_flight_scrape_per_url",
+            ),
+            # At most one scrape per profile queued behind the one in flight
+            models.UniqueConstraint(
+                fields=["linkedin_url"],
+                condition=models.Q(status="WAITING"),
+                name="unique_waiting_scrape_per_url",
+            ),
+        ]
@@ -0,0 +1,263 @@
+# Per-process pool of warm Chrome drivers used by the LinkedIn scrapers
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+
+from django.conf import settings
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
+
+logger = logging.getLogger(__name__)
+
+
+# URL patterns the lean driver mode blocks at the network layer. Profile data
+# is all in the HTML/JS, so none of these are needed for extraction.
+BLOCKED_URL_PATTERNS = [
+    # Images
+    "*.png",
+    "*.jpg",
+    "*.jpeg",
+    "*.gif",
+    "*.webp",
+    "*.svg",
+    "*.ico",
+    "*media.licdn.com/*",
+    # Fonts
+    "*.woff",
+    "*.woff2",
+    "*.ttf",
+    "*.otf",
+    # Media
+    "*.mp4",
+    "*.webm",
+    "*.m3u8",
+    "*.mp3",
+    "*dms.licdn.com/*",
+    # Trackers and analytics
+    "*px.ads.linkedin.com/*",
+    "*linkedin.com/li/track*",
+    "*linkedin.com/sensorCollect*",
+    "*snap.licdn.com/*",
+    "*google-analytics.com/*",
+    "*googletagmanager.com/*",
+    "*doubleclick.net/*",
+    "*bat.bing.com/*",
+    "*connect.facebook.net/*",
+]
+
+
+def build_chrome_driver(mode=None, log_network=False):
+    """
+    Create a Chrome driver with the scraper's stealth and performance options
+
+    Args:
+        mode (str): "lean" or "standard", defaults to SCRAPER_DRIVER_MODE
+        log_network (bool): Record DevTools network events in the
+            "performance" log, for measuring bytes transferred
+
+    Returns:
+        webdriver.Chrome: The started driver
+    """
+    if mode is None:
+        mode = getattr(settings, "SCRAPER_DRIVER_MODE", "standard")
+
+    chrome_options = Options()
+
+    # Basic stealth options
+    chrome_options.add_argument("--headless")
+    chrome_options.add_argument("--no-sandbox")
+    chrome_options.add_argument("--disable-dev-shm-usage")
+    chrome_options.add_argument("--disable-gpu")
+
+    # Anti-detection options
+    chrome_options.add_argument("--disable-blink-features=AutomationControlled")
+    chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
+    chrome_options.add_experimental_option("useAutomationExtension", False)
+
+    # Performance options
+    chrome_options.add_argument("--disable-extensions")
+    chrome_options.add_argument("--disable-plugins")
+    chrome_options.add_argument("--disable-images")  # Faster loading
+
+    # User agent (mimic real browser)
+    chrome_options.add_argument(
+        "--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+    )
+
+    # Window size
+    chrome_options.add_argument("--window-size=1920,1080")
+
+    if mode == "lean":
+        # Return from get() once the DOM is parsed; callers wait explicitly for
+        # the elements they read instead of for every subresource
+        chrome_options.page_load_strategy = "eager"
+        # --disable-images is ignored by current Chrome; this still works
+        chrome_options.add_argument("--blink-settings=imagesEnabled=false")
+
+    if log_network:
+        chrome_options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+
+    driver = webdriver.Chrome(options=chrome_options)
+
+    if mode == "lean":
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": BLOCKED_URL_PATTERNS})
+
+    # Remove automation indicators
+    driver.execute_script(
+        "Object.defineProperty(navigator, 'webdriver', {get: () => undefined})"
+    )
+
+    return driver
+
+
+@dataclass
+class PooledDriver:
+    """A Chrome driver owned by the pool, with its usage bookkeeping"""
+
+    driver: webdriver.Chrome
+    uses: int = 0
+    created_at: float = field(default_factory=time.monotonic)
+    # Scraper account whose LinkedIn session the browser currently holds
+    account_id: int = None
+
+
+class ChromeDriverPool:
+    """
+    Keep Chrome drivers alive between scrapes so each task skips browser startup.
+
+    Drivers are created lazily up to ``size``, health-checked before every
+    lease and recycled once they have served ``max_uses`` scrapes or are older
+    than ``max_age`` seconds.
+    """
+
+    def __init__(self, size=1, max_uses=20, max_age=3600, factory=build_chrome_driver):
+        self.size = size
+        self.max_uses = max_uses
+        self.max_age = max_age
+        self.factory = factory
+
+        self._idle = []
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(size)
+        self._closed = False
+
+    @contextmanager
+    def lease(self):
+        """
+        Lease a warm driver for the duration of the ``with`` block
+
+        The driver is discarded instead of returned to the pool when the block
+        raises, since its browser state is unknown at that point.
+        """
+        pooled = self._acquire()
+        try:
+            yield pooled
+        except BaseException:
+            self._release(pooled, discard=True)
+            raise
+        else:
+            self._release(pooled)
+
+    def close(self):
+        """Quit every idle driver and refuse further leases"""
+        with self._lock:
+            self._closed = True
+            idle, self._idle = self._idle, []
+
+        for pooled in idle:
+            self._quit(pooled)
+
+    def _acquire(self):
+        self._slots.acquire()
+        try:
+            while True:
+                with self._lock:
+                    if self._closed:
+                        raise RuntimeError("Chrome driver pool is closed")
+                    pooled = self._idle.pop() if self._idle else None
+
+                if pooled is None:
+                    logger.info("Starting a new Chrome driver for the pool")
+                    return PooledDriver(driver=self.factory())
+
+                if self._is_healthy(pooled):
+                    return pooled
+
+                logger.warning("Discarding unhealthy pooled Chrome driver")
+                self._quit(pooled)
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def _release(self, pooled, discard=False):
+        pooled.uses += 1
+        try:
+            if discard or self._is_exhausted(pooled):
+                self._quit(pooled)
+                return
+
+            with self._lock:
+                if self._closed:
+                    keep = False
+                else:
+                    self._idle.append(pooled)
+                    keep = True
+
+            if not keep:
+                self._quit(pooled)
+        finally:
+            self._slots.release()
+
+    def _is_exhausted(self, pooled):
+        if self.max_uses and pooled.uses >= self.max_uses:
+            return True
+        if self.max_age and time.monotonic() - pooled.created_at >= self.max_age:
+            return True
+        return False
+
+    def _is_healthy(self, pooled):
+        if self._is_exhausted(pooled):
+            return False
+        try:
+            # Any round trip to the browser fails if the session has died
+            return bool(pooled.driver.window_handles)
+        except Exception as e:
+            logger.warning(f"Pooled Chrome driver failed health check: {str(e)}")
+            return False
+
+    @staticmethod
+    def _quit(pooled):
+        try:
+            pooled.driver.quit()
+        except Exception as e:
+            logger.warning(f"Error quitting Chrome driver: {str(e)}")
+
+
+_driver_pool = None
+_driver_pool_lock = threading.Lock()
+
+
+def get_driver_pool():
+    """Return this process's driver pool, creating it from settings on first use"""
+    global _driver_pool
+    with _driver_pool_lock:
+        if _driver_pool is None:
+            _driver_pool = ChromeDriverPool(
+                size=getattr(settings, "SCRAPER_DRIVER_POOL_SIZE", 1),
+                max_uses=getattr(settings, "SCRAPER_DRIVER_MAX_USES", 20),
+                max_age=getattr(settings, "SCRAPER_DRIVER_MAX_AGE", 3600),
+            )
+        return _driver_pool
+
+
+def close_driver_pool():
+    """Shut down this process's driver pool, if one was started"""
+    global _driver_pool
+    with _driver_pool_lock:
+        pool, _driver_pool = _driver_pool, None
+
+    if pool is not None:
+        pool.close()
@@ -0,0 +1,298 @@
+# Browser-free extraction of LinkedIn profile data from captured page source
+import os
+
+import lxml.html
+
+from users.models import PROFILE_SECTIONS
+
+# PROFILE_SECTIONS that can still be scraped. The legacy interests and
+# accomplishments cards no longer exist on LinkedIn profiles.
+SCRAPABLE_SECTIONS = ("experiences", "educations")
+
+# Section pages captured per profile, relative to the profile URL, keyed by
+# the profile section they hold
+SECTION_PATHS = {
+    "experiences": "details/experience",
+    "educations": "details/education",
+}
+
+
+def _class_xpath(class_name):
+    """XPath predicate matching a class token, like By.CLASS_NAME"""
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {class_name} ')"
+
+
+LIST_CONTAINER_XPATH = f"//main//*[{_class_xpath('pvs-list__container')}]"
+LIST_ITEM_XPATH = f".//li[{_class_xpath('pvs-list__paged-list-item')}]"
+ENTITY_XPATH = ".//div[@data-view-name='profile-component-entity']"
+ABOUT_XPATH = f"//*[@id='about']/..//*[{_class_xpath('display-flex')}]"
+
+# Fields of linkedin_scraper.objects.Institution, shared by experiences and
+# educations so the output matches dataclasses.asdict() of the Selenium path
+INSTITUTION_FIELDS = (
+    "institution_name",
+    "linkedin_url",
+    "website",
+    "industry",
+    "type",
+    "headquarters",
+    "company_size",
+    "founded",
+)
+
+
+def extract_person_data(pages, linkedin_url, sections=PROFILE_SECTIONS):
+    """
+    Build the scraper's person_data dict from captured page source
+
+    Produces the same keys and value formats as
+    LinkedInPersonScraper.scrape_person, but parses each section's HTML once
+    in-process instead of issuing a browser round trip per element.
+
+    Args:
+        pages (dict): Page source keyed by "profile", "experiences" and
+            "educations"; missing pages produce empty lists
+        linkedin_url (str): The profile URL the pages were captured from
+        sections (iterable): PROFILE_SECTIONS to include; the others, and
+            those not in SCRAPABLE_SECTIONS, are left out of the result
+
+    Returns:
+        dict: Dictionary containing the extracted person data
+    """
+    name, location, about = parse_top_card(pages.get("profile"))
+    experiences = parse_experiences(pages.get("experiences"))
+    educations = parse_educations(pages.get("educations"))
+
+    first_experience = experiences[0] if experiences else {}
+
+    person_data = {
+        "name": name,
+        "job_title": first_experience.get("position_title") or None,
+        "company": first_experience.get("institution_name") or None,
+        "location": location,
+        "about": about,
+        "experiences": experiences,
+        "educations": educations,
+        "linkedin_url": linkedin_url,
+    }
+    for section in SCRAPABLE_SECTIONS:
+        if section not in sections:
+            del person_data[section]
+    return person_data
+
+
+def load_saved_pages(profile_dir):
+    """
+    Read a profile's saved page source from disk
+
+    Pages are laid out like the URLs they were captured from, e.g.
+    ``<profile_dir>/index.html`` and ``<profile_dir>/details/experience/index.html``,
+    so the same directory can also be served over HTTP.
+
+    Args:
+        profile_dir (str): Directory holding the profile's saved pages
+
+    Returns:
+        dict: Page source keyed like extract_person_data expects
+    """
+    paths = {"profile": ""}
+    paths.update(SECTION_PATHS)
+
+    pages = {}
+    for section, path in paths.items():
+        page_path = os.path.join(profile_dir, path, "index.html")
+        if os.path.exists(page_path):
+            with open(page_path, encoding="utf-8") as page_file:
+                pages[section] = page_file.read()
+    return pages
+
+
+def parse_top_card(html):
+    """
+    Extract name, location and about text from the main profile page
+
+    Returns:
+        tuple: (name, location, about), each None when not found
+    """
+    if not html:
+        return None, None, None
+
+    root = lxml.html.fromstring(html)
+
+    name = _first_text(root.xpath("//*[@class='mt2 relative']//h1"))
+    location = _first_text(
+        root.xpath("//*[@class='text-body-small inline t-black--light break-words']")
+    )
+    about = _first_text(root.xpath(ABOUT_XPATH))
+    return name, location, about
+
+
+def parse_experiences(html):
+    """Extract experience entries from the details/experience page"""
+    experiences = []
+
+    for logo, summary_fields, summary_text in _iter_entities(html):
+        company_linkedin_url = _first_href(logo)
+        if not company_linkedin_url:
+            continue
+
+        if len(summary_fields) == 4:
+            position_title, company, work_times, location = summary_fields
+        elif len(summary_fields) == 3:
+            if "·" in summary_fields[2]:
+                position_title, company, work_times = summary_fields
+                location = ""
+            else:
+                position_title = ""
+                company, work_times, location = summary_fields
+        else:
+            position_title = ""
+            company = summary_fields[0] if summary_fields else ""
+            work_times = ""
+            location = ""
+
+        from_date, to_date, duration = _split_work_times(work_times)
+
+        experiences.append(
+            {
+                **dict.fromkeys(INSTITUTION_FIELDS),
+                "institution_name": company,
+                "linkedin_url": company_linkedin_url,
+                "from_date": from_date,
+                "to_date": to_date,
+                "description": summary_text,
+                "position_title": position_title,
+                "duration": duration,
+                "location": location,
+            }
+        )
+
+    return experiences
+
+
+def parse_educations(html):
+    """Extract education entries from the details/education page"""
+    educations = []
+
+    for logo, summary_fields, summary_text in _iter_entities(html):
+        institution_name = summary_fields[0] if summary_fields else ""
+        degree = summary_fields[1] if len(summary_fields) > 1 else None
+
+        from_date = to_date = None
+        if len(summary_fields) > 2 and summary_fields[2]:
+            times = summary_fields[2].split(" ")
+            if len(times) > 3 and "-" in times:
+                from_date = times[times.index("-") - 1]
+            else:
+                from_date = times[0]
+            to_date = times[-1]
+
+        educations.append(
+            {
+                **dict.fromkeys(INSTITUTION_FIELDS),
+                "institution_name": institution_name,
+                "linkedin_url": _first_href(logo),
+                "from_date": from_date,
+                "to_date": to_date,
+                "description": summary_text,
+                "degree": degree,
+            }
+        )
+
+    return educations
+
+
+def _iter_entities(html):
+    """
+    Yield (logo element, summary field texts, summary text) per list entry
+
+    Mirrors the element layout the Selenium extraction walks: each entity has
+    a logo column and a details column whose first child holds the summary
+    lines and whose optional second child holds the description.
+    """
+    if not html:
+        return
+
+    root = lxml.html.fromstring(html)
+    containers = root.xpath(LIST_CONTAINER_XPATH)
+    if not containers:
+        return
+
+    # Only top-level entries; nested lists belong to their parent entry
+    for item in containers[0].xpath(LIST_ITEM_XPATH):
+        if _has_ancestor_item(item, containers[0]):
+            continue
+
+        entities = item.xpath(ENTITY_XPATH)
+        if not entities:
+            continue
+
+        columns = _children(entities[0])
+        if len(columns) < 2:
+            continue
+        logo, details = columns[0], columns[1]
+
+        details_children = _children(details)
+        summary = details_children[0] if details_children else None
+        description = details_children[1] if len(details_children) > 1 else None
+
+        summary_rows = _children(summary) if summary is not None else []
+        summary_lines = _children(summary_rows[0]) if summary_rows else []
+        summary_fields = [_span_text(line) for line in summary_lines]
+
+        yield logo, summary_fields, (
+            _text(description) if description is not None else ""
+        )
+
+
+def _has_ancestor_item(item, container):
+    parent = item.getparent()
+    while parent is not None and parent is not container:
+        if "pvs-list__paged-list-item" in (parent.get("class") or "").split():
+            return True
+        parent = parent.getparent()
+    return False
+
+
+def _split_work_times(work_times):
+    """Split "Jan 2021 - Present · 3 yrs" into (from_date, to_date, duration)"""
+    parts = work_times.split("·") if work_times else []
+    times = parts[0].strip() if parts else ""
+    duration = parts[1].strip() if len(parts) > 1 else None
+
+    from_date = " ".join(times.split(" ")[:2]) if times else ""
+    to_date = " ".join(times.split(" ")[3:]) if times else ""
+    return from_date, to_date, duration
+
+
+def _children(element):
+    return [child for child in element if isinstance(child.tag, str)]
+
+
+def _first_href(element):
+    for anchor in element.iter("a"):
+        href = anchor.get("href")
+        if href:
+            return href
+    return None
+
+
+def _span_text(element):
+    """Text of the element's first span, like find_element(By.TAG_NAME, "span")"""
+    spans = element.xpath(".//span")
+    return _text(spans[0] if spans else element)
+
+
+def _first_text(elements):
+    return _text(elements[0]) if elements else None
+
+
+def _text(element):
+    """Visible text of an element with whitespace normalized per line"""
+    for hidden in element.xpath(f".//*[{_class_xpath('visually-hidden')}]"):
+        hidden.drop_tree()
+    for br in element.iter("br"):
+        br.tail = "\n" + (br.tail or "")
+
+    lines = (" ".join(line.split()) for line in element.text_content().splitlines())
+    return "\n".join(line for line in lines if line)
@@ -1,15 +1,44 @@
 import logging
+import os
+import time
+from contextlib import ExitStack
 from dataclasses import asdict
 
-from linkedin_scraper import Person, actions
-from selenium import webdriver
-from selenium.common.exceptions import NoAlertPresentException
-from selenium.webdriver.chrome.options import Options
+from django.conf import settings
+from linkedin_scraper import Person
+from selenium.common.exceptions import (
+    NoAlertPresentException,
+    NoSuchElementException,
+    TimeoutException,
+)
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
 
-from scraper.models import Scraper
+from scraper.utils.account_scheduler import (
+    ScraperAccountChallenged,
+    ScraperAccountError,
+    lease_account,
+    release_account,
+)
+from scraper.utils.timing import PhaseTimer
+from users.models import PROFILE_SECTIONS
+
+from .driver_pool import get_driver_pool
+from .html_extractor import SCRAPABLE_SECTIONS, SECTION_PATHS, extract_person_data
+from .recordings import record_pages
+from .sessions import ensure_session, invalidate_session, login, save_session
 
 logger = logging.getLogger(__name__)
 
+# Seconds to wait for a captured page's key element before reading its source
+PAGE_ELEMENT_TIMEOUT = 5
+
+# Elements whose presence means a page has rendered what the extractors read.
+# With the lean driver's eager page loads these waits are what gates reading.
+TOP_CARD_XPATH = "//main//h1"
+SECTION_LIST_CLASS = "pvs-list__container"
+
 
 # Patch the focus method to handle missing alerts gracefully
 def patched_focus(self):
@@ -28,109 +57,211 @@ LinkedInScraper.focus = patched_focus
 
 
 class LinkedInPersonScraper:
-    def __init__(self):
+    def __init__(
+        self, driver_pool=None, timer=None, record_dir=None, extraction_engine=None
+    ):
         """
         Initialize LinkedIn scraper
+
+        Args:
+            driver_pool: Pool to lease Chrome drivers from (defaults to the
+                worker process's shared pool)
+            timer: PhaseTimer recording where each scrape's time goes
+            record_dir: Directory to record every scraped profile's pages to
+                for offline replay (defaults to SCRAPER_RECORD_DIR)
+            extraction_engine: "selenium" or "html" (defaults to
+                SCRAPER_EXTRACTION_ENGINE)
         """
+        self.driver_pool = driver_pool or get_driver_pool()
+        self.timer = timer or PhaseTimer()
+        self.record_dir = record_dir or getattr(settings, "SCRAPER_RECORD_DIR", None)
+        self.extraction_engine = extraction_engine or settings.SCRAPER_EXTRACTION_ENGINE
         self.driver = None
 
-    def _setup_driver(self):
-        """Setup Chrome driver with options"""
-        chrome_options = Options()
-
-        # Basic stealth options
-        chrome_options.add_argument("--headless")
-        chrome_options.add_argument("--no-sandbox")
-        chrome_options.add_argument("--disable-dev-shm-usage")
-        chrome_options.add_argument("--disable-gpu")
-
-        # Anti-detection options
-        chrome_options.add_argument("--disable-blink-features=AutomationControlled")
-        chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
-        chrome_options.add_experimental_option("useAutomationExtension", False)
-
-        # Performance options
-        chrome_options.add_argument("--disable-extensions")
-        chrome_options.add_argument("--disable-plugins")
-        chrome_options.add_argument("--disable-images")  # Faster loading
-
-        # User agent (mimic real browser)
-        chrome_options.add_argument(
-            "--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-        )
-
-        # Window size
-        chrome_options.add_argument("--window-size=1920,1080")
-
-        self.driver = webdriver.Chrome(options=chrome_options)
-
-        # Remove automation indicators
-        self.driver.execute_script(
-            "Object.defineProperty(navigator, 'webdriver', {get: () => undefined})"
-        )
-
-        return self.driver
-
-    def _get_credentials(self):
-        """Get credentials from a random Scraper model"""
-        # Use a random scraper
-        scraper = Scraper.objects.order_by("?").first()
-        if scraper:
-            return scraper.email, scraper.password
-        else:
-            logger.error("No scraper credentials found in database")
-            raise ValueError("No scraper credentials found in database")
-
-    def scrape_person(self, linkedin_url):
+    def scrape_person(self, linkedin_url, sections=PROFILE_SECTIONS):
         """
         Scrape a person's LinkedIn profile
 
         Args:
             linkedin_url: LinkedIn profile URL to scrape
+            sections: PROFILE_SECTIONS to scrape besides the top card; each
+                one left out saves its page navigations. Only
+                SCRAPABLE_SECTIONS are scraped.
 
         Returns:
-            dict: Dictionary containing scraped person data
+            dict: Dictionary containing scraped person data, with the scraped
+                sections listed under "sections"
         """
+        # Lease the least loaded healthy account before taking a browser
+        with self.timer.phase("account_lease"):
+            account = lease_account()
+        started_at = time.monotonic()
+
         try:
-            # Setup driver
-            self.driver = self._setup_driver()
-
-            # Get credentials
-            email, password = self._get_credentials()
-
-            # Login to LinkedIn
-            logger.info("Logging into LinkedIn...")
-            actions.login(self.driver, email, password)
-
-            # Scrape person data
-            logger.info(f"Scraping profile: {linkedin_url}")
-            person = Person(linkedin_url, driver=self.driver)
-
-            # Extract data
-            person_data = {
-                "name": person.name,
-                "job_title": person.job_title,
-                "company": person.company,
-                "location": person.location,
-                "about": person.about,
-                "experiences": [
-                    asdict(experience) for experience in person.experiences
-                ],
-                "educations": [asdict(education) for education in person.educations],
-                "interests": [asdict(interest) for interest in person.interests],
-                "accomplishments": [
-                    asdict(accomplishment) for accomplishment in person.accomplishments
-                ],
-                "linkedin_url": person.linkedin_url,
-            }
-
-            logger.info(f"Successfully scraped profile for: {person.name}")
-            return person_data
+            with ExitStack() as stack:
+                # Includes browser startup when the pool has no warm driver
+                with self.timer.phase("driver_lease"):
+                    pooled = stack.enter_context(self.driver_pool.lease())
+                self.driver = pooled.driver
+                person_data = self._scrape_with_driver(
+                    pooled, account, linkedin_url, sections
+                )
 
+        except ScraperAccountChallenged as e:
+            release_account(account, success=False, challenged=True)
+            logger.error(f"Error scraping LinkedIn profile: {str(e)}")
+            raise e
+        except ScraperAccountError as e:
+            release_account(account, success=False)
+            logger.error(f"Error scraping LinkedIn profile: {str(e)}")
+            raise e
         except Exception as e:
+            # Not the account's fault: leave its health alone
+            release_account(account, success=None)
             logger.error(f"Error scraping LinkedIn profile: {str(e)}")
             raise e
         finally:
-            # Clean up
-            if self.driver:
-                self.driver.quit()
+            self.driver = None
+
+        release_account(account, success=True, latency=time.monotonic() - started_at)
+        return person_data
+
+    def _scrape_with_driver(self, pooled, account, linkedin_url, sections):
+        """Authenticate as the account and scrape the profile with the leased driver"""
+        # Reuse the account's LinkedIn session, logging in only when needed
+        with self.timer.phase("session"):
+            session_source = ensure_session(pooled, account)
+        logger.info(f"Using {session_source} LinkedIn session for: {account}")
+
+        # Scrape person data, keeping the driver open for the pool
+        logger.info(f"Scraping profile: {linkedin_url}")
+        person_data = self._extract(linkedin_url, sections)
+
+        if not person_data["name"] and session_source != "login":
+            # LinkedIn rejected the reused session; log in again and retry once
+            with self.timer.phase("session"):
+                invalidate_session(pooled, account)
+                login(pooled, account)
+            person_data = self._extract(linkedin_url, sections)
+
+        # Keep the stored session in step with cookies LinkedIn rotated
+        with self.timer.phase("session"):
+            save_session(self.driver, account)
+
+        logger.info(f"Successfully scraped profile for: {person_data['name']}")
+        return person_data
+
+    def _extract(self, linkedin_url, sections=PROFILE_SECTIONS):
+        """
+        Extract the profile sections with the configured extraction engine
+
+        Requested sections outside SCRAPABLE_SECTIONS are skipped, and left
+        out of the returned ``sections`` so they are not marked as scraped.
+        """
+        sections = [section for section in SCRAPABLE_SECTIONS if section in sections]
+
+        html_engine = self.extraction_engine == "html"
+
+        if html_engine or self.record_dir:
+            with self.timer.phase("navigation"):
+                pages = self._capture_pages(linkedin_url, sections)
+
+        if html_engine:
+            with self.timer.phase("extraction"):
+                person_data = extract_person_data(pages, linkedin_url, sections)
+        else:
+            # Navigation and extraction are interleaved element by element
+            with self.timer.phase("extraction"):
+                person_data = self._extract_with_selenium(linkedin_url, sections)
+
+        person_data["sections"] = sections
+
+        if self.record_dir and person_data["name"]:
+            profile_dir = record_pages(
+                self.record_dir, linkedin_url, pages, person_data
+            )
+            logger.info(f"Recorded pages of {linkedin_url} to {profile_dir}")
+
+        return person_data
+
+    def _extract_with_selenium(self, linkedin_url, sections=PROFILE_SECTIONS):
+        """Extract the profile element by element through linkedin_scraper.Person"""
+        person = self._scrape_selected_sections(linkedin_url, sections)
+
+        person_data = {
+            "name": person.name,
+            "job_title": person.job_title,
+            "company": person.company,
+            "location": person.location,
+            "about": person.about,
+            "experiences": [asdict(experience) for experience in person.experiences],
+            "educations": [asdict(education) for education in person.educations],
+            "linkedin_url": person.linkedin_url,
+        }
+        for section in SCRAPABLE_SECTIONS:
+            if section not in sections:
+                del person_data[section]
+        return person_data
+
+    def _scrape_selected_sections(self, linkedin_url, sections):
+        """
+        Run only the parts of Person's scrape needed for the requested sections
+
+        Loads the profile for the top card, then visits the experience and
+        education pages only when they were requested.
+        """
+        person = Person(
+            linkedin_url, driver=self.driver, scrape=False, close_on_complete=False
+        )
+        person.location = None
+        self._wait_for(By.XPATH, TOP_CARD_XPATH)
+        person.focus()
+
+        try:
+            person.get_name_and_location()
+        except NoSuchElementException:
+            # Not signed in: leave the name empty so the session is renewed
+            logger.info(f"No profile top card found on {self.driver.current_url}")
+            return person
+        person.get_about()
+
+        if "experiences" in sections:
+            person.get_experiences()
+        if "educations" in sections:
+            person.get_educations()
+        return person
+
+    def _capture_pages(self, linkedin_url, sections=PROFILE_SECTIONS):
+        """
+        Capture the page source of the profile and each requested section page
+
+        Returns:
+            dict: Page source keyed by "profile" and the captured SECTION_PATHS keys
+        """
+        pages = {}
+
+        self.driver.get(linkedin_url)
+        self._wait_for(By.XPATH, TOP_CARD_XPATH)
+        pages["profile"] = self.driver.page_source
+
+        for section, path in SECTION_PATHS.items():
+            if section not in sections:
+                continue
+            self.driver.get(os.path.join(linkedin_url, path))
+            self._wait_for(By.CLASS_NAME, SECTION_LIST_CLASS)
+            # Long lists render lazily; scroll once so every entry is in the DOM
+            self.driver.execute_script(
+                "window.scrollTo(0, document.body.scrollHeight);"
+            )
+            pages[section] = self.driver.page_source
+
+        return pages
+
+    def _wait_for(self, by, name):
+        try:
+            WebDriverWait(self.driver, PAGE_ELEMENT_TIMEOUT).until(
+                EC.presence_of_element_located((by, name))
+            )
+        except TimeoutException:
+            # Empty sections never render the element; parse what is there
+            logger.debug(f"Timed out waiting for {name} on {self.driver.current_url}")
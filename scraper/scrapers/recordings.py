@@ -0,0 +1,113 @@
+# Record scraped profile pages to disk and replay them over a local HTTP server
+import functools
+import json
+import os
+import threading
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+import lxml.html
+
+from users.utils import canonicalize_linkedin_url
+
+from .html_extractor import SECTION_PATHS, load_saved_pages
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def profile_slug(linkedin_url):
+    """Return the /in/<slug>/ path segment of a profile URL"""
+    path = urlsplit(canonicalize_linkedin_url(linkedin_url)).path
+    return path.strip("/").split("/")[-1]
+
+
+def record_pages(record_dir, linkedin_url, pages, person_data=None):
+    """
+    Save a scrape's captured pages in the layout load_saved_pages reads
+
+    Pages go to ``<record_dir>/in/<slug>/`` mirroring the URLs they came from,
+    so the directory can be replayed with serve_recordings. Scripts are
+    stripped so a replayed page stays exactly as it was captured. The
+    extracted person data, when given, is saved as
+    ``<record_dir>/expected/<slug>.json`` to check replays against.
+
+    Args:
+        record_dir (str): Root directory of the recordings
+        linkedin_url (str): The profile URL the pages were captured from
+        pages (dict): Page source keyed like load_saved_pages returns it
+        person_data (dict): Optional data extracted from the pages
+
+    Returns:
+        str: Directory the profile's pages were saved to
+    """
+    slug = profile_slug(linkedin_url)
+    profile_dir = os.path.join(record_dir, "in", slug)
+
+    paths = {"profile": ""}
+    paths.update(SECTION_PATHS)
+    for section, html in pages.items():
+        page_dir = os.path.join(profile_dir, paths[section])
+        os.makedirs(page_dir, exist_ok=True)
+        with open(os.path.join(page_dir, "index.html"), "w", encoding="utf-8") as f:
+            f.write(_strip_scripts(html))
+
+    if person_data is not None:
+        expected_dir = os.path.join(record_dir, "expected")
+        os.makedirs(expected_dir, exist_ok=True)
+        expected = {
+            key: value for key, value in person_data.items() if key != "sections"
+        }
+        with open(os.path.join(expected_dir, f"{slug}.json"), "w") as f:
+            json.dump(expected, f, indent=2, ensure_ascii=False)
+
+    return profile_dir
+
+
+def recorded_profiles(record_dir):
+    """
+    List the profiles saved under a recordings directory
+
+    Returns:
+        list: (slug, pages, expected person data or None) tuples sorted by slug
+    """
+    profiles_dir = os.path.join(record_dir, "in")
+    if not os.path.isdir(profiles_dir):
+        return []
+
+    profiles = []
+    for slug in sorted(os.listdir(profiles_dir)):
+        profile_dir = os.path.join(profiles_dir, slug)
+        if not os.path.isdir(profile_dir):
+            continue
+
+        expected_path = os.path.join(record_dir, "expected", f"{slug}.json")
+        expected = None
+        if os.path.exists(expected_path):
+            with open(expected_path) as f:
+                expected = json.load(f)
+
+        profiles.append((slug, load_saved_pages(profile_dir), expected))
+    return profiles
+
+
+def serve_recordings(record_dir):
+    """
+    Serve a recordings directory over HTTP on a free local port
+
+    Returns:
+        tuple: (server, base URL); call server.shutdown() when done
+    """
+    handler = functools.partial(QuietHandler, directory=record_dir)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def _strip_scripts(html):
+    root = lxml.html.fromstring(html)
+    for script in root.xpath("//script"):
+        script.drop_tree()
+    return lxml.html.tostring(root, encoding="unicode", doctype="<!DOCTYPE html>")
@@ -0,0 +1,182 @@
+# Persist and restore authenticated LinkedIn sessions per Scraper account
+import logging
+
+from django.utils import timezone
+from linkedin_scraper import actions
+from linkedin_scraper import constants as c
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+
+from scraper.models import ScraperSession
+from scraper.utils.account_scheduler import (
+    ScraperAccountChallenged,
+    ScraperAccountError,
+)
+
+logger = logging.getLogger(__name__)
+
+# Lightweight same-origin page used to get a linkedin.com context for cookies
+LINKEDIN_ORIGIN_URL = "https://www.linkedin.com/robots.txt"
+LINKEDIN_FEED_URL = "https://www.linkedin.com/feed/"
+LINKEDIN_CHALLENGE_URL_MARKER = "/checkpoint/challenge"
+AUTH_COOKIE_NAME = "li_at"
+SESSION_CHECK_TIMEOUT = 5
+
+# Where LinkedIn sends clients whose session is no longer accepted
+LOGGED_OUT_URL_MARKERS = ("/login", "/authwall", "/checkpoint", "/uas/")
+
+
+def ensure_session(pooled, scraper):
+    """
+    Make sure the pooled driver is logged in as the given Scraper account
+
+    Reuses the driver's live session when it already belongs to the account,
+    then tries the stored session, and only falls back to a full login when
+    neither is valid.
+
+    Args:
+        pooled: PooledDriver leased from the driver pool
+        scraper: Scraper account to authenticate as
+
+    Returns:
+        str: How the session was obtained ("reused", "restored" or "login")
+    """
+    driver = pooled.driver
+
+    if pooled.account_id == scraper.pk and _has_auth_cookie(driver):
+        return "reused"
+
+    if restore_session(driver, scraper) and session_is_valid(driver):
+        logger.info(f"Restored LinkedIn session for scraper account: {scraper}")
+        ScraperSession.objects.filter(scraper=scraper).update(
+            last_validated_at=timezone.now()
+        )
+        pooled.account_id = scraper.pk
+        return "restored"
+
+    login(pooled, scraper)
+    return "login"
+
+
+def login(pooled, scraper):
+    """
+    Run a full LinkedIn login for the account and store the new session
+
+    Raises:
+        ScraperAccountChallenged: If LinkedIn challenged the login
+        ScraperAccountError: If LinkedIn did not accept the login
+    """
+    driver = pooled.driver
+    pooled.account_id = None
+
+    _clear_linkedin_state(driver)
+    logger.info(f"Logging into LinkedIn as scraper account: {scraper}")
+    try:
+        actions.login(driver, scraper.email, scraper.password)
+    except TimeoutException as e:
+        if LINKEDIN_CHALLENGE_URL_MARKER in driver.current_url:
+            raise ScraperAccountChallenged(
+                f"LinkedIn challenged scraper account: {scraper}"
+            ) from e
+        raise ScraperAccountError(
+            f"LinkedIn login failed for scraper account: {scraper}"
+        ) from e
+
+    save_session(driver, scraper)
+    pooled.account_id = scraper.pk
+
+
+def save_session(driver, scraper):
+    """Capture the driver's LinkedIn cookies and local storage for the account"""
+    try:
+        cookies = driver.get_cookies()
+        local_storage = driver.execute_script(
+            "return Object.assign({}, window.localStorage);"
+        )
+    except Exception as e:
+        logger.warning(f"Could not capture LinkedIn session for {scraper}: {str(e)}")
+        return None
+
+    session, _ = ScraperSession.objects.update_or_create(
+        scraper=scraper,
+        defaults={
+            "cookies": cookies,
+            "local_storage": local_storage or {},
+            "last_validated_at": timezone.now(),
+        },
+    )
+    return session
+
+
+def restore_session(driver, scraper):
+    """
+    Load the account's stored cookies and local storage into the driver
+
+    Returns:
+        bool: True if a stored session was applied, False if none exists
+    """
+    session = ScraperSession.objects.filter(scraper=scraper).first()
+    if session is None or not session.cookies:
+        return False
+
+    _clear_linkedin_state(driver)
+
+    for cookie in session.cookies:
+        cookie = {key: value for key, value in cookie.items() if value is not None}
+        if "expiry" in cookie:
+            cookie["expiry"] = int(cookie["expiry"])
+        try:
+            driver.add_cookie(cookie)
+        except Exception as e:
+            logger.debug(f"Skipping cookie {cookie.get('name')}: {str(e)}")
+
+    if session.local_storage:
+        driver.execute_script(
+            "for (const [key, value] of Object.entries(arguments[0])) {"
+            "  window.localStorage.setItem(key, value);"
+            "}",
+            session.local_storage,
+        )
+
+    return True
+
+
+def session_is_valid(driver):
+    """Quickly check that the driver's LinkedIn session is accepted"""
+    if not _has_auth_cookie(driver):
+        return False
+
+    try:
+        driver.get(LINKEDIN_FEED_URL)
+        if any(marker in driver.current_url for marker in LOGGED_OUT_URL_MARKERS):
+            return False
+        WebDriverWait(driver, SESSION_CHECK_TIMEOUT).until(
+            EC.presence_of_element_located((By.CLASS_NAME, c.VERIFY_LOGIN_ID))
+        )
+        return True
+    except Exception:
+        return False
+
+
+def invalidate_session(pooled, scraper):
+    """Forget the account's stored session after LinkedIn rejected it"""
+    logger.warning(f"Invalidating stored LinkedIn session for {scraper}")
+    ScraperSession.objects.filter(scraper=scraper).delete()
+    if pooled.account_id == scraper.pk:
+        pooled.account_id = None
+
+
+def _has_auth_cookie(driver):
+    try:
+        return driver.get_cookie(AUTH_COOKIE_NAME) is not None
+    except Exception:
+        return False
+
+
+def _clear_linkedin_state(driver):
+    """Drop any LinkedIn cookies and storage left by another account"""
+    driver.get(LINKEDIN_ORIGIN_URL)
+    driver.delete_all_cookies()
+    driver.execute_script("window.localStorage.clear();")
@@ -1,5 +1,36 @@
+from django.conf import settings
 from rest_framework import serializers
 
+from users.models import PROFILE_SECTIONS
+from users.utils import canonicalize_linkedin_url
+
+
+def validate_linkedin_profile_url(value):
+    """Validate that the URL is a LinkedIn profile URL"""
+    if "linkedin.com/in/" not in value:
+        raise serializers.ValidationError(
+            "Must be a valid LinkedIn profile URL (containing 'linkedin.com/in/')"
+        )
+    return value
+
+
+class ProfileSectionsField(serializers.ListField):
+    """Profile sections to scrape, returned deduplicated in PROFILE_SECTIONS order"""
+
+    child = serializers.ChoiceField(choices=PROFILE_SECTIONS)
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault("required", False)
+        kwargs.setdefault(
+            "help_text",
+            "Profile sections to scrape besides the top card (optional, default all)",
+        )
+        super().__init__(**kwargs)
+
+    def to_internal_value(self, data):
+        sections = super().to_internal_value(data)
+        return [section for section in PROFILE_SECTIONS if section in sections]
+
 
 class LinkedInScrapeRequestSerializer(serializers.Serializer):
     """Serializer for LinkedIn scrape request data"""
@@ -10,14 +41,32 @@ class LinkedInScrapeRequestSerializer(serializers.Serializer):
     scraper_id = serializers.IntegerField(
         required=False, help_text="ID of the Scraper instance to use (optional)"
     )
+    max_age = serializers.IntegerField(
+        required=False,
+        min_value=0,
+        help_text="Maximum acceptable age in seconds of a stored profile (optional)",
+    )
+    sections = ProfileSectionsField()
 
     def validate_linkedin_url(self, value):
-        """Validate that the URL is a LinkedIn profile URL"""
-        if "linkedin.com/in/" not in value:
-            raise serializers.ValidationError(
-                "Must be a valid LinkedIn profile URL (containing 'linkedin.com/in/')"
-            )
-        return value
+        """Validate the LinkedIn profile URL and reduce it to its canonical form"""
+        return canonicalize_linkedin_url(validate_linkedin_profile_url(value))
+
+
+class LinkedInBatchScrapeRequestSerializer(serializers.Serializer):
+    """Serializer for LinkedIn batch scrape request data"""
+
+    linkedin_urls = serializers.ListField(
+        child=serializers.URLField(validators=[validate_linkedin_profile_url]),
+        allow_empty=False,
+        max_length=settings.SCRAPER_BATCH_MAX_SIZE,
+        help_text="LinkedIn profile URLs to scrape",
+    )
+    sections = ProfileSectionsField()
+
+    def validate_linkedin_urls(self, value):
+        """Canonicalize the URLs and drop duplicates, keeping the submitted order"""
+        return list(dict.fromkeys(canonicalize_linkedin_url(url) for url in value))
 
 
 class ExperienceSerializer(serializers.Serializer):
@@ -66,6 +115,8 @@ class LinkedInPersonDataSerializer(serializers.Serializer):
     )
     contacts = ContactSerializer(required=False)
     linkedin_url = serializers.URLField(required=False, allow_blank=True)
+    sections = serializers.ListField(child=serializers.CharField(), required=False)
+    fingerprint = serializers.CharField(required=False, allow_blank=True)
 
 
 class LinkedInScrapeResponseSerializer(serializers.Serializer):
@@ -81,10 +132,36 @@ class TaskCreatedResponseSerializer(serializers.Serializer):
 
     success = serializers.BooleanField()
     task_id = serializers.CharField()
+    coalesced = serializers.BooleanField(required=False)
+    message = serializers.CharField()
+    status_url = serializers.URLField()
+
+
+class BatchCreatedResponseSerializer(serializers.Serializer):
+    """Serializer for batch creation response"""
+
+    success = serializers.BooleanField()
+    batch_id = serializers.CharField()
+    total_tasks = serializers.IntegerField()
+    attached_tasks = serializers.DictField(child=serializers.CharField())
     message = serializers.CharField()
     status_url = serializers.URLField()
 
 
+class BatchStatusResponseSerializer(serializers.Serializer):
+    """Serializer for batch aggregate progress response"""
+
+    batch_id = serializers.CharField()
+    total_tasks = serializers.IntegerField()
+    pending = serializers.IntegerField()
+    started = serializers.IntegerField()
+    success = serializers.IntegerField()
+    failure = serializers.IntegerField()
+    progress = serializers.FloatField()
+    is_complete = serializers.BooleanField()
+    created_at = serializers.DateTimeField()
+
+
 class TaskStatusResponseSerializer(serializers.Serializer):
     """Serializer for task status response"""
 
@@ -1,48 +1,140 @@
 import logging
 
-from celery import shared_task
+from celery import group, shared_task
+from celery.exceptions import Retry
+from celery.signals import worker_process_shutdown, worker_shutdown
+from django.conf import settings
+from django.db.models import Subquery
 
+from users.models import PROFILE_SECTIONS
 from users.utils import (
-    get_user_data_by_linkedin_url,
+    get_profile_age,
+    get_profile_freshness,
+    get_profile_reference,
+    get_scraped_sections,
     save_scraped_user_data,
-    user_exists_in_db,
 )
 
 from .models import Scraper, ScrapingTask
+from .scrapers.driver_pool import close_driver_pool
+from .scrapers.html_extractor import SCRAPABLE_SECTIONS
 from .scrapers.linkedin_scraper import LinkedInPersonScraper
+from .utils.account_scheduler import NoScraperAccountAvailable
+from .utils.retention import prune_task_history
+from .utils.single_flight import create_or_attach_task, start_waiting_task
+from .utils.task_events import publish_task_event
+from .utils.task_state import start_task, transition_task
+from .utils.timing import PhaseTimer
 
 logger = logging.getLogger(__name__)
 
 
-@shared_task(bind=True)
-def scrape_linkedin_profile_task(self, task_id, linkedin_url):
+@worker_process_shutdown.connect
+@worker_shutdown.connect
+def shutdown_driver_pool(**kwargs):
+    """Quit the warm Chrome drivers when the worker process exits"""
+    close_driver_pool()
+
+
+@shared_task(bind=True, acks_late=True)
+def scrape_linkedin_profile_task(
+    self, task_id, linkedin_url, max_age=None, sections=None, batch_id=None, lane=None
+):
     """
     Celery task to scrape a LinkedIn profile asynchronously
+
+    A stored profile is returned instead of scraping while it is fresh or
+    stale; stale profiles also get a background refresh scrape. ``max_age``
+    (seconds) overrides the freshness policy for this request.
+
+    ``sections`` limits the scrape to those PROFILE_SECTIONS (all when None).
+    A fresh stored profile missing some of them only has the missing sections
+    scraped and merged in. Sections outside SCRAPABLE_SECTIONS are skipped.
+
+    The task record references the stored user and the fingerprint of the
+    profile it returned rather than copying the profile into ``result``; the
+    profile is only copied in if it could not be stored.
+
+    Seconds spent per phase are recorded in the task record's ``timings``,
+    and every phase entered is published to the task's event stream.
+
+    ``batch_id`` and ``lane`` identify the batch lane the task belongs to.
+    The lane's next PENDING task is queued however this scrape ends, so a
+    failure never strands the rest of the lane (see dispatch_scraping_batch). Likewise a scrape of the same profile WAITING
+    for this one to end is queued then.
     """
+    retrying = False
+    try:
+        return _scrape_profile(self, task_id, linkedin_url, max_age, sections)
+    except Retry:
+        # The retried task hands the lane on
+        retrying = True
+        raise
+    finally:
+        if not retrying:
+            if lane is not None:
+                next_task = _lane_signature(batch_id, lane, after=task_id)
+                if next_task:
+                    next_task.delay()
+            start_waiting_scrape(linkedin_url)
+
+
+def _scrape_profile(task, task_id, linkedin_url, max_age, sections):
+    if sections is None:
+        sections = PROFILE_SECTIONS
+
     # Update task status to STARTED
     try:
-        task_record = ScrapingTask.objects.get(task_id=task_id)
-        task_record.status = "STARTED"
-        task_record.save()
+        task_record = ScrapingTask.objects.defer("result").get(task_id=task_id)
     except ScrapingTask.DoesNotExist:
         logger.error(f"Task record not found for task_id: {task_id}")
         return
+    if not start_task(task_record):
+        return
+
+    timer = PhaseTimer(on_phase=lambda phase: publish_task_event(task_record, phase))
 
     try:
-        # Check if user data already exists in database
-        if user_exists_in_db(linkedin_url):
+        # Check if usable user data already exists in database
+        with timer.phase("lookup"):
+            profile_age = get_profile_age(linkedin_url)
+            stored_sections = get_scraped_sections(linkedin_url)
+        freshness = get_profile_freshness(profile_age, max_age)
+        # Sections that can no longer be scraped never count as missing
+        missing_sections = [
+            section
+            for section in sections
+            if section in SCRAPABLE_SECTIONS and section not in stored_sections
+        ]
+        if freshness in ("fresh", "stale") and not missing_sections:
             logger.info(
-                f"User data already exists for: {linkedin_url}, returning from database"
+                f"{freshness.capitalize()} user data exists for: {linkedin_url}, "
+                "returning from database"
             )
 
-            # Get existing data from database
-            existing_data = get_user_data_by_linkedin_url(linkedin_url)
+            # Point the task at the stored profile
+            with timer.phase("lookup"):
+                user_id, fingerprint = get_profile_reference(linkedin_url)
 
             # Update task with existing result
-            result_data = {"success": True, "data": existing_data, "source": "database"}
-            task_record.status = "SUCCESS"
-            task_record.result = result_data
-            task_record.save()
+            result_data = {
+                "success": True,
+                "source": "database",
+                "freshness": freshness,
+            }
+            transition_task(
+                task_record,
+                "SUCCESS",
+                result=result_data,
+                user_id=user_id,
+                profile_fingerprint=fingerprint,
+                timings=timer.as_dict(),
+            )
+
+            # Stale-while-revalidate: refresh in the background once this task
+            # has left the in-flight state
+            if freshness == "stale":
+                queue_profile_refresh(linkedin_url, stored_sections)
 
             logger.info(
                 f"Successfully returned existing data for LinkedIn profile: {linkedin_url}"
@@ -52,41 +144,75 @@ def scrape_linkedin_profile_task(self, task_id, linkedin_url):
         # Check if we have scraper credentials
         if not Scraper.objects.exists():
             error_msg = "No scraper credentials found. Please contact support."
-            task_record.status = "FAILURE"
-            task_record.error_message = error_msg
-            task_record.save()
+            transition_task(task_record, "FAILURE", error_message=error_msg)
             return {"success": False, "error": error_msg}
 
+        # Fill in only the missing sections of a fresh profile
+        incremental = freshness == "fresh"
+        if incremental:
+            sections = missing_sections
+
         # Initialize and run scraper
-        logger.info(f"No existing data found for {linkedin_url}, starting scraping...")
-        scraper = LinkedInPersonScraper()
-        person_data = scraper.scrape_person(linkedin_url)
+        logger.info(
+            f"No usable data found for {linkedin_url} ({freshness}), "
+            f"scraping sections: {', '.join(sections) or 'none'}..."
+        )
+        scraper = LinkedInPersonScraper(timer=timer)
+        person_data = scraper.scrape_person(linkedin_url, sections)
 
         # Save scraped data to database
+        result_data = {"success": True, "source": "scraped"}
+        user = None
         try:
-            save_scraped_user_data(person_data)
+            with timer.phase("db_save"):
+                user = save_scraped_user_data(person_data, incremental=incremental)
             logger.info(
                 f"Successfully saved scraped data to database for: {linkedin_url}"
             )
         except Exception as save_error:
             logger.error(f"Error saving scraped data to database: {str(save_error)}")
-            # Continue execution, don't fail the task just because of save error
+            # Continue execution, don't fail the task just because of save error;
+            # with nothing stored to point at, the task keeps its own copy
+            result_data["data"] = person_data
 
         # Update task with success result
-        result_data = {"success": True, "data": person_data, "source": "scraped"}
-        task_record.status = "SUCCESS"
-        task_record.result = result_data
-        task_record.save()
+        transition_task(
+            task_record,
+            "SUCCESS",
+            result=result_data,
+            user=user,
+            profile_fingerprint=user.content_fingerprint if user else "",
+            timings=timer.as_dict(),
+        )
 
         logger.info(f"Successfully scraped LinkedIn profile: {linkedin_url}")
         return result_data
 
+    except NoScraperAccountAvailable as e:
+        # Every account is busy or benched; wait for one instead of failing
+        if task.request.retries < settings.SCRAPER_ACCOUNT_MAX_RETRIES:
+            transition_task(task_record, "PENDING")
+            logger.info(f"No scraper account available for {linkedin_url}, retrying")
+            raise task.retry(
+                exc=e,
+                countdown=settings.SCRAPER_ACCOUNT_RETRY_DELAY,
+                max_retries=settings.SCRAPER_ACCOUNT_MAX_RETRIES,
+            )
+
+        error_msg = str(e)
+        transition_task(
+            task_record, "FAILURE", error_message=error_msg, timings=timer.as_dict()
+        )
+
+        logger.error(f"Giving up on LinkedIn scraping: {error_msg}")
+        return {"success": False, "error": error_msg}
+
     except ValueError as e:
         # Handle validation errors
         error_msg = str(e)
-        task_record.status = "FAILURE"
-        task_record.error_message = error_msg
-        task_record.save()
+        transition_task(
+            task_record, "FAILURE", error_message=error_msg, timings=timer.as_dict()
+        )
 
         logger.error(f"Validation error in LinkedIn scraping: {error_msg}")
         return {"success": False, "error": error_msg}
@@ -98,10 +224,125 @@ def scrape_linkedin_profile_task(self, task_id, linkedin_url):
         error_msg = f"Scraping failed: {str(e)}"
         full_traceback = traceback.format_exc()
 
-        task_record.status = "FAILURE"
-        task_record.error_message = error_msg
-        task_record.save()
+        transition_task(
+            task_record, "FAILURE", error_message=error_msg, timings=timer.as_dict()
+        )
 
         logger.error(f"Unexpected error in LinkedIn profile scraping: {str(e)}")
         logger.error(f"Full traceback: {full_traceback}")
         return {"success": False, "error": error_msg}
+
+
+def dispatch_scraping_batch(batch_id, lanes):
+    """
+    Fan a batch of scraping tasks out with bounded parallelism
+
+    The batch's tasks are dealt into ``lanes`` lanes when created (see
+    ScrapingTask.lane). Only the first task of each lane is queued; each task
+    queues the next PENDING one of its lane from the database when it ends,
+    whether it succeeded or failed, so the batch never occupies more than
+    ``lanes`` workers at once.
+
+    Args:
+        batch_id (str): ID of the ScrapingBatch to start
+        lanes (int): Number of lanes the batch's tasks were dealt into
+
+    Returns:
+        GroupResult: The dispatched lane heads, or None if there were no tasks
+    """
+    heads = [_lane_signature(batch_id, lane) for lane in range(lanes)]
+    heads = [head for head in heads if head]
+    if not heads:
+        return None
+    return group(heads).apply_async()
+
+
+def _lane_signature(batch_id, lane, after=None):
+    """
+    Signature scraping the next PENDING task of a batch lane, if any is left
+
+    ``after`` is the ID of the task that just ended; only tasks placed after
+    it are considered, so a task that could not leave PENDING is not queued
+    again.
+    """
+    tasks = ScrapingTask.objects.filter(
+        batch__batch_id=batch_id, lane=lane, status="PENDING"
+    )
+    if after is not None:
+        tasks = tasks.filter(
+            position__gt=Subquery(
+                ScrapingTask.objects.filter(task_id=after).values("position")
+            )
+        )
+    task_record = (
+        tasks.order_by("position")
+        .only("task_id", "linkedin_url", "sections", "max_age")
+        .first()
+    )
+    if task_record is None:
+        return None
+    return scrape_linkedin_profile_task.si(
+        task_record.task_id,
+        task_record.linkedin_url,
+        task_record.max_age,
+        task_record.sections,
+        batch_id=batch_id,
+        lane=lane,
+    )
+
+
+def queue_profile_refresh(linkedin_url, sections=None):
+    """
+    Queue a background re-scrape of a stored profile
+
+    Goes through single-flight task creation, so a refresh is never queued
+    while another scrape of the same profile is pending or running; it
+    attaches to that scrape or waits for it to end.
+
+    Args:
+        linkedin_url (str): The LinkedIn profile URL to refresh
+        sections (list): PROFILE_SECTIONS to re-scrape (all when None)
+
+    Returns:
+        str: The ID of the refresh task, or of the scrape already in flight
+    """
+    # max_age=0 makes the task scrape instead of serving the stored profile
+    task_record, created = create_or_attach_task(linkedin_url, sections, 0)
+    if created and task_record.status == "PENDING":
+        scrape_linkedin_profile_task.delay(
+            task_record.task_id, linkedin_url, 0, sections
+        )
+        logger.info(f"Queued background refresh of stale profile: {linkedin_url}")
+    return task_record.task_id
+
+
+def start_waiting_scrape(linkedin_url):
+    """
+    Queue the scrape of a profile that was waiting for the previous one to end
+
+    Args:
+        linkedin_url (str): The LinkedIn profile URL whose scrape ended
+
+    Returns:
+        str: The ID of the queued task, or None if none was queued
+    """
+    task_record = start_waiting_task(linkedin_url)
+    if task_record is None:
+        return None
+
+    scrape_linkedin_profile_task.delay(
+        task_record.task_id, linkedin_url, task_record.max_age, task_record.sections
+    )
+    logger.info(f"Queued waiting scrape {task_record.task_id} of: {linkedin_url}")
+    return task_record.task_id
+
+
+@shared_task
+def prune_task_history_task():
+    """
+    Celery beat task applying the task history retention policy
+
+    Returns:
+        dict: Rows deleted and compacted and payload bytes freed per model
+    """
+    return prune_task_history()
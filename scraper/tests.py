@@ -1,3 +1,1479 @@
-from django.test import TestCase
+import json
+import os
+import re
+import tempfile
+import threading
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from celery import group
+from celery.canvas import Signature
+from celery.exceptions import Retry
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Count
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from selenium.common.exceptions import TimeoutException
+
+from WeSee.celery import app as celery_app
+
+from cv_agent.models import CVTask
+from users.cache import profile_cache
+from users.models import PROFILE_SECTIONS, Experience, Interest, User
+from users.utils import save_scraped_user_data
+
+from .management.commands.celery_worker import worker_argv
+from .models import (
+    Scraper,
+    ScraperLease,
+    ScraperSession,
+    ScrapingBatch,
+    ScrapingTask,
+)
+from .scrapers import sessions
+from .scrapers.driver_pool import ChromeDriverPool, PooledDriver
+from .scrapers.html_extractor import (
+    SCRAPABLE_SECTIONS,
+    extract_person_data,
+    load_saved_pages,
+    parse_educations,
+    parse_experiences,
+)
+from .scrapers.linkedin_scraper import LinkedInPersonScraper
+from .scrapers.recordings import record_pages, recorded_profiles
+from .tasks import (
+    dispatch_scraping_batch,
+    queue_profile_refresh,
+    scrape_linkedin_profile_task,
+    start_waiting_scrape,
+)
+from .utils import task_events
+from .utils.account_scheduler import (
+    NoScraperAccountAvailable,
+    ScraperAccountChallenged,
+    ScraperAccountError,
+    lease_account,
+    release_account,
+)
+from .utils.retention import prune_task_history
+from .utils.single_flight import in_flight_tasks
+from .utils.task_state import InvalidTaskTransition, start_task, transition_task
+from .utils.timing import PhaseTimer
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures", "linkedin")
+
+
+def load_expected(slug):
+    with open(os.path.join(FIXTURES_DIR, "expected", f"{slug}.json")) as f:
+        return json.load(f)
+
+
+class HTMLExtractorTests(SimpleTestCase):
+    """Offline tests of the browser-free extraction against saved profile pages"""
+
+    def setUp(self):
+        self.pages = load_saved_pages(os.path.join(FIXTURES_DIR, "in", "jane-doe"))
+        self.linkedin_url = "https://www.linkedin.com/in/jane-doe/"
+
+    def test_extracts_saved_profile(self):
+        person_data = extract_person_data(self.pages, self.linkedin_url)
+        self.assertEqual(person_data, load_expected("jane-doe"))
+
+    def test_output_matches_selenium_person_data_keys(self):
+        person_data = extract_person_data(self.pages, self.linkedin_url)
+        self.assertEqual(
+            set(person_data),
+            {
+                "name",
+                "job_title",
+                "company",
+                "location",
+                "about",
+                "experiences",
+                "educations",
+                "linkedin_url",
+            },
+        )
+        # Same keys as dataclasses.asdict() of linkedin_scraper's objects
+        self.assertEqual(
+            set(person_data["experiences"][0]),
+            {
+                "institution_name",
+                "linkedin_url",
+                "website",
+                "industry",
+                "type",
+                "headquarters",
+                "company_size",
+                "founded",
+                "from_date",
+                "to_date",
+                "description",
+                "position_title",
+                "duration",
+                "location",
+            },
+        )
+
+    def test_experience_summary_layouts(self):
+        experiences = parse_experiences(self.pages["experiences"])
+        self.assertEqual(
+            [
+                (e["position_title"], e["institution_name"], e["location"])
+                for e in experiences
+            ],
+            [
+                (
+                    "Senior Software Engineer",
+                    "Acme Corp · Full-time",
+                    "Berlin, Germany",
+                ),
+                ("Software Engineer", "Globex", ""),
+                ("", "Initech", "Austin, Texas"),
+            ],
+        )
+
+    def test_missing_sections_produce_empty_lists(self):
+        person_data = extract_person_data(
+            {"profile": self.pages["profile"]}, self.linkedin_url
+        )
+        self.assertEqual(person_data["name"], "Jane Doe")
+        self.assertEqual(person_data["experiences"], [])
+        self.assertIsNone(person_data["job_title"])
+        self.assertEqual(parse_educations(None), [])
+
+    def test_unrequested_sections_are_left_out(self):
+        person_data = extract_person_data(
+            {"profile": self.pages["profile"], "educations": self.pages["educations"]},
+            self.linkedin_url,
+            sections=["educations"],
+        )
+        self.assertNotIn("experiences", person_data)
+        self.assertNotIn("interests", person_data)
+        self.assertEqual(
+            person_data["educations"], load_expected("jane-doe")["educations"]
+        )
+
+
+class RecordingTests(SimpleTestCase):
+    """Recorded pages replay to the same extracted data"""
+
+    def test_recorded_pages_round_trip(self):
+        pages = load_saved_pages(os.path.join(FIXTURES_DIR, "in", "jane-doe"))
+        person_data = extract_person_data(
+            pages, "https://www.linkedin.com/in/jane-doe/"
+        )
+
+        with tempfile.TemporaryDirectory() as record_dir:
+            record_pages(
+                record_dir,
+                "https://de.linkedin.com/in/Jane-Doe?trk=x",
+                pages,
+                {**person_data, "sections": ["experiences"]},
+            )
+            ((slug, recorded, expected),) = recorded_profiles(record_dir)
+
+        self.assertEqual(slug, "jane-doe")
+        self.assertEqual(set(recorded), {"profile", "experiences", "educations"})
+        self.assertEqual(expected, person_data)
+        self.assertEqual(
+            extract_person_data(recorded, person_data["linkedin_url"]), person_data
+        )
+
+
+class PhaseTimerTests(SimpleTestCase):
+    """Per-phase timing of scrapes, against a scripted clock"""
+
+    def test_phases_accumulate(self):
+        entered = []
+        clock = [0.0, 1.0, 1.5, 2.0, 4.25, 4.5, 4.6, 5.0]
+        with mock.patch("scraper.utils.timing.time.perf_counter", side_effect=clock):
+            timer = PhaseTimer(on_phase=entered.append)
+            with timer.phase("session"):
+                pass
+            # A second login after a rejected session adds up
+            with timer.phase("session"):
+                pass
+            with self.assertRaises(ValueError), timer.phase("extraction"):
+                raise ValueError("Unreadable page")
+
+            self.assertEqual(
+                timer.as_dict(), {"session": 2.75, "extraction": 0.1, "total": 5.0}
+            )
+        self.assertEqual(entered, ["session", "session", "extraction"])
+
+    def test_timings_are_rounded_to_milliseconds(self):
+        clock = [0.0, 0.0, 0.12345, 1.23456]
+        with mock.patch("scraper.utils.timing.time.perf_counter", side_effect=clock):
+            timer = PhaseTimer()
+            with timer.phase("lookup"):
+                pass
+            self.assertEqual(timer.as_dict(), {"lookup": 0.123, "total": 1.235})
+
+
+class FakeDriver:
+    """Stands in for a Chrome driver; ``alive`` controls its health check"""
+
+    def __init__(self):
+        self.alive = True
+        self.quit_calls = 0
+
+    @property
+    def window_handles(self):
+        if not self.alive:
+            raise RuntimeError("Browser session is gone")
+        return ["main"]
+
+    def quit(self):
+        self.quit_calls += 1
+
+
+class ChromeDriverPoolTests(SimpleTestCase):
+    """Leasing, recycling and bounding of pooled drivers, without Chrome"""
+
+    def setUp(self):
+        patcher = mock.patch("scraper.scrapers.driver_pool.logger")
+        self.logger = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def lease_driver(self, pool):
+        with pool.lease() as pooled:
+            return pooled
+
+    def test_drivers_are_reused(self):
+        pool = ChromeDriverPool(factory=FakeDriver)
+
+        first = self.lease_driver(pool)
+        second = self.lease_driver(pool)
+
+        self.assertIs(second, first)
+        self.assertEqual(first.uses, 2)
+        self.assertEqual(first.driver.quit_calls, 0)
+
+    def test_drivers_retire_after_max_uses(self):
+        pool = ChromeDriverPool(max_uses=2, factory=FakeDriver)
+
+        first = self.lease_driver(pool)
+        self.lease_driver(pool)
+        third = self.lease_driver(pool)
+
+        self.assertIsNot(third, first)
+        self.assertEqual(first.driver.quit_calls, 1)
+
+    def test_drivers_retire_after_max_age(self):
+        pool = ChromeDriverPool(max_age=60, factory=FakeDriver)
+
+        first = self.lease_driver(pool)
+        first.created_at -= 61
+
+        self.assertIsNot(self.lease_driver(pool), first)
+        self.assertEqual(first.driver.quit_calls, 1)
+
+    def test_unhealthy_drivers_are_evicted(self):
+        pool = ChromeDriverPool(factory=FakeDriver)
+
+        first = self.lease_driver(pool)
+        first.driver.alive = False
+
+        self.assertIsNot(self.lease_driver(pool), first)
+        self.assertEqual(first.driver.quit_calls, 1)
+
+    def test_drivers_are_discarded_when_the_lease_fails(self):
+        pool = ChromeDriverPool(factory=FakeDriver)
+
+        with self.assertRaises(ValueError), pool.lease() as pooled:
+            raise ValueError("Scrape failed")
+
+        self.assertEqual(pooled.driver.quit_calls, 1)
+        self.assertIsNot(self.lease_driver(pool), pooled)
+
+    def test_leases_are_bounded_by_size(self):
+        pool = ChromeDriverPool(size=1, factory=FakeDriver)
+        leased = threading.Event()
+
+        def lease_in_thread():
+            with pool.lease():
+                leased.set()
+
+        with pool.lease():
+            thread = threading.Thread(target=lease_in_thread)
+            thread.start()
+            self.assertFalse(leased.wait(0.2))
+
+        self.assertTrue(leased.wait(5))
+        thread.join()
+
+    def test_close_quits_idle_drivers(self):
+        pool = ChromeDriverPool(factory=FakeDriver)
+        pooled = self.lease_driver(pool)
+
+        pool.close()
+
+        self.assertEqual(pooled.driver.quit_calls, 1)
+        with self.assertRaises(RuntimeError), pool.lease():
+            pass
+
+
+class FakeLinkedInDriver:
+    """
+    Browser stand-in for session handling: keeps cookies and local storage,
+    and lands on ``redirect_to`` (e.g. the authwall) for any page it gets
+    """
+
+    def __init__(self, redirect_to=None):
+        self.cookies = {}
+        self.local_storage = {}
+        self.redirect_to = redirect_to
+        self.current_url = "about:blank"
+
+    def get(self, url):
+        self.current_url = self.redirect_to or url
+
+    def add_cookie(self, cookie):
+        self.cookies[cookie["name"]] = cookie
+
+    def get_cookie(self, name):
+        return self.cookies.get(name)
+
+    def get_cookies(self):
+        return list(self.cookies.values())
+
+    def delete_all_cookies(self):
+        self.cookies.clear()
+
+    def execute_script(self, script, *args):
+        if "localStorage.clear" in script:
+            self.local_storage.clear()
+        elif "setItem" in script:
+            self.local_storage.update(args[0])
+        elif "localStorage" in script:
+            return dict(self.local_storage)
+
+    def find_element(self, by, value):
+        return object()
+
+
+class LinkedInSessionTests(TestCase):
+    """Reuse, restore and invalidation of stored LinkedIn sessions"""
+
+    auth_cookie = {"name": "li_at", "value": "token", "expiry": 1.9e9}
+
+    def setUp(self):
+        self.account = Scraper.objects.create(
+            name="scraper", email="scraper@example.com", password="secret"
+        )
+        patcher = mock.patch("scraper.scrapers.sessions.logger")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def store_session(self):
+        return ScraperSession.objects.create(
+            scraper=self.account,
+            cookies=[self.auth_cookie, {"name": "lang", "value": "en", "path": None}],
+            local_storage={"voyager": "1"},
+        )
+
+    def fake_login(self, driver, email, password):
+        driver.add_cookie({"name": "li_at", "value": "new-token"})
+
+    def test_live_session_is_reused(self):
+        pooled = PooledDriver(driver=FakeLinkedInDriver(), account_id=self.account.pk)
+        pooled.driver.add_cookie(self.auth_cookie)
+
+        with mock.patch.object(sessions.actions, "login") as login:
+            self.assertEqual(sessions.ensure_session(pooled, self.account), "reused")
+        login.assert_not_called()
+
+    def test_stored_session_is_restored(self):
+        self.store_session()
+        pooled = PooledDriver(driver=FakeLinkedInDriver())
+
+        with mock.patch.object(sessions.actions, "login") as login:
+            source = sessions.ensure_session(pooled, self.account)
+
+        self.assertEqual(source, "restored")
+        login.assert_not_called()
+        self.assertEqual(pooled.account_id, self.account.pk)
+        self.assertEqual(pooled.driver.cookies["li_at"]["expiry"], 1900000000)
+        self.assertNotIn("path", pooled.driver.cookies["lang"])
+        self.assertEqual(pooled.driver.local_storage, {"voyager": "1"})
+        stored = ScraperSession.objects.get(scraper=self.account)
+        self.assertIsNotNone(stored.last_validated_at)
+
+    def test_rejected_session_falls_back_to_login(self):
+        self.store_session()
+        pooled = PooledDriver(
+            driver=FakeLinkedInDriver(redirect_to="https://www.linkedin.com/authwall")
+        )
+
+        with mock.patch.object(
+            sessions.actions, "login", side_effect=self.fake_login
+        ) as login:
+            source = sessions.ensure_session(pooled, self.account)
+
+        self.assertEqual(source, "login")
+        login.assert_called_once_with(pooled.driver, "scraper@example.com", "secret")
+        self.assertEqual(pooled.account_id, self.account.pk)
+        stored = ScraperSession.objects.get(scraper=self.account)
+        self.assertEqual(stored.cookies, [{"name": "li_at", "value": "new-token"}])
+
+    def test_login_errors_are_account_errors(self):
+        challenge_url = "https://www.linkedin.com/checkpoint/challenge/abc"
+        for current_url, error in (
+            (challenge_url, ScraperAccountChallenged),
+            ("https://www.linkedin.com/login", ScraperAccountError),
+        ):
+            pooled = PooledDriver(driver=FakeLinkedInDriver(redirect_to=current_url))
+            with self.subTest(error=error), mock.patch.object(
+                sessions.actions, "login", side_effect=TimeoutException()
+            ), self.assertRaises(error) as raised:
+                sessions.login(pooled, self.account)
+
+            self.assertIs(type(raised.exception), error)
+            self.assertIsNone(pooled.account_id)
+            self.assertFalse(ScraperSession.objects.exists())
+
+    def test_invalidated_session_is_forgotten(self):
+        self.store_session()
+        pooled = PooledDriver(driver=FakeLinkedInDriver(), account_id=self.account.pk)
+
+        sessions.invalidate_session(pooled, self.account)
+
+        self.assertFalse(ScraperSession.objects.exists())
+        self.assertIsNone(pooled.account_id)
+
+
+@override_settings(SCRAPER_ACCOUNT_COOLDOWN=0, SCRAPER_ACCOUNT_LEASE_TIMEOUT=60)
+class AccountSchedulerTests(TestCase):
+    """Leasing of Scraper accounts by load, cooldown, lease age and health"""
+
+    def create_account(self, name="scraper", **fields):
+        return Scraper.objects.create(
+            name=name, email=f"{name}@example.com", password="secret", **fields
+        )
+
+    def test_leases_respect_capacity(self):
+        account = self.create_account(max_concurrent_leases=2)
+
+        first, second = lease_account(), lease_account()
+        with self.assertRaises(NoScraperAccountAvailable):
+            lease_account()
+
+        self.assertEqual((first.pk, second.pk), (account.pk, account.pk))
+        account.refresh_from_db()
+        self.assertEqual(account.active_leases, 2)
+        self.assertEqual(account.leases.count(), 2)
+
+        release_account(first, success=True)
+        account.refresh_from_db()
+        self.assertEqual(account.active_leases, 1)
+        self.assertEqual(lease_account().pk, account.pk)
+
+    def test_least_busy_account_is_leased_first(self):
+        busy = self.create_account("busy", max_concurrent_leases=2)
+        lease_account()
+        idle = self.create_account("idle")
+
+        self.assertEqual(lease_account().pk, idle.pk)
+        self.assertEqual(lease_account().pk, busy.pk)
+
+    def test_only_expired_leases_are_reclaimed(self):
+        account = self.create_account(max_concurrent_leases=2)
+        abandoned, held = lease_account(), lease_account()
+        ScraperLease.objects.filter(pk=abandoned.lease.pk).update(
+            leased_at=timezone.now() - timedelta(minutes=5)
+        )
+
+        with self.assertLogs("scraper.utils.account_scheduler", "WARNING"):
+            reclaimed = lease_account()
+        account.refresh_from_db()
+        self.assertEqual(account.active_leases, 2)
+        self.assertQuerySetEqual(
+            account.leases.order_by("pk"), [held.lease, reclaimed.lease]
+        )
+
+        # The slow worker's late release does not free the slot it lost
+        with self.assertLogs("scraper.utils.account_scheduler", "WARNING"):
+            release_account(abandoned, success=True)
+        account.refresh_from_db()
+        self.assertEqual(account.active_leases, 2)
+        with self.assertRaises(NoScraperAccountAvailable):
+            lease_account()
+
+        release_account(held, success=True)
+        account.refresh_from_db()
+        self.assertEqual(account.active_leases, 1)
+
+    def test_cooldown_runs_from_release(self):
+        account = self.create_account()
+
+        with override_settings(SCRAPER_ACCOUNT_COOLDOWN=30):
+            leased = lease_account()
+            # A scrape that outlasted the cooldown
+            Scraper.objects.filter(pk=account.pk).update(
+                last_used_at=timezone.now() - timedelta(minutes=1)
+            )
+            release_account(leased, success=True)
+
+            with self.assertRaises(NoScraperAccountAvailable):
+                lease_account()
+
+            Scraper.objects.filter(pk=account.pk).update(
+                last_used_at=timezone.now() - timedelta(seconds=31)
+            )
+            self.assertEqual(lease_account().pk, account.pk)
+
+    def assertBenchedFor(self, account, seconds):
+        account.refresh_from_db()
+        if seconds is None:
+            self.assertIsNone(account.benched_until)
+        else:
+            benched_for = (account.benched_until - timezone.now()).total_seconds()
+            self.assertAlmostEqual(benched_for, seconds, delta=5)
+
+    @override_settings(
+        SCRAPER_ACCOUNT_FAILURE_THRESHOLD=2,
+        SCRAPER_ACCOUNT_BENCH_BASE=60,
+        SCRAPER_ACCOUNT_BENCH_MAX=100,
+    )
+    def test_failures_bench_with_backoff(self):
+        account = self.create_account(max_concurrent_leases=3)
+        leases = [lease_account() for _ in range(3)]
+
+        release_account(leases[0], success=False)
+        self.assertBenchedFor(account, None)
+        with self.assertLogs("scraper.utils.account_scheduler", "WARNING"):
+            release_account(leases[1], success=False)
+        self.assertBenchedFor(account, 60)
+        with self.assertLogs("scraper.utils.account_scheduler", "WARNING"):
+            release_account(leases[2], success=False)
+        self.assertBenchedFor(account, 100)
+
+        self.assertEqual(account.consecutive_failures, 3)
+        with self.assertRaises(NoScraperAccountAvailable):
+            lease_account()
+
+        Scraper.objects.filter(pk=account.pk).update(
+            benched_until=timezone.now() - timedelta(seconds=1)
+        )
+        release_account(lease_account(), success=True)
+        account.refresh_from_db()
+        self.assertEqual(account.consecutive_failures, 0)
+        self.assertEqual(account.failure_count, 3)
+
+    @override_settings(SCRAPER_ACCOUNT_CHALLENGE_BENCH=1000)
+    def test_challenge_benches_immediately(self):
+        account = self.create_account()
+
+        with self.assertLogs("scraper.utils.account_scheduler", "WARNING"):
+            release_account(lease_account(), success=False, challenged=True)
+
+        self.assertBenchedFor(account, 1000)
+
+    def test_unrelated_failures_leave_health_alone(self):
+        account = self.create_account()
+
+        release_account(lease_account(), success=None)
+
+        account.refresh_from_db()
+        self.assertEqual(
+            (account.active_leases, account.failure_count, account.success_count),
+            (0, 0, 0),
+        )
+        self.assertIsNone(account.benched_until)
+
+    def test_scrape_errors_are_attributed(self):
+        account = self.create_account()
+        scraper = LinkedInPersonScraper(
+            driver_pool=ChromeDriverPool(factory=mock.MagicMock)
+        )
+
+        for error, failures in (
+            (RuntimeError("Profile page timed out"), 0),
+            (ScraperAccountError("Login rejected"), 1),
+        ):
+            with self.subTest(error=error), mock.patch(
+                "scraper.scrapers.linkedin_scraper.ensure_session",
+                side_effect=error,
+            ), self.assertRaises(type(error)), self.assertLogs("scraper", "INFO"):
+                scraper.scrape_person("https://www.linkedin.com/in/jane-doe/")
+            account.refresh_from_db()
+            self.assertEqual(account.failure_count, failures)
+            self.assertEqual(account.active_leases, 0)
+
+        with mock.patch(
+            "scraper.scrapers.linkedin_scraper.ensure_session",
+            side_effect=ScraperAccountChallenged("Checkpoint"),
+        ), self.assertRaises(ScraperAccountChallenged), self.assertLogs(
+            "scraper", "INFO"
+        ):
+            scraper.scrape_person("https://www.linkedin.com/in/jane-doe/")
+        self.assertBenchedFor(account, settings.SCRAPER_ACCOUNT_CHALLENGE_BENCH)
+
+    def test_no_accounts(self):
+        with self.assertRaises(ValueError), self.assertLogs(
+            "scraper.utils.account_scheduler", "ERROR"
+        ):
+            lease_account()
+
+
+class SingleFlightTests(TestCase):
+    """Requests for profiles already being scraped attach to the running scrape"""
+
+    linkedin_url = "https://www.linkedin.com/in/jane-doe/"
+
+    def setUp(self):
+        delay = mock.patch("scraper.views.scrape_linkedin_profile_task.delay")
+        dispatch = mock.patch("scraper.views.dispatch_scraping_batch")
+        self.delay = delay.start()
+        self.dispatch = dispatch.start()
+        self.addCleanup(delay.stop)
+        self.addCleanup(dispatch.stop)
+
+    def scrape(self, linkedin_url, **options):
+        return self.client.post(
+            reverse("scraper:linkedin-scrape-async"),
+            {"linkedin_url": linkedin_url, **options},
+            content_type="application/json",
+        ).json()
+
+    def scrape_batch(self, linkedin_urls):
+        return self.client.post(
+            reverse("scraper:linkedin-scrape-batch"),
+            {"linkedin_urls": linkedin_urls},
+            content_type="application/json",
+        ).json()
+
+    def test_requests_share_the_scrape_in_flight(self):
+        first = self.scrape(self.linkedin_url)
+        with self.assertLogs("scraper.views", "INFO"):
+            second = self.scrape("https://de.linkedin.com/in/Jane-Doe?trk=x")
+
+        self.assertFalse(first["coalesced"])
+        self.assertTrue(second["coalesced"])
+        self.assertEqual(second["task_id"], first["task_id"])
+        self.assertEqual(ScrapingTask.objects.count(), 1)
+        self.delay.assert_called_once()
+
+    def test_requests_attach_to_a_scrape_covering_them(self):
+        first = self.scrape(self.linkedin_url)
+        with self.assertLogs("scraper.views", "INFO"):
+            second = self.scrape(self.linkedin_url, sections=["experiences"])
+
+        self.assertTrue(second["coalesced"])
+        self.assertEqual(second["task_id"], first["task_id"])
+
+    def test_requests_not_covered_wait_for_the_scrape_in_flight(self):
+        first = self.scrape(self.linkedin_url, sections=["experiences"])
+        with self.assertLogs("scraper.views", "INFO"):
+            second = self.scrape(self.linkedin_url, sections=["educations"])
+            third = self.scrape(self.linkedin_url, sections=["interests"], max_age=0)
+
+        self.assertFalse(second["coalesced"])
+        self.assertNotEqual(second["task_id"], first["task_id"])
+        self.assertTrue(third["coalesced"])
+        self.assertEqual(third["task_id"], second["task_id"])
+        self.delay.assert_called_once()
+
+        # The waiting task was widened to cover both requests
+        waiting = ScrapingTask.objects.get(task_id=second["task_id"])
+        self.assertEqual(waiting.status, "WAITING")
+        self.assertEqual(waiting.sections, ["educations", "interests"])
+        self.assertEqual(waiting.max_age, 0)
+
+    def test_waiting_scrape_starts_once_the_scrape_in_flight_ends(self):
+        first = self.scrape(self.linkedin_url, sections=["experiences"])
+        with self.assertLogs("scraper.views", "INFO"):
+            second = self.scrape(self.linkedin_url, max_age=60)
+
+        self.assertIsNone(start_waiting_scrape(self.linkedin_url))
+
+        ScrapingTask.objects.filter(task_id=first["task_id"]).update(status="SUCCESS")
+        with self.assertLogs("scraper.tasks", "INFO"):
+            self.assertEqual(start_waiting_scrape(self.linkedin_url), second["task_id"])
+
+        self.assertEqual(
+            ScrapingTask.objects.get(task_id=second["task_id"]).status, "PENDING"
+        )
+        self.delay.assert_called_with(second["task_id"], self.linkedin_url, 60, None)
+
+    def test_stale_scrapes_are_replaced(self):
+        stale = ScrapingTask.objects.create(
+            task_id="stale", linkedin_url=self.linkedin_url, status="STARTED"
+        )
+        ScrapingTask.objects.filter(pk=stale.pk).update(
+            updated_at=timezone.now() - timedelta(days=1)
+        )
+
+        with self.assertLogs("scraper.utils.single_flight", "WARNING"):
+            response = self.scrape(self.linkedin_url)
+
+        self.assertFalse(response["coalesced"])
+        stale.refresh_from_db()
+        self.assertEqual(stale.status, "FAILURE")
+
+    def test_queued_scrapes_are_not_expired(self):
+        batch = ScrapingBatch.objects.create(batch_id="batch", total_tasks=1)
+        queued = ScrapingTask.objects.create(
+            task_id="queued",
+            batch=batch,
+            linkedin_url=self.linkedin_url,
+            status="PENDING",
+        )
+        ScrapingTask.objects.filter(pk=queued.pk).update(
+            updated_at=timezone.now() - timedelta(days=1)
+        )
+
+        response = self.scrape_batch([self.linkedin_url])
+
+        self.assertEqual(response["attached_tasks"], {self.linkedin_url: "queued"})
+        queued.refresh_from_db()
+        self.assertEqual(queued.status, "PENDING")
+
+    def test_batch_attaches_urls_in_flight(self):
+        in_flight = ScrapingTask.objects.create(
+            task_id="in-flight", linkedin_url=self.linkedin_url, status="PENDING"
+        )
+        other_url = "https://www.linkedin.com/in/john-roe/"
+
+        response = self.scrape_batch([self.linkedin_url, other_url])
+
+        self.assertEqual(response["total_tasks"], 1)
+        self.assertEqual(response["attached_tasks"], {self.linkedin_url: "in-flight"})
+        self.dispatch.assert_called_once_with(response["batch_id"], 1)
+        self.assertEqual(
+            list(
+                ScrapingTask.objects.filter(batch__isnull=False).values_list(
+                    "linkedin_url", flat=True
+                )
+            ),
+            [other_url],
+        )
+        self.assertEqual(in_flight.batch, None)
+
+    def test_batch_attaches_urls_lost_to_a_race(self):
+        lookup = in_flight_tasks
+
+        def racing_lookup(linkedin_urls):
+            if not ScrapingTask.objects.exists():
+                # Another request starts a scrape right after the batch's lookup
+                ScrapingTask.objects.create(
+                    task_id="racer", linkedin_url=self.linkedin_url, status="PENDING"
+                )
+                return ScrapingTask.objects.none()
+            return lookup(linkedin_urls)
+
+        with mock.patch("scraper.views.in_flight_tasks", side_effect=racing_lookup):
+            response = self.scrape_batch([self.linkedin_url])
+
+        self.assertEqual(response["total_tasks"], 0)
+        self.assertEqual(response["attached_tasks"], {self.linkedin_url: "racer"})
+        self.assertEqual(ScrapingTask.objects.count(), 1)
+
+    def test_one_in_flight_task_per_url(self):
+        for status in ("SUCCESS", "FAILURE", "PENDING"):
+            ScrapingTask.objects.create(
+                task_id=status, linkedin_url=self.linkedin_url, status=status
+            )
+
+        for status in ("PENDING", "STARTED"):
+            with self.subTest(status=status), self.assertRaises(
+                IntegrityError
+            ), transaction.atomic():
+                ScrapingTask.objects.create(
+                    task_id=f"second-{status}",
+                    linkedin_url=self.linkedin_url,
+                    status=status,
+                )
+
+        # Finished tasks free the slot
+        ScrapingTask.objects.filter(task_id="PENDING").update(status="SUCCESS")
+        ScrapingTask.objects.create(
+            task_id="next", linkedin_url=self.linkedin_url, status="PENDING"
+        )
+
+
+class BatchDispatchTests(TestCase):
+    """Batches fan out in bounded lanes that survive failed scrapes"""
+
+    def create_batch(self, count, lanes, sections=None):
+        batch = ScrapingBatch.objects.create(batch_id="batch", total_tasks=count)
+        return ScrapingTask.objects.bulk_create(
+            ScrapingTask(
+                task_id=f"task-{i}",
+                batch=batch,
+                lane=i % lanes,
+                position=i,
+                linkedin_url=f"https://www.linkedin.com/in/profile-{i}/",
+                sections=sections,
+            )
+            for i in range(count)
+        )
+
+    def run_task(self, task_record, outcome=None):
+        """Run a lane's task, returning the mock that queued the next one"""
+        with mock.patch(
+            "scraper.tasks._scrape_profile", side_effect=outcome
+        ), mock.patch.object(
+            Signature, "delay", autospec=True
+        ) as queue_next, self.assertLogs(
+            "celery.app.trace", "INFO"
+        ):
+            scrape_linkedin_profile_task.apply(
+                args=(task_record.task_id, task_record.linkedin_url),
+                kwargs={"batch_id": "batch", "lane": task_record.lane},
+            )
+        return queue_next
+
+    def test_lane_heads_are_queued(self):
+        tasks = self.create_batch(5, 2, ["interests"])
+
+        with mock.patch.object(group, "apply_async", autospec=True) as fan_out:
+            dispatch_scraping_batch("batch", 2)
+
+        (lanes,), _ = fan_out.call_args
+        heads = lanes.tasks
+        self.assertEqual(
+            [head.args for head in heads],
+            [
+                ("task-0", tasks[0].linkedin_url, None, ["interests"]),
+                ("task-1", tasks[1].linkedin_url, None, ["interests"]),
+            ],
+        )
+        self.assertEqual(
+            [head.kwargs for head in heads],
+            [{"batch_id": "batch", "lane": 0}, {"batch_id": "batch", "lane": 1}],
+        )
+        self.assertTrue(all(head.immutable for head in heads))
+
+    def test_small_and_empty_batches(self):
+        with mock.patch.object(group, "apply_async", autospec=True) as fan_out:
+            self.assertIsNone(dispatch_scraping_batch("batch", 0))
+            fan_out.assert_not_called()
+
+            self.create_batch(1, 1)
+            dispatch_scraping_batch("batch", 1)
+            (lanes,), _ = fan_out.call_args
+            self.assertEqual(len(lanes.tasks), 1)
+
+    def test_lane_moves_on_whatever_the_outcome(self):
+        first, second, third = self.create_batch(3, 1)
+
+        for outcome in (None, RuntimeError("Database unavailable")):
+            with self.subTest(outcome=outcome):
+                queue_next = self.run_task(first, outcome)
+
+            (next_task,), _ = queue_next.call_args
+            self.assertEqual(
+                next_task.args, ("task-1", second.linkedin_url, None, None)
+            )
+            self.assertEqual(next_task.kwargs, {"batch_id": "batch", "lane": 0})
+
+        # The lane ends with its last task
+        self.run_task(third).assert_not_called()
+
+    def test_retried_task_keeps_its_lane(self):
+        first, _ = self.create_batch(2, 1)
+
+        self.run_task(first, Retry()).assert_not_called()
+
+    @override_settings(SCRAPER_BATCH_PARALLELISM=2)
+    def test_batch_endpoint_dispatches_new_tasks(self):
+        urls = [f"https://www.linkedin.com/in/profile-{i}/" for i in range(3)]
+
+        with mock.patch("scraper.views.dispatch_scraping_batch") as dispatch:
+            response = self.client.post(
+                reverse("scraper:linkedin-scrape-batch"),
+                {"linkedin_urls": urls, "sections": ["interests"]},
+                content_type="application/json",
+            )
+
+        self.assertEqual(response.status_code, 202)
+        body = response.json()
+        self.assertEqual(body["total_tasks"], 3)
+        dispatch.assert_called_once_with(body["batch_id"], 2)
+        self.assertEqual(
+            list(
+                ScrapingTask.objects.filter(batch__batch_id=body["batch_id"])
+                .order_by("position")
+                .values_list("linkedin_url", "lane", "sections")
+            ),
+            [(url, i % 2, ["interests"]) for i, url in enumerate(urls)],
+        )
+
+        status = self.client.get(body["status_url"]).json()
+        self.assertEqual((status["total_tasks"], status["pending"]), (3, 3))
+
+
+@override_settings(TASK_STATUS_POLL_INTERVAL=0.01)
+class TaskStatusPollingTests(TestCase):
+    """Unchanged status polls are answered with 304 from updated_at alone"""
+
+    def setUp(self):
+        self.task = ScrapingTask.objects.create(
+            task_id="task-1",
+            linkedin_url="https://www.linkedin.com/in/jane-doe/",
+            result={"name": "Jane Doe"},
+            status="SUCCESS",
+        )
+        self.url = reverse("scraper:task-status", kwargs={"task_id": "task-1"})
+
+    def test_unchanged_poll_is_not_modified(self):
+        etag = self.client.get(self.url)["ETag"]
+
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b"")
+        self.assertEqual(response["ETag"], etag)
+
+    def test_changed_task_is_served_in_full(self):
+        etag = self.client.get(self.url)["ETag"]
+        self.task.status = "FAILURE"
+        self.task.save()
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["status"], "FAILURE")
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_long_poll_returns_when_task_changes(self):
+        etag = self.client.get(self.url)["ETag"]
+
+        def finish_task(seconds):
+            ScrapingTask.objects.filter(pk=self.task.pk).update(
+                status="FAILURE", updated_at=self.task.updated_at.replace(year=2100)
+            )
+
+        with mock.patch("scraper.utils.polling.time.sleep", side_effect=finish_task):
+            response = self.client.get(self.url, {"wait": 30}, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["status"], "FAILURE")
+
+    def test_long_poll_times_out_unchanged(self):
+        etag = self.client.get(self.url)["ETag"]
+
+        with override_settings(TASK_STATUS_MAX_WAIT=0.05):
+            response = self.client.get(self.url, {"wait": 30}, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 304)
+
+    def test_invalid_waits_do_not_hold_the_poll(self):
+        etag = self.client.get(self.url)["ETag"]
+
+        for wait in ("nan", "inf", "-inf", "-5", "soon"):
+            with self.subTest(wait=wait):
+                with mock.patch("scraper.utils.polling.time.sleep") as sleep:
+                    response = self.client.get(
+                        self.url, {"wait": wait}, HTTP_IF_NONE_MATCH=etag
+                    )
+                self.assertEqual(response.status_code, 304)
+                sleep.assert_not_called()
+
+    def test_unknown_task_is_not_found(self):
+        url = reverse("scraper:task-status", kwargs={"task_id": "missing"})
+        response = self.client.get(url, {"wait": 5}, HTTP_IF_NONE_MATCH='"x"')
+        self.assertEqual(response.status_code, 404)
+
+
+class TaskStateTests(TestCase):
+    """Status transitions are guarded single-row UPDATEs of the changed fields"""
+
+    def setUp(self):
+        self.task = ScrapingTask.objects.create(
+            task_id="task-1", linkedin_url="https://www.linkedin.com/in/jane-doe/"
+        )
+
+    def test_transition_writes_only_changed_fields(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.assertTrue(transition_task(self.task, "STARTED"))
+
+        (query,) = queries
+        self.assertTrue(query["sql"].startswith("UPDATE"))
+        self.assertNotIn("result", query["sql"])
+        self.assertNotIn("timings", query["sql"])
+        self.assertEqual(ScrapingTask.objects.get().status, "STARTED")
+
+    def test_transition_publishes_after_commit(self):
+        with mock.patch.object(task_events, "_publisher") as publisher:
+            with self.captureOnCommitCallbacks(execute=True):
+                transition_task(self.task, "STARTED")
+                publisher.publish.assert_not_called()
+
+        channel, payload = publisher.publish.call_args.args
+        self.assertEqual(channel, "task-events:scrape:task-1")
+        self.assertEqual(json.loads(payload)["status"], "STARTED")
+
+    def test_outdated_copy_does_not_clobber_newer_state(self):
+        other_worker = ScrapingTask.objects.get()
+        self.assertTrue(start_task(self.task))
+        transition_task(self.task, "FAILURE", error_message="Timed out")
+
+        self.assertFalse(start_task(other_worker))
+        self.assertFalse(start_task(ScrapingTask.objects.get()))
+        task = ScrapingTask.objects.get()
+        self.assertEqual(task.status, "FAILURE")
+        self.assertEqual(task.error_message, "Timed out")
+
+    def test_finished_tasks_cannot_move(self):
+        transition_task(self.task, "STARTED")
+        transition_task(self.task, "SUCCESS", result={"success": True})
+        with self.assertRaises(InvalidTaskTransition):
+            transition_task(self.task, "FAILURE")
+
+    def test_cv_tasks_share_the_transitions(self):
+        cv_task = CVTask.objects.create(
+            task_id="cv-1",
+            linkedin_url="https://www.linkedin.com/in/jane-doe/",
+            job_description="Engineer",
+        )
+        self.assertTrue(start_task(cv_task))
+        self.assertTrue(transition_task(cv_task, "SUCCESS", result="CV"))
+
+        cv_task = CVTask.objects.get()
+        self.assertEqual((cv_task.status, cv_task.result), ("SUCCESS", "CV"))
+
+
+class TaskResultReferenceTests(TestCase):
+    """Task rows point at the stored profile, resolved when the status is read"""
+
+    linkedin_url = "https://www.linkedin.com/in/jane-doe/"
+
+    def setUp(self):
+        profile_cache().clear()
+        self.user = save_scraped_user_data(
+            {"linkedin_url": self.linkedin_url, "name": "Jane Doe"}
+        )
+        self.task = ScrapingTask.objects.create(
+            task_id="task-1", linkedin_url=self.linkedin_url
+        )
+        self.url = reverse("scraper:task-status", kwargs={"task_id": "task-1"})
+
+    def test_stored_profile_is_referenced_not_copied(self):
+        with mock.patch.object(task_events, "_publisher"):
+            result = scrape_linkedin_profile_task.apply(
+                args=("task-1", self.linkedin_url)
+            ).get()
+
+        self.task.refresh_from_db()
+        self.assertEqual(result, self.task.result)
+        self.assertNotIn("data", self.task.result)
+        self.assertEqual(self.task.user, self.user)
+        self.assertEqual(self.task.profile_fingerprint, self.user.content_fingerprint)
+
+        response = self.client.get(self.url).json()
+        self.assertEqual(response["result"]["source"], "database")
+        self.assertEqual(response["result"]["data"]["name"], "Jane Doe")
+
+    def test_profile_changes_change_the_etag(self):
+        transition_task(self.task, "STARTED")
+        transition_task(
+            self.task,
+            "SUCCESS",
+            result={"success": True, "source": "scraped"},
+            user=self.user,
+            profile_fingerprint=self.user.content_fingerprint,
+        )
+        etag = self.client.get(self.url)["ETag"]
+        self.assertEqual(
+            self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304
+        )
+
+        save_scraped_user_data({"linkedin_url": self.linkedin_url, "name": "Jane Roe"})
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["result"]["data"]["name"], "Jane Roe")
+        self.assertEqual(
+            response.json()["result"]["fingerprint"], self.user.content_fingerprint
+        )
+
+
+@override_settings(PROFILE_FRESH_TTL=60, PROFILE_STALE_TTL=600)
+class StaleProfileRefreshTests(TestCase):
+    """Stale profiles are served while exactly one refresh scrape is queued"""
+
+    linkedin_url = "https://www.linkedin.com/in/jane-doe/"
+
+    def setUp(self):
+        profile_cache().clear()
+        user = save_scraped_user_data(
+            {"linkedin_url": self.linkedin_url, "name": "Jane Doe"}
+        )
+        User.objects.filter(pk=user.pk).update(
+            scraped_at=timezone.now() - timedelta(minutes=5)
+        )
+        patchers = [
+            mock.patch.object(task_events, "_publisher"),
+            mock.patch("scraper.tasks.scrape_linkedin_profile_task.delay"),
+        ]
+        _, self.delay = [patcher.start() for patcher in patchers]
+        for patcher in patchers:
+            self.addCleanup(patcher.stop)
+
+    def serve(self, task_id, max_age=None):
+        ScrapingTask.objects.create(task_id=task_id, linkedin_url=self.linkedin_url)
+        return scrape_linkedin_profile_task.apply(
+            args=(task_id, self.linkedin_url, max_age)
+        ).get()
+
+    def test_stale_hits_queue_one_refresh(self):
+        with self.assertLogs(level="INFO"):
+            result = self.serve("task-1")
+
+        self.assertEqual((result["source"], result["freshness"]), ("database", "stale"))
+        refresh = in_flight_tasks([self.linkedin_url]).get()
+        self.delay.assert_called_once_with(
+            refresh.task_id, self.linkedin_url, 0, list(PROFILE_SECTIONS)
+        )
+
+        # Later requests and refreshes attach to the refresh in flight
+        with self.assertLogs("scraper.views", "INFO"):
+            response = self.client.post(
+                reverse("scraper:linkedin-scrape-async"),
+                {"linkedin_url": self.linkedin_url},
+                content_type="application/json",
+            ).json()
+        self.assertEqual(response["task_id"], refresh.task_id)
+        self.assertEqual(queue_profile_refresh(self.linkedin_url), refresh.task_id)
+        self.delay.assert_called_once()
+
+    def test_fresh_hits_queue_nothing(self):
+        with self.assertLogs(level="INFO"):
+            result = self.serve("task-1", max_age=600)
+
+        self.assertEqual(result["freshness"], "fresh")
+        self.delay.assert_not_called()
+        self.assertFalse(in_flight_tasks([self.linkedin_url]).exists())
+
+    def test_unscrapable_sections_never_count_as_missing(self):
+        save_scraped_user_data(
+            {
+                "linkedin_url": self.linkedin_url,
+                "name": "Jane Doe",
+                "sections": list(SCRAPABLE_SECTIONS),
+            }
+        )
+
+        with self.assertLogs(level="INFO"):
+            result = self.serve("task-1", max_age=600)
+
+        self.assertEqual((result["source"], result["freshness"]), ("database", "fresh"))
+
+
+@override_settings(
+    TASK_COMPACT_AFTER=10 * 24 * 60 * 60,
+    TASK_DELETE_AFTER=100 * 24 * 60 * 60,
+    TASK_RETENTION_BATCH_SIZE=2,
+    TASK_ARCHIVE_DIR=None,
+)
+class TaskRetentionTests(TestCase):
+    """Old finished tasks are compacted, then deleted, in bounded batches"""
+
+    def create_tasks(self, model, age_days, status="SUCCESS", count=1, **fields):
+        created = []
+        for _ in range(count):
+            task_id = f"{model.__name__}-{age_days}-{status}-{len(created)}"
+            task = model.objects.create(
+                task_id=task_id,
+                linkedin_url="https://www.linkedin.com/in/jane-doe/",
+                status=status,
+                **fields,
+            )
+            created.append(task.pk)
+        model.objects.filter(pk__in=created).update(
+            updated_at=timezone.now() - timedelta(days=age_days)
+        )
+        return created
+
+    def test_tasks_are_compacted_then_deleted(self):
+        result = {"success": True, "source": "database"}
+        recent = self.create_tasks(ScrapingTask, 1, result=result)
+        old = self.create_tasks(ScrapingTask, 30, result=result, count=3)
+        expired = self.create_tasks(ScrapingTask, 200, result=result)
+        # Never touched while in flight, however old
+        self.create_tasks(ScrapingTask, 200, status="STARTED", count=1)
+        cv_old = self.create_tasks(
+            CVTask, 30, result="CV text", job_description="Engineer"
+        )
+
+        report = prune_task_history()
+
+        result_bytes = len(json.dumps(result))
+        self.assertEqual(
+            report["scraper.ScrapingTask"],
+            {
+                "deleted": 1,
+                "deleted_bytes": result_bytes,
+                "compacted": 3,
+                "compacted_bytes": 3 * result_bytes,
+            },
+        )
+        self.assertEqual(report["cv_agent.CVTask"]["compacted"], 1)
+        self.assertEqual(
+            report["cv_agent.CVTask"]["compacted_bytes"],
+            len("CV text") + len("Engineer"),
+        )
+
+        self.assertFalse(ScrapingTask.objects.filter(pk__in=expired).exists())
+        self.assertEqual(ScrapingTask.objects.get(pk=recent[0]).result, result)
+        self.assertFalse(
+            ScrapingTask.objects.filter(pk__in=old, result__isnull=False).exists()
+        )
+        cv_task = CVTask.objects.get(pk=cv_old[0])
+        self.assertEqual((cv_task.result, cv_task.job_description), (None, ""))
+        self.assertEqual(ScrapingTask.objects.filter(status="STARTED").count(), 1)
+
+        # Everything is done: a second run finds nothing left
+        self.assertEqual(prune_task_history()["scraper.ScrapingTask"]["compacted"], 0)
+
+    def test_compacted_tasks_still_serve_their_profile(self):
+        profile_cache().clear()
+        user = save_scraped_user_data(
+            {"linkedin_url": "https://www.linkedin.com/in/jane-doe/", "name": "Jane"}
+        )
+        (pk,) = self.create_tasks(
+            ScrapingTask,
+            30,
+            result={"success": True, "source": "scraped"},
+            user=user,
+            profile_fingerprint=user.content_fingerprint,
+        )
+
+        prune_task_history()
+
+        task = ScrapingTask.objects.get(pk=pk)
+        self.assertIsNone(task.result)
+        response = self.client.get(
+            reverse("scraper:task-status", kwargs={"task_id": task.task_id})
+        ).json()
+        self.assertTrue(response["result"]["success"])
+        self.assertEqual(response["result"]["data"]["name"], "Jane")
+        self.assertEqual(response["result"]["fingerprint"], user.content_fingerprint)
+
+    def test_runs_are_bounded(self):
+        self.create_tasks(ScrapingTask, 200, count=5)
+
+        with override_settings(TASK_RETENTION_MAX_BATCHES=2):
+            report = prune_task_history()
+
+        self.assertEqual(report["scraper.ScrapingTask"]["deleted"], 4)
+        self.assertEqual(ScrapingTask.objects.count(), 1)
+
+    def test_deleted_tasks_are_archived(self):
+        batch = ScrapingBatch.objects.create(batch_id="batch-1", total_tasks=1)
+        ScrapingBatch.objects.filter(pk=batch.pk).update(
+            created_at=timezone.now() - timedelta(days=200)
+        )
+        self.create_tasks(ScrapingTask, 200, batch=batch)
+
+        with tempfile.TemporaryDirectory() as archive_dir:
+            with override_settings(TASK_ARCHIVE_DIR=archive_dir):
+                report = prune_task_history()
+            (archive,) = os.listdir(archive_dir)
+            with open(os.path.join(archive_dir, archive)) as f:
+                rows = [json.loads(line) for line in f]
+
+        self.assertTrue(archive.startswith("scraper.scrapingtask-"))
+        self.assertEqual(
+            [row["task_id"] for row in rows], ["ScrapingTask-200-SUCCESS-0"]
+        )
+        self.assertEqual(report["scraper.ScrapingBatch"], {"deleted": 1})
+        self.assertFalse(ScrapingBatch.objects.exists())
+
+
+class QueryPlanTests(TestCase):
+    """Hot lookups are served from indexes, never by scanning the whole table"""
+
+    def assertUsesIndexes(self, queryset, ordered_scan=False):
+        """
+        Fail if the query scans a table
+
+        ``ordered_scan`` allows walking a table through an index in order,
+        which reads only as many rows as a LIMIT asks for.
+        """
+        if connection.vendor != "sqlite":
+            self.skipTest("Plan format checked is SQLite's EXPLAIN QUERY PLAN")
+        plan = queryset.explain()
+        scan = r"\bSCAN \w+$" if ordered_scan else r"\bSCAN \w+"
+        full_scans = [
+            line for line in plan.splitlines() if re.search(scan, line.strip())
+        ]
+        self.assertEqual(full_scans, [], f"Full table scan in:\n{plan}")
+
+    def test_task_lookups(self):
+        url = "https://www.linkedin.com/in/jane-doe/"
+        now = timezone.now()
+        for queryset in [
+            in_flight_tasks([url]),
+            in_flight_tasks([url]).filter(updated_at__lt=now),
+            ScrapingTask.objects.filter(linkedin_url=url, status="SUCCESS"),
+            ScrapingTask.objects.filter(
+                status="FAILURE", created_at__gte=now - timedelta(hours=1)
+            ),
+            ScrapingTask.objects.filter(
+                status__in=task_events.FINAL_STATUSES, updated_at__lt=now
+            ).values_list("pk", flat=True),
+            ScrapingTask.objects.filter(status="STARTED")[:25],
+            ScrapingTask.objects.filter(batch_id=1)
+            .values_list("status")
+            .annotate(count=Count("id"))
+            .order_by(),
+            ScrapingTask.objects.filter(
+                batch__batch_id="batch", lane=0, status="PENDING", position__gt=0
+            ).order_by("position")[:1],
+            CVTask.objects.filter(linkedin_url=url),
+            CVTask.objects.filter(status="FAILURE", created_at__gte=now),
+            CVTask.objects.filter(
+                status__in=task_events.FINAL_STATUSES, updated_at__lt=now
+            ),
+        ]:
+            with self.subTest(sql=str(queryset.query)):
+                self.assertUsesIndexes(queryset)
+
+    def test_newest_first_listings(self):
+        # The admin changelists and other default-ordered pages
+        for queryset in [ScrapingTask.objects.all()[:25], CVTask.objects.all()[:25]]:
+            with self.subTest(sql=str(queryset.query)):
+                self.assertUsesIndexes(queryset, ordered_scan=True)
+
+    def test_profile_lookups(self):
+        for queryset in [
+            User.objects.filter(linkedin_url__in=["a", "b"]),
+            Experience.objects.filter(user_id__in=[1, 2]).values_list(
+                "user_id", "institution_name"
+            ),
+            Interest.objects.filter(user_id=1),
+        ]:
+            with self.subTest(sql=str(queryset.query)):
+                self.assertUsesIndexes(queryset)
+
+
+class DatabaseSettingsTests(TestCase):
+    """Local SQLite connections are tuned for concurrent writers"""
+
+    def test_sqlite_pragmas(self):
+        if connection.vendor != "sqlite":
+            self.skipTest("SQLite only")
+        with connection.cursor() as cursor:
+            cursor.execute("PRAGMA busy_timeout")
+            self.assertEqual(cursor.fetchone()[0], 20000)
+            cursor.execute("PRAGMA synchronous")
+            self.assertEqual(cursor.fetchone()[0], 1)  # NORMAL
+        self.assertEqual(connection.transaction_mode, "IMMEDIATE")
+
+
+class FakePubSub:
+    """Stands in for a Redis pub/sub subscription with queued messages"""
+
+    def __init__(self, messages):
+        self.messages = list(messages)
+        self.channels = []
+
+    async def subscribe(self, channel):
+        self.channels.append(channel)
+
+    async def get_message(self, ignore_subscribe_messages, timeout):
+        return self.messages.pop(0) if self.messages else None
+
+    async def aclose(self):
+        pass
+
+
+class TaskEventStreamTests(TestCase):
+    """Task state transitions are published and streamed as server-sent events"""
+
+    def setUp(self):
+        self.task = ScrapingTask.objects.create(
+            task_id="task-1", linkedin_url="https://www.linkedin.com/in/jane-doe/"
+        )
+        self.url = reverse("scraper:task-events", kwargs={"task_id": "task-1"})
+
+    async def read_events(self):
+        response = await self.async_client.get(self.url)
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        body = b"".join([chunk async for chunk in response.streaming_content])
+        return [
+            json.loads(line[len("data: ") :])
+            for line in body.decode().splitlines()
+            if line.startswith("data: ")
+        ]
+
+    async def test_finished_task_streams_current_state_only(self):
+        self.task.status = "SUCCESS"
+        await self.task.asave()
+
+        with mock.patch.object(task_events.redis.asyncio.Redis, "from_url") as redis:
+            events = await self.read_events()
+
+        self.assertEqual([event["status"] for event in events], ["SUCCESS"])
+        redis.assert_not_called()
+
+    async def test_stream_follows_task_until_finished(self):
+        published = [
+            {"task_id": "task-1", "status": "STARTED", "phase": None},
+            {"task_id": "task-1", "status": "STARTED", "phase": "navigation"},
+            {"task_id": "task-1", "status": "SUCCESS", "phase": None},
+            {"task_id": "task-1", "status": "STARTED", "phase": "too late"},
+        ]
+        pubsub = FakePubSub(
+            [None] + [{"data": json.dumps(event)} for event in published]
+        )
+        client = mock.AsyncMock()
+        client.pubsub = mock.Mock(return_value=pubsub)
+
+        with mock.patch.object(
+            task_events.redis.asyncio.Redis, "from_url", return_value=client
+        ):
+            events = await self.read_events()
+
+        self.assertEqual(pubsub.channels, ["task-events:scrape:task-1"])
+        self.assertEqual(
+            [(event["status"], event["phase"]) for event in events],
+            [
+                ("PENDING", None),
+                ("STARTED", None),
+                ("STARTED", "navigation"),
+                ("SUCCESS", None),
+            ],
+        )
+
+
+class CeleryRoutingTests(SimpleTestCase):
+    """Scrapes and CV generation go to their own queues and worker pools"""
+
+    def test_tasks_are_routed_to_dedicated_queues(self):
+        router = celery_app.amqp.router
+        self.assertEqual(
+            router.route({}, "scraper.tasks.scrape_linkedin_profile_task")[
+                "queue"
+            ].name,
+            "scraping",
+        )
+        self.assertEqual(
+            router.route({}, "cv_agent.tasks.create_cv_task")["queue"].name, "cv"
+        )
+        self.assertEqual(
+            router.route({}, "WeSee.celery.debug_task")["queue"].name, "default"
+        )
+        self.assertTrue(scrape_linkedin_profile_task.acks_late)
+
+    def test_worker_profile_arguments(self):
+        self.assertEqual(
+            worker_argv("scraping", concurrency=3),
+            [
+                "worker",
+                "--hostname=scraping@%h",
+                "--queues=scraping",
+                "--pool=prefork",
+                "--concurrency=3",
+                "--prefetch-multiplier=1",
+                "--loglevel=INFO",
+            ],
+        )
@@ -1,6 +1,12 @@
 from django.urls import path
 
-from .views import LinkedInProfileScrapeAsyncAPIView, TaskStatusAPIView
+from .views import (
+    BatchStatusAPIView,
+    LinkedInBatchScrapeAPIView,
+    LinkedInProfileScrapeAsyncAPIView,
+    TaskStatusAPIView,
+    task_events_view,
+)
 
 app_name = "scraper"
 
@@ -11,10 +17,27 @@ urlpatterns = [
         LinkedInProfileScrapeAsyncAPIView.as_view(),
         name="linkedin-scrape-async",
     ),
+    # Batch scraping
+    path(
+        "batch/",
+        LinkedInBatchScrapeAPIView.as_view(),
+        name="linkedin-scrape-batch",
+    ),
+    path(
+        "batch/<str:batch_id>/",
+        BatchStatusAPIView.as_view(),
+        name="batch-status",
+    ),
     # Task status checking
     path(
         "status/<str:task_id>/",
         TaskStatusAPIView.as_view(),
         name="task-status",
     ),
+    # Task progress as server-sent events (needs an ASGI server)
+    path(
+        "events/<str:task_id>/",
+        task_events_view,
+        name="task-events",
+    ),
 ]
@@ -0,0 +1,185 @@
+# Lease Scraper accounts based on their load, cooldown and recent health
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, F, OuterRef, Q
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+
+from scraper.models import Scraper, ScraperLease
+
+logger = logging.getLogger(__name__)
+
+# How many candidates to try before giving up on a lease attempt
+LEASE_CANDIDATES = 5
+
+# Weight of the newest sample in the per-account latency moving average
+LATENCY_SMOOTHING = 0.2
+
+
+class NoScraperAccountAvailable(Exception):
+    """Raised when every Scraper account is busy, cooling down or benched"""
+
+
+class ScraperAccountError(Exception):
+    """Raised when a scrape fails because of its account, e.g. a rejected login"""
+
+
+class ScraperAccountChallenged(ScraperAccountError):
+    """Raised when LinkedIn challenges an account (captcha, verification, ...)"""
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def lease_account():
+    """
+    Lease the least busy Scraper account that is not cooling down or benched
+
+    An account cools down for SCRAPER_ACCOUNT_COOLDOWN seconds after each
+    lease and each release (last_used_at).
+
+    Leases are taken with a conditional UPDATE on the account row, so
+    concurrent workers never push an account past its concurrency limit.
+    Each lease is also recorded as a ScraperLease row; leases held longer
+    than SCRAPER_ACCOUNT_LEASE_TIMEOUT belong to workers that died
+    mid-scrape and are reclaimed one by one, leaving the account's other
+    leases counted.
+
+    Returns:
+        Scraper: The leased account, with its ScraperLease as ``lease``
+
+    Raises:
+        NoScraperAccountAvailable: If no account can be leased right now
+    """
+    now = timezone.now()
+    cooldown = timedelta(seconds=_setting("SCRAPER_ACCOUNT_COOLDOWN", 30))
+    lease_timeout = timedelta(
+        seconds=_setting("SCRAPER_ACCOUNT_LEASE_TIMEOUT", 15 * 60)
+    )
+
+    expired_leases = ScraperLease.objects.filter(leased_at__lt=now - lease_timeout)
+    has_capacity = Q(active_leases__lt=F("max_concurrent_leases"))
+    has_expired_lease = Exists(expired_leases.filter(scraper=OuterRef("pk")))
+    not_benched = Q(benched_until__isnull=True) | Q(benched_until__lte=now)
+    cooled_down = Q(last_used_at__isnull=True) | Q(last_used_at__lte=now - cooldown)
+
+    candidates = (
+        Scraper.objects.filter(not_benched, cooled_down)
+        .filter(has_capacity | has_expired_lease)
+        .order_by(
+            "active_leases",
+            F("last_used_at").asc(nulls_first=True),
+            F("avg_latency").asc(nulls_first=True),
+        )
+        .values_list("pk", flat=True)[:LEASE_CANDIDATES]
+    )
+
+    for pk in candidates:
+        account = Scraper.objects.filter(pk=pk)
+        with transaction.atomic():
+            # Only the worker whose DELETE removed a lease gives its slot back
+            reclaimed, _ = expired_leases.filter(scraper=pk).delete()
+            if reclaimed:
+                logger.warning(
+                    f"Reclaiming {reclaimed} abandoned lease(s) of scraper "
+                    f"account {pk}"
+                )
+                account.update(
+                    active_leases=Greatest(F("active_leases") - reclaimed, 0)
+                )
+
+            leased = account.filter(not_benched, has_capacity, cooled_down).update(
+                active_leases=F("active_leases") + 1, last_used_at=now
+            )
+            if leased:
+                leased_account = account.get()
+                leased_account.lease = ScraperLease.objects.create(
+                    scraper=leased_account, leased_at=now
+                )
+                return leased_account
+
+    if not Scraper.objects.exists():
+        logger.error("No scraper credentials found in database")
+        raise ValueError("No scraper credentials found in database")
+
+    raise NoScraperAccountAvailable(
+        "All scraper accounts are busy, cooling down or benched"
+    )
+
+
+@transaction.atomic
+def release_account(account, success, latency=None, challenged=False):
+    """
+    Return a leased account and record the outcome of its scrape
+
+    Its lease is only given back if it was not reclaimed as abandoned in the
+    meantime, so a slow worker never frees a slot another worker now holds.
+    The account's cooldown restarts from the release, so it rests between
+    the end of one scrape and the start of the next. Scrapes that failed
+    because of the account bench it with an exponential backoff once it
+    reaches the failure threshold; a challenge benches it immediately.
+    Scrapes that failed for other reasons (the profile, the network, the
+    browser) leave the account's health untouched.
+
+    Args:
+        account (Scraper): The account, with its lease, returned by
+            lease_account
+        success (bool): Whether the scrape succeeded, or None if it failed
+            for a reason unrelated to the account
+        latency (float): Scrape duration in seconds, recorded on success
+        challenged (bool): Whether LinkedIn challenged the account
+    """
+    updates = {"last_used_at": timezone.now()}
+    released, _ = ScraperLease.objects.filter(pk=account.lease.pk).delete()
+    if released:
+        updates["active_leases"] = Greatest(F("active_leases") - 1, 0)
+    else:
+        logger.warning(f"Lease of scraper account {account} was reclaimed")
+
+    if success:
+        updates["success_count"] = F("success_count") + 1
+        updates["consecutive_failures"] = 0
+        if latency is not None:
+            updates["avg_latency"] = Coalesce(
+                F("avg_latency") * (1 - LATENCY_SMOOTHING)
+                + latency * LATENCY_SMOOTHING,
+                latency,
+            )
+        Scraper.objects.filter(pk=account.pk).update(**updates)
+        return
+
+    if success is None:
+        Scraper.objects.filter(pk=account.pk).update(**updates)
+        return
+
+    updates["failure_count"] = F("failure_count") + 1
+    updates["consecutive_failures"] = F("consecutive_failures") + 1
+    account_row = Scraper.objects.filter(pk=account.pk)
+    account_row.update(**updates)
+
+    # Read back rather than trust the leased copy: other leases of the
+    # account may have failed since
+    failures = account_row.values_list("consecutive_failures", flat=True).get()
+    threshold = _setting("SCRAPER_ACCOUNT_FAILURE_THRESHOLD", 3)
+    bench_seconds = None
+    if challenged:
+        bench_seconds = _setting("SCRAPER_ACCOUNT_CHALLENGE_BENCH", 24 * 60 * 60)
+    elif failures >= threshold:
+        bench_seconds = min(
+            _setting("SCRAPER_ACCOUNT_BENCH_BASE", 5 * 60)
+            * 2 ** (failures - threshold),
+            _setting("SCRAPER_ACCOUNT_BENCH_MAX", 6 * 60 * 60),
+        )
+
+    if bench_seconds:
+        logger.warning(
+            f"Benching scraper account {account} for {bench_seconds}s "
+            f"(challenged={challenged}, consecutive failures={failures})"
+        )
+        account_row.update(
+            benched_until=timezone.now() + timedelta(seconds=bench_seconds)
+        )
@@ -0,0 +1,89 @@
+# Conditional (ETag) and long-poll support for the task status endpoints
+import logging
+import math
+import time
+
+from django.conf import settings
+from django.utils.cache import patch_cache_control
+from django.utils.http import parse_etags, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+
+logger = logging.getLogger(__name__)
+
+
+def task_etag(updated_at, *versions):
+    """
+    Build the ETag of a task's status from its last update time
+
+    Every status change bumps the task's ``updated_at``. ``versions`` add
+    anything else the response is built from, such as the fingerprint of a
+    profile resolved at read time, so the ETag changes exactly when the
+    status response does.
+    """
+    return quote_etag(":".join([updated_at.isoformat(), *filter(None, versions)]))
+
+
+def requested_wait(request):
+    """
+    Get the long-poll wait requested with ``?wait=<seconds>``
+
+    Returns:
+        float: Seconds to hold the request, capped at TASK_STATUS_MAX_WAIT;
+            0 if not requested or not a finite number
+    """
+    try:
+        wait = float(request.query_params.get("wait", 0))
+    except ValueError:
+        return 0
+    # nan would never let the deadline pass
+    if not math.isfinite(wait):
+        return 0
+    return min(max(wait, 0), settings.TASK_STATUS_MAX_WAIT)
+
+
+def not_modified_response(request, tasks, version_fields=()):
+    """
+    Answer a status poll with 304 Not Modified if the client's copy is current
+
+    Only the task's ``updated_at`` (and ``version_fields``) are read, so
+    unchanged polls never load or serialize its result. With
+    ``?wait=<seconds>`` the request is held until the task changes or the wait
+    runs out, checking every TASK_STATUS_POLL_INTERVAL seconds.
+
+    Args:
+        request: DRF request, optionally carrying If-None-Match
+        tasks (QuerySet): Queryset matching the polled task
+        version_fields (tuple): Further fields, possibly across relations,
+            whose values go into the ETag (see task_etag)
+
+    Returns:
+        Response: 304 response, or None if the full status should be served
+    """
+    etags = parse_etags(request.headers.get("If-None-Match", ""))
+    if not etags:
+        return None
+
+    deadline = time.monotonic() + requested_wait(request)
+    while True:
+        row = tasks.values_list("updated_at", *version_fields).first()
+        if row is None:
+            # Unknown task: let the view answer 404
+            return None
+
+        etag = task_etag(*row)
+        if etag not in etags and "*" not in etags:
+            return None
+
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return with_etag(Response(status=status.HTTP_304_NOT_MODIFIED), *row)
+        time.sleep(min(settings.TASK_STATUS_POLL_INTERVAL, remaining))
+
+
+def with_etag(response, updated_at, *versions):
+    """Tag a status response so clients can poll it conditionally"""
+    response["ETag"] = task_etag(updated_at, *versions)
+    # Clients and proxies may keep the response but must revalidate it
+    patch_cache_control(response, no_cache=True)
+    return response
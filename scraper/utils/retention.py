@@ -0,0 +1,136 @@
+# Retention of finished ScrapingTask and CVTask rows: payloads are stripped
+# once tasks only matter for auditing, and rows are deleted (optionally
+# archived first) once they no longer matter at all
+import json
+import logging
+import os
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q, Sum, TextField
+from django.db.models.functions import Cast, Coalesce, Length
+from django.utils import timezone
+
+from cv_agent.models import CVTask
+from scraper.models import ScrapingBatch, ScrapingTask
+
+from .task_events import FINAL_STATUSES
+
+logger = logging.getLogger(__name__)
+
+# Payload fields stripped from compacted rows, with their stripped value.
+# Status, URL, timestamps, timings and the profile reference are kept, so the
+# status endpoint still serves the profile of a compacted scraping task.
+COMPACTED_FIELDS = {
+    ScrapingTask: {"result": None},
+    CVTask: {"result": None, "job_description": ""},
+}
+
+
+def prune_task_history(now=None):
+    """
+    Apply the retention policy to finished tasks
+
+    Tasks finished more than TASK_DELETE_AFTER seconds ago are deleted,
+    after being appended to TASK_ARCHIVE_DIR if set. Those finished more than
+    TASK_COMPACT_AFTER seconds ago have their payloads stripped. Rows are
+    handled TASK_RETENTION_BATCH_SIZE at a time, for at most
+    TASK_RETENTION_MAX_BATCHES batches per model and step, so a run never
+    holds long locks; whatever is left is picked up by the next run.
+    Scraping batches older than the deletion cutoff that no longer have
+    tasks are deleted too.
+
+    Args:
+        now (datetime): Reference time for the cutoffs (default: now)
+
+    Returns:
+        dict: Per model label, the deleted and compacted row counts and the
+            payload bytes each freed
+    """
+    now = now or timezone.now()
+    delete_before = now - timedelta(seconds=settings.TASK_DELETE_AFTER)
+    compact_before = now - timedelta(seconds=settings.TASK_COMPACT_AFTER)
+
+    report = {}
+    for model, stripped in COMPACTED_FIELDS.items():
+        finished = model.objects.filter(status__in=FINAL_STATUSES)
+        deleted, deleted_bytes = _delete_in_batches(
+            finished.filter(updated_at__lt=delete_before), stripped, now
+        )
+
+        has_payload = Q()
+        for field, value in stripped.items():
+            has_payload |= ~Q(
+                **{f"{field}__isnull": True} if value is None else {field: value}
+            )
+        compacted, compacted_bytes = _compact_in_batches(
+            finished.filter(has_payload, updated_at__lt=compact_before), stripped
+        )
+
+        report[model._meta.label] = {
+            "deleted": deleted,
+            "deleted_bytes": deleted_bytes,
+            "compacted": compacted,
+            "compacted_bytes": compacted_bytes,
+        }
+
+    deleted_batches, _ = ScrapingBatch.objects.filter(
+        created_at__lt=delete_before, tasks__isnull=True
+    ).delete()
+    report[ScrapingBatch._meta.label] = {"deleted": deleted_batches}
+
+    logger.info(f"Pruned task history: {report}")
+    return report
+
+
+def _batches(queryset):
+    """Yield lists of at most TASK_RETENTION_BATCH_SIZE primary keys"""
+    for _ in range(settings.TASK_RETENTION_MAX_BATCHES):
+        pks = list(
+            queryset.order_by("pk").values_list("pk", flat=True)[
+                : settings.TASK_RETENTION_BATCH_SIZE
+            ]
+        )
+        if not pks:
+            return
+        yield pks
+
+
+def _payload_bytes(model, pks, fields):
+    """Total length of the given fields' stored values in the given rows"""
+    sizes = {
+        field: Coalesce(Sum(Length(Cast(field, TextField()))), 0) for field in fields
+    }
+    return sum(model.objects.filter(pk__in=pks).aggregate(**sizes).values())
+
+
+def _delete_in_batches(queryset, stripped, now):
+    model = queryset.model
+    deleted = freed = 0
+    for pks in _batches(queryset):
+        freed += _payload_bytes(model, pks, stripped)
+        if settings.TASK_ARCHIVE_DIR:
+            _archive(model, pks, now)
+        deleted += model.objects.filter(pk__in=pks).delete()[0]
+    return deleted, freed
+
+
+def _compact_in_batches(queryset, stripped):
+    model = queryset.model
+    compacted = freed = 0
+    for pks in _batches(queryset):
+        freed += _payload_bytes(model, pks, stripped)
+        compacted += model.objects.filter(pk__in=pks).update(**stripped)
+    return compacted, freed
+
+
+def _archive(model, pks, now):
+    """Append rows to the day's JSON lines archive of the model"""
+    os.makedirs(settings.TASK_ARCHIVE_DIR, exist_ok=True)
+    path = os.path.join(
+        settings.TASK_ARCHIVE_DIR, f"{model._meta.label_lower}-{now:%Y-%m-%d}.jsonl"
+    )
+    with open(path, "a") as f:
+        for row in model.objects.filter(pk__in=pks).values():
+            f.write(json.dumps(row, cls=DjangoJSONEncoder) + "\n")
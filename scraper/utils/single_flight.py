@@ -0,0 +1,187 @@
+# Coalesce scrape requests for profiles that already have a scrape in flight
+import logging
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from scraper.models import ScrapingTask
+from users.models import PROFILE_SECTIONS
+
+from .task_state import transition_task
+
+logger = logging.getLogger(__name__)
+
+IN_FLIGHT_STATUSES = ("PENDING", "STARTED")
+
+
+def in_flight_tasks(linkedin_urls):
+    """Return the pending or running scraping tasks for the given URLs"""
+    return ScrapingTask.objects.filter(
+        linkedin_url__in=linkedin_urls, status__in=IN_FLIGHT_STATUSES
+    )
+
+
+def expire_stale_tasks(linkedin_urls):
+    """
+    Fail running tasks that have not moved for longer than the in-flight timeout
+
+    A worker that died mid-scrape would otherwise hold the profile's
+    single-flight slot forever. PENDING tasks are left alone: they may
+    legitimately sit queued for long, e.g. behind the rest of their batch
+    lane.
+    """
+    cutoff = timezone.now() - timedelta(seconds=settings.SCRAPER_IN_FLIGHT_TIMEOUT)
+    expired = ScrapingTask.objects.filter(
+        linkedin_url__in=linkedin_urls, status="STARTED", updated_at__lt=cutoff
+    )
+    count = expired.update(
+        status="FAILURE",
+        error_message="Scrape timed out before completing",
+        updated_at=timezone.now(),
+    )
+    if count:
+        logger.warning(f"Expired {count} stale in-flight scraping task(s)")
+    return count
+
+
+def covers_request(task_record, sections=None, max_age=None):
+    """
+    Whether a task's scrape also serves a request for ``sections``/``max_age``
+
+    It does when it scrapes at least the requested sections and accepts no
+    older a stored profile than the request does.
+    """
+    requested = set(PROFILE_SECTIONS if sections is None else sections)
+    covered = set(
+        PROFILE_SECTIONS if task_record.sections is None else task_record.sections
+    )
+    return requested <= covered and _oldest_accepted(
+        task_record.max_age
+    ) <= _oldest_accepted(max_age)
+
+
+def _oldest_accepted(max_age):
+    """Age in seconds of the oldest stored profile a request may be served"""
+    return settings.PROFILE_STALE_TTL if max_age is None else max_age
+
+
+def create_or_attach_task(linkedin_url, sections=None, max_age=None):
+    """
+    Create a scraping task for the URL, or attach to one covering the request
+
+    The database enforces one in-flight task per URL, so concurrent requests
+    for the same profile end up sharing a single scrape. A request the
+    in-flight scrape does not cover (see covers_request) gets a WAITING task
+    instead, which start_waiting_task moves to PENDING once the in-flight
+    scrape ends. Later such requests join that WAITING task, widening it to
+    cover them as well.
+
+    Args:
+        linkedin_url (str): The LinkedIn profile URL to scrape
+        sections (list): PROFILE_SECTIONS requested (all when None)
+        max_age (int): Optional maximum age in seconds of a stored profile
+
+    Returns:
+        tuple: (ScrapingTask, created) where created is False when the
+            request was coalesced onto an existing task. A created task has
+            to be queued, unless it is WAITING.
+    """
+    expire_stale_tasks([linkedin_url])
+
+    existing = in_flight_tasks([linkedin_url]).first()
+    if existing is None:
+        try:
+            with transaction.atomic():
+                task_record = ScrapingTask.objects.create(
+                    task_id=str(uuid.uuid4()),
+                    linkedin_url=linkedin_url,
+                    status="PENDING",
+                    sections=sections,
+                    max_age=max_age,
+                )
+            return task_record, True
+        except IntegrityError:
+            # Another request started a scrape for this URL after our lookup
+            existing = in_flight_tasks([linkedin_url]).first()
+            if existing is None:
+                raise
+
+    if covers_request(existing, sections, max_age):
+        return existing, False
+    return _wait_for_in_flight_task(linkedin_url, sections, max_age)
+
+
+def _wait_for_in_flight_task(linkedin_url, sections, max_age):
+    """Create the URL's WAITING task, or widen the existing one to the request"""
+    with transaction.atomic():
+        waiting = (
+            ScrapingTask.objects.select_for_update()
+            .filter(linkedin_url=linkedin_url, status="WAITING")
+            .first()
+        )
+        if waiting is None:
+            try:
+                with transaction.atomic():
+                    task_record = ScrapingTask.objects.create(
+                        task_id=str(uuid.uuid4()),
+                        linkedin_url=linkedin_url,
+                        status="WAITING",
+                        sections=sections,
+                        max_age=max_age,
+                    )
+                return task_record, True
+            except IntegrityError:
+                # Another request queued a scrape for this URL after our lookup
+                waiting = ScrapingTask.objects.select_for_update().get(
+                    linkedin_url=linkedin_url, status="WAITING"
+                )
+
+        if not covers_request(waiting, sections, max_age):
+            if waiting.sections is not None:
+                waiting.sections = (
+                    None
+                    if sections is None
+                    else sorted(set(waiting.sections) | set(sections))
+                )
+            if _oldest_accepted(max_age) < _oldest_accepted(waiting.max_age):
+                waiting.max_age = max_age
+            # A plain UPDATE keeps updated_at, which start_waiting_task's
+            # conditional transition checks
+            ScrapingTask.objects.filter(pk=waiting.pk).update(
+                sections=waiting.sections, max_age=waiting.max_age
+            )
+        return waiting, False
+
+
+def start_waiting_task(linkedin_url):
+    """
+    Move the URL's WAITING task to PENDING once no scrape of it is in flight
+
+    Args:
+        linkedin_url (str): The LinkedIn profile URL whose scrape ended
+
+    Returns:
+        ScrapingTask: The task, now PENDING and to be queued, or None if there
+            is no WAITING task or a scrape of the URL is still in flight
+    """
+    waiting = ScrapingTask.objects.filter(
+        linkedin_url=linkedin_url, status="WAITING"
+    ).first()
+    if waiting is None or in_flight_tasks([linkedin_url]).exists():
+        return None
+
+    try:
+        with transaction.atomic():
+            started = transition_task(waiting, "PENDING")
+    except IntegrityError:
+        # Another scrape got in flight first; the task waits for that one
+        return None
+    if not started:
+        return None
+
+    # Requests may have widened the task since it was read
+    waiting.refresh_from_db(fields=["sections", "max_age"])
+    return waiting
@@ -0,0 +1,143 @@
+# Push scrape and CV task progress to clients over Redis pub/sub and
+# server-sent events
+import asyncio
+import json
+import logging
+
+import redis
+import redis.asyncio
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import StreamingHttpResponse
+
+logger = logging.getLogger(__name__)
+
+FINAL_STATUSES = ("SUCCESS", "FAILURE")
+
+# Channel name prefix per task model
+TASK_EVENT_KINDS = {"scraper.scrapingtask": "scrape", "cv_agent.cvtask": "cv"}
+
+_publisher = None
+
+
+def task_channel(model, task_id):
+    """Name of the pub/sub channel carrying the events of a ``model`` task"""
+    return f"task-events:{TASK_EVENT_KINDS[model._meta.label_lower]}:{task_id}"
+
+
+def task_event(task_record, phase=None):
+    """Build the event describing a task's current state"""
+    return {
+        "task_id": task_record.task_id,
+        "status": task_record.status,
+        "phase": phase,
+        "error_message": task_record.error_message,
+        "updated_at": task_record.updated_at.isoformat(),
+    }
+
+
+def publish_task_event(task_record, phase=None):
+    """
+    Publish a task's current state to its channel
+
+    Status changes are published by scraper.utils.task_state. Failures are
+    logged and swallowed: clients can always fall back to polling the status
+    endpoint, so a Redis outage must not fail the task.
+
+    Args:
+        task_record: ScrapingTask or CVTask
+        phase (str): Scrape phase the task just entered, if any
+    """
+    global _publisher
+    if _publisher is None:
+        _publisher = redis.Redis.from_url(settings.TASK_EVENTS_REDIS_URL)
+
+    try:
+        _publisher.publish(
+            task_channel(type(task_record), task_record.task_id),
+            json.dumps(task_event(task_record, phase)),
+        )
+    except redis.RedisError as e:
+        logger.warning(f"Could not publish event for task {task_record.task_id}: {e}")
+
+
+def task_events_response(model, task_id):
+    """
+    Stream a task's state transitions as server-sent events
+
+    The current state is sent first; the stream then follows the task's
+    channel until it succeeds or fails, sending a comment every
+    TASK_EVENTS_HEARTBEAT seconds to keep proxies from closing it. Needs an
+    ASGI server: under WSGI the stream would hold a worker thread.
+
+    Args:
+        model: ScrapingTask or CVTask
+        task_id (str): The task to follow
+
+    Returns:
+        StreamingHttpResponse: text/event-stream response
+    """
+    response = StreamingHttpResponse(
+        _event_stream(model, task_id), content_type="text/event-stream"
+    )
+    response["Cache-Control"] = "no-cache"
+    # Stop nginx from buffering the stream
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+
+async def _event_stream(model, task_id):
+    event = await _current_event(model, task_id)
+    if event is None:
+        yield _format_event({"task_id": task_id, "error": "Task not found"}, "error")
+        return
+    yield _format_event(event)
+    if event["status"] in FINAL_STATUSES:
+        return
+
+    client = redis.asyncio.Redis.from_url(settings.TASK_EVENTS_REDIS_URL)
+    pubsub = client.pubsub()
+    try:
+        await pubsub.subscribe(task_channel(model, task_id))
+
+        # Catch transitions made before the subscription took effect
+        latest = await _current_event(model, task_id)
+        if latest is not None and latest["updated_at"] != event["updated_at"]:
+            yield _format_event(latest)
+            if latest["status"] in FINAL_STATUSES:
+                return
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + settings.TASK_EVENTS_MAX_DURATION
+        while loop.time() < deadline:
+            message = await pubsub.get_message(
+                ignore_subscribe_messages=True,
+                timeout=settings.TASK_EVENTS_HEARTBEAT,
+            )
+            if message is None:
+                yield ": keep-alive\n\n"
+                continue
+
+            event = json.loads(message["data"])
+            yield _format_event(event)
+            if event["status"] in FINAL_STATUSES:
+                return
+    except redis.RedisError as e:
+        logger.warning(f"Task event stream for {task_id} lost Redis: {e}")
+        # Clients fall back to polling the status endpoint
+        yield _format_event(
+            {"task_id": task_id, "error": "Events unavailable"}, "error"
+        )
+    finally:
+        await pubsub.aclose()
+        await client.aclose()
+
+
+@sync_to_async
+def _current_event(model, task_id):
+    task_record = model.objects.filter(task_id=task_id).defer("result").first()
+    return None if task_record is None else task_event(task_record)
+
+
+def _format_event(data, name="status"):
+    return f"event: {name}\ndata: {json.dumps(data)}\n\n"
@@ -0,0 +1,89 @@
+# Status transitions of ScrapingTask and CVTask rows, shared by both apps
+import logging
+
+from django.db import transaction
+from django.utils import timezone
+
+from .task_events import publish_task_event
+
+logger = logging.getLogger(__name__)
+
+# Statuses each status may move to. STARTED -> STARTED restarts a task whose
+# message was redelivered after its worker died; STARTED -> PENDING puts a
+# task back to wait for a retry. WAITING tasks wait for another scrape of
+# their profile to end (see single_flight).
+ALLOWED_TRANSITIONS = {
+    "WAITING": ("PENDING", "FAILURE"),
+    "PENDING": ("STARTED", "FAILURE"),
+    "STARTED": ("STARTED", "PENDING", "SUCCESS", "FAILURE"),
+    "SUCCESS": (),
+    "FAILURE": (),
+}
+
+
+class InvalidTaskTransition(Exception):
+    """Raised for a status change that no task may ever make"""
+
+
+def transition_task(task_record, status, **fields):
+    """
+    Move a task to ``status`` with one conditional UPDATE of the changed fields
+
+    The UPDATE only applies while the row still has the status and
+    ``updated_at`` the record was read with. A worker holding an outdated
+    copy (e.g. of a task another worker finished, or that was expired) thus
+    never overwrites newer state. Only ``status``, ``updated_at`` and the
+    given fields are written. On success the record is updated in place and
+    the new state is published to the task's event stream once committed.
+
+    Args:
+        task_record: ScrapingTask or CVTask as last read or transitioned
+        status (str): Status to move to
+        **fields: Other fields to write along with the status
+
+    Returns:
+        bool: Whether the transition was applied
+
+    Raises:
+        InvalidTaskTransition: If ``status`` can never follow the current one
+    """
+    if status not in ALLOWED_TRANSITIONS[task_record.status]:
+        raise InvalidTaskTransition(
+            f"Task {task_record.task_id} cannot go from {task_record.status} "
+            f"to {status}"
+        )
+
+    updates = {"status": status, "updated_at": timezone.now(), **fields}
+    applied = (
+        type(task_record)
+        .objects.filter(
+            pk=task_record.pk,
+            status=task_record.status,
+            updated_at=task_record.updated_at,
+        )
+        .update(**updates)
+    )
+    if not applied:
+        logger.warning(
+            f"Task {task_record.task_id} changed since it was read, "
+            f"not moving it to {status}"
+        )
+        return False
+
+    for name, value in updates.items():
+        setattr(task_record, name, value)
+    transaction.on_commit(lambda: publish_task_event(task_record))
+    return True
+
+
+def start_task(task_record):
+    """
+    Move a pending task, or one redelivered after its worker died, to STARTED
+
+    Returns:
+        bool: False if the task already finished or changed since it was read
+    """
+    if task_record.status not in ("PENDING", "STARTED"):
+        logger.info(f"Task {task_record.task_id} already {task_record.status}")
+        return False
+    return transition_task(task_record, "STARTED")
@@ -0,0 +1,80 @@
+# Per-phase wall-clock timing of scrapes, stored on ScrapingTask.timings
+import time
+from contextlib import contextmanager
+
+# Phases in the order a scrape goes through them
+SCRAPE_PHASES = (
+    "lookup",
+    "account_lease",
+    "driver_lease",
+    "session",
+    "navigation",
+    "extraction",
+    "db_save",
+    "total",
+)
+
+
+class PhaseTimer:
+    """
+    Accumulate wall-clock seconds per named phase of a scrape
+
+    Phases entered more than once (e.g. a second login after a rejected
+    session) add up. ``on_phase``, if given, is called with each phase's name
+    as it is entered.
+    """
+
+    def __init__(self, on_phase=None):
+        self.started_at = time.perf_counter()
+        self.timings = {}
+        self.on_phase = on_phase
+
+    @contextmanager
+    def phase(self, name):
+        if self.on_phase is not None:
+            self.on_phase(name)
+        started_at = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started_at
+            self.timings[name] = self.timings.get(name, 0.0) + elapsed
+
+    def as_dict(self):
+        """Seconds per phase rounded to milliseconds, plus the total so far"""
+        timings = {name: round(seconds, 3) for name, seconds in self.timings.items()}
+        timings["total"] = round(time.perf_counter() - self.started_at, 3)
+        return timings
+
+
+def timing_percentiles(timings_list, percentiles=(50, 90, 99)):
+    """
+    Summarize many tasks' timings as nearest-rank percentiles per phase
+
+    Args:
+        timings_list (iterable): ScrapingTask.timings dicts
+        percentiles (tuple): Percentiles to compute
+
+    Returns:
+        list: (phase, sample count, [seconds per percentile]) tuples in
+            SCRAPE_PHASES order, for phases with at least one sample
+    """
+    samples = {}
+    for timings in timings_list:
+        for name, seconds in (timings or {}).items():
+            samples.setdefault(name, []).append(seconds)
+
+    phases = [name for name in SCRAPE_PHASES if name in samples]
+    phases += sorted(name for name in samples if name not in SCRAPE_PHASES)
+
+    summary = []
+    for name in phases:
+        values = sorted(samples[name])
+        summary.append(
+            (
+                name,
+                len(values),
+                [values[max(0, -(-len(values) * p // 100) - 1)] for p in percentiles],
+            )
+        )
+    return summary
@@ -1,19 +1,34 @@
 import logging
 import uuid
 
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from .models import ScrapingTask
+from users.utils import get_user_data_by_linkedin_url
+
+from .models import ScrapingBatch, ScrapingTask
 from .serializers import (
+    BatchCreatedResponseSerializer,
+    BatchStatusResponseSerializer,
+    LinkedInBatchScrapeRequestSerializer,
     LinkedInScrapeRequestSerializer,
     TaskCreatedResponseSerializer,
     TaskStatusResponseSerializer,
 )
-from .tasks import scrape_linkedin_profile_task
+from .tasks import dispatch_scraping_batch, scrape_linkedin_profile_task
+from .utils.polling import not_modified_response, with_etag
+from .utils.single_flight import (
+    create_or_attach_task,
+    expire_stale_tasks,
+    in_flight_tasks,
+)
+from .utils.task_events import task_events_response
 
 logger = logging.getLogger(__name__)
 
@@ -31,16 +46,24 @@ class LinkedInProfileScrapeAsyncAPIView(APIView):
 
         Request body:
         {
-            "linkedin_url": "https://www.linkedin.com/in/username/"
+            "linkedin_url": "https://www.linkedin.com/in/username/",
+            "max_age": 86400,  // optional, max age in seconds of a stored profile
+            "sections": ["experiences", "educations"]  // optional, default all
         }
 
         Response:
         {
             "success": true,
             "task_id": "uuid",
+            "coalesced": false,
             "message": "Task started successfully",
             "status_url": "/api/scrape/status/uuid/"
         }
+
+        If a scrape for the same URL is already pending or running and covers
+        the requested sections and max_age, no new task is started and the
+        in-flight task's ID is returned instead. Otherwise the returned task
+        is WAITING and starts once the in-flight scrape ends.
         """
         # Validate request data
         request_serializer = LinkedInScrapeRequestSerializer(data=request.data)
@@ -52,18 +75,30 @@ class LinkedInProfileScrapeAsyncAPIView(APIView):
 
         validated_data = request_serializer.validated_data
         linkedin_url = validated_data["linkedin_url"]
+        max_age = validated_data.get("max_age")
+        sections = validated_data.get("sections")
 
         try:
-            # Generate unique task ID
-            task_id = str(uuid.uuid4())
-
-            # Create task record in database
-            task_record = ScrapingTask.objects.create(
-                task_id=task_id, linkedin_url=linkedin_url, status="PENDING"
+            # Create task record, or attach to the scrape already in flight
+            task_record, created = create_or_attach_task(
+                linkedin_url, sections, max_age
             )
+            task_id = task_record.task_id
 
-            # Start the async task
-            scrape_linkedin_profile_task.delay(task_id, linkedin_url)
+            if task_record.status == "WAITING":
+                logger.info(f"Queued request for {linkedin_url} as task {task_id}")
+                message = (
+                    "Queued to start after the scrape in progress for this profile"
+                )
+            elif created:
+                # Start the async task
+                scrape_linkedin_profile_task.delay(
+                    task_id, linkedin_url, max_age, sections
+                )
+                message = "Task started successfully"
+            else:
+                logger.info(f"Attached request for {linkedin_url} to task {task_id}")
+                message = "Attached to the scrape already in progress for this profile"
 
             # Build status URL
             status_url = request.build_absolute_uri(
@@ -73,7 +108,8 @@ class LinkedInProfileScrapeAsyncAPIView(APIView):
             response_data = {
                 "success": True,
                 "task_id": task_id,
-                "message": "Task started successfully",
+                "coalesced": not created,
+                "message": message,
                 "status_url": status_url,
             }
 
@@ -93,6 +129,198 @@ class LinkedInProfileScrapeAsyncAPIView(APIView):
             )
 
 
+class LinkedInBatchScrapeAPIView(APIView):
+    """
+    API endpoint to scrape many LinkedIn profiles with a single request
+    """
+
+    permission_classes = [AllowAny]
+
+    def post(self, request):
+        """
+        Start a batch of async LinkedIn profile scraping tasks
+
+        Request body:
+        {
+            "linkedin_urls": [
+                "https://www.linkedin.com/in/username/",
+                ...
+            ],
+            "sections": ["experiences"]  // optional, default all
+        }
+
+        Response:
+        {
+            "success": true,
+            "batch_id": "uuid",
+            "total_tasks": 2,
+            "attached_tasks": {"https://www.linkedin.com/in/other/": "uuid"},
+            "message": "Batch started successfully",
+            "status_url": "/api/scrape/batch/uuid/"
+        }
+
+        URLs that already have a scrape in flight are not scraped again; they
+        are listed in ``attached_tasks`` with the task to poll instead.
+        """
+        # Validate request data
+        request_serializer = LinkedInBatchScrapeRequestSerializer(data=request.data)
+        if not request_serializer.is_valid():
+            return Response(
+                {"success": False, "error": request_serializer.errors},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        linkedin_urls = request_serializer.validated_data["linkedin_urls"]
+        sections = request_serializer.validated_data.get("sections")
+
+        try:
+            batch_id = str(uuid.uuid4())
+
+            # Attach URLs that already have a scrape in flight instead of rescraping
+            expire_stale_tasks(linkedin_urls)
+            attached_tasks = dict(
+                in_flight_tasks(linkedin_urls).values_list("linkedin_url", "task_id")
+            )
+            tasks = [
+                (str(uuid.uuid4()), linkedin_url)
+                for linkedin_url in linkedin_urls
+                if linkedin_url not in attached_tasks
+            ]
+
+            # Deal the tasks round-robin into lanes run one task at a time
+            lanes = min(max(1, settings.SCRAPER_BATCH_PARALLELISM), len(tasks))
+
+            # Create the batch and all of its task records in one bulk insert
+            with transaction.atomic():
+                batch = ScrapingBatch.objects.create(batch_id=batch_id)
+                ScrapingTask.objects.bulk_create(
+                    [
+                        ScrapingTask(
+                            task_id=task_id,
+                            batch=batch,
+                            lane=position % lanes,
+                            position=position,
+                            linkedin_url=linkedin_url,
+                            status="PENDING",
+                            sections=sections,
+                        )
+                        for position, (task_id, linkedin_url) in enumerate(tasks)
+                    ],
+                    # Rows racing another request's scrape of the same URL are skipped
+                    ignore_conflicts=True,
+                )
+                created_ids = set(
+                    ScrapingTask.objects.filter(batch=batch).values_list(
+                        "task_id", flat=True
+                    )
+                )
+                skipped_urls = [
+                    url for task_id, url in tasks if task_id not in created_ids
+                ]
+                tasks = [task for task in tasks if task[0] in created_ids]
+                batch.total_tasks = len(tasks)
+                batch.save(update_fields=["total_tasks"])
+
+            # Attach the skipped URLs to the scrapes that won the race
+            attached_tasks.update(
+                in_flight_tasks(skipped_urls).values_list("linkedin_url", "task_id")
+            )
+
+            # Fan the tasks out with bounded parallelism
+            dispatch_scraping_batch(batch_id, lanes)
+
+            # Build status URL
+            status_url = request.build_absolute_uri(
+                reverse("scraper:batch-status", kwargs={"batch_id": batch_id})
+            )
+
+            response_data = {
+                "success": True,
+                "batch_id": batch_id,
+                "total_tasks": len(tasks),
+                "attached_tasks": attached_tasks,
+                "message": "Batch started successfully",
+                "status_url": status_url,
+            }
+
+            response_serializer = BatchCreatedResponseSerializer(data=response_data)
+            if response_serializer.is_valid():
+                return Response(
+                    response_serializer.validated_data, status=status.HTTP_202_ACCEPTED
+                )
+            else:
+                return Response(response_data, status=status.HTTP_202_ACCEPTED)
+
+        except Exception as e:
+            logger.error(f"Error starting LinkedIn scraping batch: {str(e)}")
+            return Response(
+                {"success": False, "error": f"Failed to start batch: {str(e)}"},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            )
+
+
+class BatchStatusAPIView(APIView):
+    """
+    API endpoint to check the aggregate progress of a scraping batch
+    """
+
+    permission_classes = [AllowAny]
+
+    def get(self, request, batch_id):
+        """
+        Get the aggregate progress of a scraping batch
+
+        Response:
+        {
+            "batch_id": "uuid",
+            "total_tasks": 10,
+            "pending": 4,
+            "started": 2,
+            "success": 3,
+            "failure": 1,
+            "progress": 0.4,
+            "is_complete": false,
+            "created_at": "2023-..."
+        }
+        """
+        try:
+            batch = ScrapingBatch.objects.get(batch_id=batch_id)
+        except ScrapingBatch.DoesNotExist:
+            return Response(
+                {"success": False, "error": "Batch not found"},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+
+        # Count the batch's tasks per status in a single aggregate query
+        counts = dict(
+            ScrapingTask.objects.filter(batch=batch)
+            .values_list("status")
+            .annotate(count=Count("id"))
+            .order_by()
+        )
+        finished = counts.get("SUCCESS", 0) + counts.get("FAILURE", 0)
+
+        response_data = {
+            "batch_id": batch.batch_id,
+            "total_tasks": batch.total_tasks,
+            "pending": counts.get("PENDING", 0),
+            "started": counts.get("STARTED", 0),
+            "success": counts.get("SUCCESS", 0),
+            "failure": counts.get("FAILURE", 0),
+            "progress": finished / batch.total_tasks if batch.total_tasks else 1.0,
+            "is_complete": finished >= batch.total_tasks,
+            "created_at": batch.created_at,
+        }
+
+        response_serializer = BatchStatusResponseSerializer(data=response_data)
+        if response_serializer.is_valid():
+            return Response(
+                response_serializer.validated_data, status=status.HTTP_200_OK
+            )
+        else:
+            return Response(response_data, status=status.HTTP_200_OK)
+
+
 class TaskStatusAPIView(APIView):
     """
     API endpoint to check the status of a scraping task
@@ -107,14 +335,31 @@ class TaskStatusAPIView(APIView):
         Response:
         {
             "task_id": "uuid",
-            "status": "SUCCESS|PENDING|FAILURE|STARTED",
+            "status": "SUCCESS|WAITING|PENDING|FAILURE|STARTED",
             "linkedin_url": "https://www.linkedin.com/in/username/",
             "created_at": "2023-...",
             "updated_at": "2023-...",
-            "result": {...},  // Only present if status is SUCCESS
+            "result": {  // Only present if status is SUCCESS
+                "success": true,
+                "source": "scraped|database",
+                "fingerprint": "...",  // Of the profile the task returned
+                "data": {...}  // The stored profile, as it is now
+            },
             "error_message": "..."  // Only present if status is FAILURE
         }
+
+        Responses carry an ETag. Polls sending it back in If-None-Match get
+        304 Not Modified while the task is unchanged; adding ``?wait=<seconds>``
+        holds such a poll until the task changes or the wait runs out.
         """
+        not_modified = not_modified_response(
+            request,
+            ScrapingTask.objects.filter(task_id=task_id),
+            version_fields=("user__content_fingerprint",),
+        )
+        if not_modified is not None:
+            return not_modified
+
         try:
             task_record = ScrapingTask.objects.get(task_id=task_id)
         except ScrapingTask.DoesNotExist:
@@ -131,9 +376,17 @@ class TaskStatusAPIView(APIView):
             "updated_at": task_record.updated_at,
         }
 
-        # Add result if available
-        if task_record.result:
-            response_data["result"] = task_record.result
+        # Add result if available, resolving the profile it points at. The
+        # reference outlives the result payload, which retention compacts away.
+        profile_version = None
+        if task_record.result or task_record.user_id is not None:
+            result = dict(task_record.result or {"success": True})
+            if task_record.user_id is not None and "data" not in result:
+                result["data"] = get_user_data_by_linkedin_url(task_record.linkedin_url)
+                result["fingerprint"] = task_record.profile_fingerprint
+                if result["data"] is not None:
+                    profile_version = result["data"]["fingerprint"]
+            response_data["result"] = result
 
         # Add error message if failed
         if task_record.error_message:
@@ -141,8 +394,20 @@ class TaskStatusAPIView(APIView):
 
         response_serializer = TaskStatusResponseSerializer(data=response_data)
         if response_serializer.is_valid():
-            return Response(
+            response = Response(
                 response_serializer.validated_data, status=status.HTTP_200_OK
             )
         else:
-            return Response(response_data, status=status.HTTP_200_OK)
+            response = Response(response_data, status=status.HTTP_200_OK)
+        return with_etag(response, task_record.updated_at, profile_version)
+
+
+async def task_events_view(request, task_id):
+    """
+    Stream the state transitions of a scraping task as server-sent events
+
+    Each ``status`` event carries the task's status, the scrape phase it just
+    entered (if any), its error message and updated_at. The stream ends once
+    the task succeeds or fails; fetch the result from the status endpoint.
+    """
+    return task_events_response(ScrapingTask, task_id)
@@ -1,5 +1,6 @@
 from django.contrib import admin
 
+from .cache import invalidate_profiles
 from .models import Accomplishment, Education, Experience, Interest, User
 
 
@@ -40,10 +41,18 @@ class UserAdmin(admin.ModelAdmin):
         "location",
         "created_at",
         "updated_at",
+        "scraped_at",
     )
     list_filter = ("created_at", "updated_at", "company")
     search_fields = ("name", "job_title", "company", "linkedin_url")
-    readonly_fields = ("created_at", "updated_at")
+    readonly_fields = (
+        "created_at",
+        "updated_at",
+        "scraped_at",
+        "scraped_sections",
+        "content_fingerprint",
+        "section_fingerprints",
+    )
 
     fieldsets = (
         (
@@ -51,6 +60,18 @@ class UserAdmin(admin.ModelAdmin):
             {"fields": ("name", "job_title", "company", "location", "linkedin_url")},
         ),
         ("About", {"fields": ("about",), "classes": ("collapse",)}),
+        (
+            "Scraping",
+            {
+                "fields": (
+                    "scraped_at",
+                    "scraped_sections",
+                    "content_fingerprint",
+                    "section_fingerprints",
+                ),
+                "classes": ("collapse",),
+            },
+        ),
         (
             "Timestamps",
             {"fields": ("created_at", "updated_at"), "classes": ("collapse",)},
@@ -59,6 +80,23 @@ class UserAdmin(admin.ModelAdmin):
 
     inlines = [ExperienceInline, EducationInline, InterestInline, AccomplishmentInline]
 
+    # Profiles are scraper output: editing them here would bypass their
+    # snapshot, fingerprints and cache, so they can only be viewed (inlines
+    # included) or deleted
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def delete_model(self, request, obj):
+        invalidate_profiles([obj.linkedin_url])
+        super().delete_model(request, obj)
+
+    def delete_queryset(self, request, queryset):
+        invalidate_profiles(queryset.values_list("linkedin_url", flat=True))
+        super().delete_queryset(request, queryset)
+
     # Customize the admin list view
     list_per_page = 25
     ordering = ("-created_at",)
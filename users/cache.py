@@ -0,0 +1,123 @@
+# Read-through cache of stored profiles, keyed by canonical LinkedIn URL
+import logging
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+from .models import User
+
+logger = logging.getLogger(__name__)
+
+PROFILE_KEY_PREFIX = "profile:"
+STATS_KEYS = {"hits": "profile-cache:hits", "misses": "profile-cache:misses"}
+
+# Cached in place of profiles that are not stored, so lookups of unknown
+# profiles are served from the cache too (only with a shared backend)
+MISSING = "missing"
+
+
+def profile_cache():
+    """Return the cache backend configured for profiles"""
+    return caches[settings.PROFILE_CACHE_ALIAS]
+
+
+def get_or_load_profile(canonical_url, loader):
+    """
+    Return a profile from the cache, loading and caching it on a miss
+
+    With PROFILE_CACHE_VERIFY (a per-process cache, which saves made by other
+    processes cannot invalidate), a cached profile is only served while its
+    fingerprint is still the stored one, and absent profiles are not cached:
+    another process may store them at any time.
+
+    Args:
+        canonical_url (str): Canonical LinkedIn URL of the profile
+        loader (callable): Loads the profile from the database given the URL,
+            returning None if it is not stored
+
+    Returns:
+        dict: The profile in scraper output format, or None if not stored
+    """
+    cache = profile_cache()
+    key = PROFILE_KEY_PREFIX + canonical_url
+
+    cached = cache.get(key)
+    if cached is not None and (
+        not settings.PROFILE_CACHE_VERIFY or _is_current(canonical_url, cached)
+    ):
+        _count("hits")
+        return None if cached == MISSING else cached
+
+    _count("misses")
+    profile = loader(canonical_url)
+    if profile is not None:
+        cache.set(key, profile, settings.PROFILE_CACHE_TIMEOUT)
+    elif settings.PROFILE_CACHE_VERIFY:
+        cache.delete(key)
+    else:
+        cache.set(key, MISSING, settings.PROFILE_CACHE_TIMEOUT)
+    return profile
+
+
+def invalidate_profiles(canonical_urls):
+    """
+    Drop cached profiles that are about to change
+
+    The entries are dropped right away and again once the surrounding
+    transaction commits, so a read made before the commit cannot leave the
+    old profile cached.
+
+    Args:
+        canonical_urls (iterable): Canonical LinkedIn URLs of the profiles
+    """
+    keys = [PROFILE_KEY_PREFIX + url for url in canonical_urls]
+    profile_cache().delete_many(keys)
+    transaction.on_commit(lambda: profile_cache().delete_many(keys))
+
+
+def get_profile_cache_stats():
+    """
+    Get the profile cache's hit and miss counters
+
+    Counters live in the profile cache itself, so with an in-process backend
+    they only cover the current process.
+
+    Returns:
+        dict: hits, misses and hit_rate (None before any lookup)
+    """
+    counts = profile_cache().get_many(STATS_KEYS.values())
+    hits = counts.get(STATS_KEYS["hits"], 0)
+    misses = counts.get(STATS_KEYS["misses"], 0)
+    lookups = hits + misses
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": hits / lookups if lookups else None,
+    }
+
+
+def reset_profile_cache_stats():
+    """Zero the profile cache's hit and miss counters"""
+    profile_cache().delete_many(STATS_KEYS.values())
+
+
+def _count(name):
+    cache = profile_cache()
+    key = STATS_KEYS[name]
+    try:
+        cache.incr(key)
+    except ValueError:
+        # First lookup since a reset; another process may create it first
+        if not cache.add(key, 1, timeout=None):
+            cache.incr(key)
+
+
+def _is_current(canonical_url, cached):
+    """Whether a cached profile is still the stored version of the profile"""
+    return (
+        cached != MISSING
+        and User.objects.filter(
+            linkedin_url=canonical_url, content_fingerprint=cached["fingerprint"]
+        ).exists()
+    )
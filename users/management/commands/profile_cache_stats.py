@@ -0,0 +1,38 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from users.cache import get_profile_cache_stats, reset_profile_cache_stats
+
+
+class Command(BaseCommand):
+    help = (
+        "Show the profile cache's hit and miss counters. Counters are kept in "
+        "the profile cache itself, so they are only shared across processes "
+        "with a shared backend such as Redis."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--reset",
+            action="store_true",
+            help="Zero the counters after showing them",
+        )
+
+    def handle(self, *args, **options):
+        cache_config = settings.CACHES[settings.PROFILE_CACHE_ALIAS]
+        stats = get_profile_cache_stats()
+        hit_rate = stats["hit_rate"]
+
+        self.stdout.write(f"backend:   {cache_config['BACKEND']}")
+        self.stdout.write(
+            f"max size:  {cache_config.get('OPTIONS', {}).get('MAX_ENTRIES', 'default')}"
+        )
+        self.stdout.write(f"hits:      {stats['hits']}")
+        self.stdout.write(f"misses:    {stats['misses']}")
+        self.stdout.write(
+            f"hit rate:  {'-' if hit_rate is None else f'{hit_rate:.1%}'}"
+        )
+
+        if options["reset"]:
+            reset_profile_cache_stats()
+            self.stdout.write("Counters reset")
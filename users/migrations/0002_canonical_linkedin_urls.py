@@ -0,0 +1,91 @@
+# Generated by Django 5.2.18 on 2026-10-17 12:47
+
+import re
+from collections import defaultdict
+from urllib.parse import quote, unquote, urlsplit
+
+from django.db import migrations
+
+# Frozen copies of users.utils as of this migration, so later changes to the
+# live helpers never change what this migration does
+LINKEDIN_PROFILE_PATH_RE = re.compile(r"^/in/([^/]+)", re.IGNORECASE)
+PROFILE_FIELDS = ("name", "job_title", "company", "location", "about")
+SECTION_MODELS = ("Experience", "Education", "Interest", "Accomplishment")
+
+
+def canonicalize_linkedin_url(linkedin_url):
+    if not linkedin_url:
+        return linkedin_url
+
+    url = linkedin_url.strip()
+    parts = urlsplit(url if "://" in url else f"https://{url}")
+
+    host = (parts.hostname or "").lower()
+    if host != "linkedin.com" and not host.endswith(".linkedin.com"):
+        return url
+
+    match = LINKEDIN_PROFILE_PATH_RE.match(parts.path)
+    if not match:
+        return url
+
+    slug = quote(unquote(match.group(1)).lower(), safe="-_.~")
+    return f"https://www.linkedin.com/in/{slug}/"
+
+
+def merge_duplicate_profiles(apps, schema_editor):
+    """
+    Rewrite every User.linkedin_url to its canonical form
+
+    Profiles whose URLs canonicalize to the same key are merged into the most
+    recently updated one, whose fields and rows come from the latest scrape.
+    Fields it lacks are filled from the newest duplicate that has them, and
+    each section it has no rows for takes the rows of the newest duplicate
+    that has some. The duplicates are then deleted with their remaining rows.
+    """
+    User = apps.get_model("users", "User")
+    sections = [apps.get_model("users", name) for name in SECTION_MODELS]
+
+    users_by_url = defaultdict(list)
+    for user in User.objects.order_by("-updated_at", "-pk"):
+        users_by_url[canonicalize_linkedin_url(user.linkedin_url)].append(user)
+
+    for canonical_url, (user, *duplicates) in users_by_url.items():
+        updates = {}
+        if duplicates:
+            for field in PROFILE_FIELDS:
+                if getattr(user, field):
+                    continue
+                for duplicate in duplicates:
+                    if getattr(duplicate, field):
+                        updates[field] = getattr(duplicate, field)
+                        break
+
+            for section in sections:
+                if section.objects.filter(user_id=user.pk).exists():
+                    continue
+                for duplicate in duplicates:
+                    if section.objects.filter(user_id=duplicate.pk).update(
+                        user_id=user.pk
+                    ):
+                        break
+
+            # Free the duplicates' URLs before the survivor takes the canonical one
+            User.objects.filter(pk__in=[d.pk for d in duplicates]).delete()
+
+        if user.linkedin_url != canonical_url:
+            updates["linkedin_url"] = canonical_url
+        if updates:
+            # update() keeps updated_at, which later migrations read as the
+            # time of the last scrape
+            User.objects.filter(pk=user.pk).update(**updates)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_profiles, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-17 13:05
+
+from django.db import migrations, models
+
+ALL_SECTIONS = ["experiences", "educations", "interests", "accomplishments"]
+
+
+def mark_existing_profiles_fully_scraped(apps, schema_editor):
+    """Profiles stored before section-selective scraping were scraped in full"""
+    User = apps.get_model("users", "User")
+    User.objects.update(scraped_sections=ALL_SECTIONS)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0002_canonical_linkedin_urls"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="user",
+            name="scraped_sections",
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.RunPython(
+            mark_existing_profiles_fully_scraped, migrations.RunPython.noop
+        ),
+    ]
@@ -0,0 +1,73 @@
+# Generated by Django 5.2.18 on 2026-10-17 13:05
+
+import django.utils.timezone
+from django.db import migrations, models
+from django.db.models import F
+
+
+def backfill_scraped_at(apps, schema_editor):
+    """Until now updated_at was bumped by every scrape"""
+    User = apps.get_model("users", "User")
+    User.objects.update(scraped_at=F("updated_at"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0003_user_scraped_sections"),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name="accomplishment",
+            options={"ordering": ["position", "pk"]},
+        ),
+        migrations.AlterModelOptions(
+            name="education",
+            options={"ordering": ["position", "-created_at"]},
+        ),
+        migrations.AlterModelOptions(
+            name="experience",
+            options={"ordering": ["position", "-created_at"]},
+        ),
+        migrations.AlterModelOptions(
+            name="interest",
+            options={"ordering": ["position", "pk"]},
+        ),
+        migrations.AddField(
+            model_name="accomplishment",
+            name="position",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="education",
+            name="position",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="experience",
+            name="position",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="interest",
+            name="position",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="user",
+            name="content_fingerprint",
+            field=models.CharField(blank=True, default="", max_length=64),
+        ),
+        migrations.AddField(
+            model_name="user",
+            name="scraped_at",
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddField(
+            model_name="user",
+            name="section_fingerprints",
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.RunPython(backfill_scraped_at, migrations.RunPython.noop),
+    ]
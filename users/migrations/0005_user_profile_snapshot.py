@@ -0,0 +1,88 @@
+# Generated by Django 5.2.18 on 2026-10-17 13:05
+
+from django.db import migrations, models
+
+# Frozen copies of users.utils as of this migration, so later changes to the
+# live snapshot format never change what this migration writes
+PROFILE_FIELDS = ("name", "job_title", "company", "location", "about")
+SECTION_OUTPUT_FIELDS = {
+    "experiences": (
+        "institution_name",
+        "linkedin_url",
+        "website",
+        "industry",
+        "type",
+        "headquarters",
+        "company_size",
+        "founded",
+        "position_title",
+        "from_date",
+        "to_date",
+        "duration",
+        "location",
+        "description",
+    ),
+    "educations": (
+        "institution_name",
+        "linkedin_url",
+        "website",
+        "industry",
+        "type",
+        "headquarters",
+        "company_size",
+        "founded",
+        "degree",
+        "from_date",
+        "to_date",
+        "description",
+    ),
+    "interests": ("name",),
+    "accomplishments": ("title",),
+}
+SECTION_MODELS = {
+    "experiences": "Experience",
+    "educations": "Education",
+    "interests": "Interest",
+    "accomplishments": "Accomplishment",
+}
+
+
+def build_profile_snapshots(apps, schema_editor):
+    """Snapshot every stored profile from its section tables"""
+    User = apps.get_model("users", "User")
+
+    for user in User.objects.all().iterator():
+        snapshot = {
+            **{field: getattr(user, field) for field in PROFILE_FIELDS},
+            "linkedin_url": user.linkedin_url,
+            "sections": user.scraped_sections,
+            "fingerprint": user.content_fingerprint,
+        }
+        for section, model_name in SECTION_MODELS.items():
+            fields = SECTION_OUTPUT_FIELDS[section]
+            rows = (
+                apps.get_model("users", model_name)
+                .objects.filter(user=user)
+                .values_list(*fields)
+            )
+            snapshot[section] = [
+                row[0] if len(fields) == 1 else dict(zip(fields, row)) for row in rows
+            ]
+
+        User.objects.filter(pk=user.pk).update(profile_snapshot=snapshot)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0004_profile_fingerprints"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="user",
+            name="profile_snapshot",
+            field=models.JSONField(blank=True, null=True),
+        ),
+        migrations.RunPython(build_profile_snapshots, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,78 @@
+# Generated by Django 5.2.18 on 2026-10-17 13:25
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0005_user_profile_snapshot"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="accomplishment",
+            name="user",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="accomplishments",
+                to="users.user",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="education",
+            name="user",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="educations",
+                to="users.user",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="experience",
+            name="user",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="experiences",
+                to="users.user",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="interest",
+            name="user",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="interests",
+                to="users.user",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="accomplishment",
+            index=models.Index(
+                fields=["user", "position"], name="accomplishment_user_position"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="education",
+            index=models.Index(
+                fields=["user", "position"], name="education_user_position"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="experience",
+            index=models.Index(
+                fields=["user", "position"], name="experience_user_position"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="interest",
+            index=models.Index(
+                fields=["user", "position"], name="interest_user_position"
+            ),
+        ),
+    ]
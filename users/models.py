@@ -1,4 +1,9 @@
 from django.db import models
+from django.utils import timezone
+
+# Optional profile sections, each costing extra page navigations to scrape.
+# The top card (name, headline, location, about) is always scraped.
+PROFILE_SECTIONS = ("experiences", "educations", "interests", "accomplishments")
 
 
 class User(models.Model):
@@ -12,10 +17,20 @@ class User(models.Model):
     location = models.CharField(max_length=255, null=True, blank=True)
     about = models.TextField(null=True, blank=True)
     linkedin_url = models.URLField(unique=True)  # This will be our primary identifier
+    # Which PROFILE_SECTIONS have been scraped and stored for this profile
+    scraped_sections = models.JSONField(default=list, blank=True)
+    # Content hashes of the stored profile and of each stored section; the
+    # profile fingerprint changes exactly when the stored content does
+    content_fingerprint = models.CharField(max_length=64, blank=True, default="")
+    section_fingerprints = models.JSONField(default=dict, blank=True)
+    # The stored profile in scraper output format, rewritten with every content
+    # change; the section tables remain the source of truth for queries
+    profile_snapshot = models.JSONField(null=True, blank=True)
 
     # Metadata
     created_at = models.DateTimeField(auto_now_add=True)
-    updated_at = models.DateTimeField(auto_now=True)
+    updated_at = models.DateTimeField(auto_now=True)  # Last content change
+    scraped_at = models.DateTimeField(default=timezone.now)  # Last scrape
 
     def __str__(self):
         return f"{self.name} ({self.linkedin_url})"
@@ -29,7 +44,10 @@ class Experience(models.Model):
     Model to store work experience information
     """
 
-    user = models.ForeignKey(User, related_name="experiences", on_delete=models.CASCADE)
+    # Indexed together with position in Meta.indexes
+    user = models.ForeignKey(
+        User, related_name="experiences", on_delete=models.CASCADE, db_index=False
+    )
 
     institution_name = models.CharField(max_length=255, null=True, blank=True)
     linkedin_url = models.URLField(null=True, blank=True)
@@ -47,13 +65,19 @@ class Experience(models.Model):
     location = models.CharField(max_length=255, null=True, blank=True)
     description = models.TextField(null=True, blank=True)
 
+    # Order of the entry on the profile
+    position = models.PositiveIntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
         return f"{self.position_title} at {self.institution_name}"
 
     class Meta:
-        ordering = ["-created_at"]
+        ordering = ["position", "-created_at"]
+        indexes = [
+            # A user's rows in profile order
+            models.Index(fields=["user", "position"], name="experience_user_position"),
+        ]
 
 
 class Education(models.Model):
@@ -61,7 +85,10 @@ class Education(models.Model):
     Model to store education information
     """
 
-    user = models.ForeignKey(User, related_name="educations", on_delete=models.CASCADE)
+    # Indexed together with position in Meta.indexes
+    user = models.ForeignKey(
+        User, related_name="educations", on_delete=models.CASCADE, db_index=False
+    )
 
     institution_name = models.CharField(max_length=255, null=True, blank=True)
     linkedin_url = models.URLField(null=True, blank=True)
@@ -77,13 +104,19 @@ class Education(models.Model):
     to_date = models.CharField(max_length=100, null=True, blank=True)
     description = models.TextField(null=True, blank=True)
 
+    # Order of the entry on the profile
+    position = models.PositiveIntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
         return f"{self.degree} from {self.institution_name}"
 
     class Meta:
-        ordering = ["-created_at"]
+        ordering = ["position", "-created_at"]
+        indexes = [
+            # A user's rows in profile order
+            models.Index(fields=["user", "position"], name="education_user_position"),
+        ]
 
 
 class Interest(models.Model):
@@ -91,27 +124,51 @@ class Interest(models.Model):
     Model to store user interests (if any)
     """
 
-    user = models.ForeignKey(User, related_name="interests", on_delete=models.CASCADE)
+    # Indexed together with position in Meta.indexes
+    user = models.ForeignKey(
+        User, related_name="interests", on_delete=models.CASCADE, db_index=False
+    )
     name = models.CharField(max_length=255)
 
+    # Order of the entry on the profile
+    position = models.PositiveIntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
         return self.name
 
+    class Meta:
+        ordering = ["position", "pk"]
+        indexes = [
+            # A user's rows in profile order
+            models.Index(fields=["user", "position"], name="interest_user_position"),
+        ]
+
 
 class Accomplishment(models.Model):
     """
     Model to store user accomplishments (if any)
     """
 
+    # Indexed together with position in Meta.indexes
     user = models.ForeignKey(
-        User, related_name="accomplishments", on_delete=models.CASCADE
+        User, related_name="accomplishments", on_delete=models.CASCADE, db_index=False
     )
     title = models.CharField(max_length=255)
     description = models.TextField(null=True, blank=True)
 
+    # Order of the entry on the profile
+    position = models.PositiveIntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
         return self.title
+
+    class Meta:
+        ordering = ["position", "pk"]
+        indexes = [
+            # A user's rows in profile order
+            models.Index(
+                fields=["user", "position"], name="accomplishment_user_position"
+            ),
+        ]
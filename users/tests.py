@@ -1,3 +1,512 @@
-from django.test import TestCase
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import (
+    SimpleTestCase,
+    TestCase,
+    TransactionTestCase,
+    override_settings,
+)
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from .cache import get_profile_cache_stats, profile_cache, reset_profile_cache_stats
+from .models import Education, Experience, User
+from .utils import (
+    canonicalize_linkedin_url,
+    get_profile_age,
+    get_profile_freshness,
+    get_user_data_by_linkedin_url,
+    get_users_data_by_linkedin_urls,
+    save_scraped_user_data,
+    user_exists_in_db,
+)
+
+LINKEDIN_URL = "https://www.linkedin.com/in/jane-doe/"
+
+
+def scraped_profile(entries, label="", **overrides):
+    """Scraped data with ``entries`` rows in every section, named after ``label``"""
+    data = {
+        "linkedin_url": LINKEDIN_URL,
+        "name": "Jane Doe",
+        "job_title": "Engineer",
+        "company": "Acme",
+        "location": "Berlin",
+        "about": "About Jane",
+        "experiences": [
+            {"institution_name": f"Company {label}{i}", "position_title": "Engineer"}
+            for i in range(entries)
+        ],
+        "educations": [
+            {"institution_name": f"School {label}{i}", "degree": "BSc"}
+            for i in range(entries)
+        ],
+        "interests": [f"Interest {label}{i}" for i in range(entries)],
+        "accomplishments": [{"title": f"Award {label}{i}"} for i in range(entries)],
+    }
+    data.update(overrides)
+    return data
+
+
+class ProfileCacheTestCase(TestCase):
+    def setUp(self):
+        profile_cache().clear()
+
+
+class SaveScrapedUserDataTests(ProfileCacheTestCase):
+    """The save costs the same number of queries however long the profile is"""
+
+    def test_create_query_count_is_flat(self):
+        # Savepoint pair of the transaction (inside the test's own), select,
+        # insert and one bulk insert per section
+        with self.assertNumQueries(8):
+            save_scraped_user_data(scraped_profile(1))
+        User.objects.all().delete()
+
+        with self.assertNumQueries(8):
+            save_scraped_user_data(scraped_profile(30))
+        self.assertEqual(Experience.objects.count(), 30)
+
+    def test_update_query_count_is_flat(self):
+        save_scraped_user_data(scraped_profile(30, label="a"))
+
+        # Savepoint pair, select, update, then per changed section a select of
+        # the stored rows, a delete and a bulk insert
+        with self.assertNumQueries(16):
+            save_scraped_user_data(scraped_profile(1, label="b"))
+        with self.assertNumQueries(16):
+            save_scraped_user_data(scraped_profile(30, label="c"))
+        self.assertEqual(Education.objects.count(), 30)
+
+    def test_unchanged_profile_only_records_scrape_time(self):
+        first = save_scraped_user_data(scraped_profile(30))
+
+        # Savepoint pair, select and the scraped_at update
+        with self.assertNumQueries(4):
+            second = save_scraped_user_data(scraped_profile(30))
+
+        self.assertEqual(second.content_fingerprint, first.content_fingerprint)
+        self.assertGreater(second.scraped_at, first.scraped_at)
+        self.assertEqual(
+            User.objects.get().updated_at.isoformat(), first.updated_at.isoformat()
+        )
+
+    def test_only_changed_rows_are_written(self):
+        user = save_scraped_user_data(scraped_profile(3))
+        experience_ids = list(user.experiences.values_list("pk", flat=True))
+        fingerprints = dict(user.section_fingerprints)
+
+        changed = scraped_profile(3)
+        changed["interests"][1] = "Something new"
+        with CaptureQueriesContext(connection) as queries:
+            user = save_scraped_user_data(changed)
+
+        written = [
+            query["sql"].split()[0]
+            for query in queries
+            if "users_interest" in query["sql"]
+        ]
+        self.assertEqual(written, ["SELECT", "DELETE", "INSERT"])
+        self.assertFalse(any("users_experience" in query["sql"] for query in queries))
+        self.assertEqual(
+            list(user.experiences.values_list("pk", flat=True)), experience_ids
+        )
+        self.assertEqual(
+            list(user.interests.values_list("name", flat=True)),
+            ["Interest 0", "Something new", "Interest 2"],
+        )
+        self.assertNotEqual(
+            user.section_fingerprints["interests"], fingerprints["interests"]
+        )
+        self.assertEqual(
+            user.section_fingerprints["experiences"], fingerprints["experiences"]
+        )
+
+    def test_reordered_rows_are_moved_not_rewritten(self):
+        data = scraped_profile(3)
+        user = save_scraped_user_data(data)
+        ids_by_name = dict(user.interests.values_list("name", "pk"))
+
+        data["interests"].reverse()
+        user = save_scraped_user_data(data)
+
+        self.assertEqual(
+            list(user.interests.values_list("name", "pk")),
+            [(name, ids_by_name[name]) for name in data["interests"]],
+        )
+
+    def test_update_replaces_related_rows(self):
+        save_scraped_user_data(scraped_profile(3))
+        user = save_scraped_user_data(
+            scraped_profile(2, name=None, linkedin_url="linkedin.com/in/Jane-Doe")
+        )
+
+        self.assertEqual(User.objects.count(), 1)
+        self.assertEqual(user.name, "Jane Doe")
+        self.assertEqual(
+            list(user.experiences.values_list("institution_name", flat=True)),
+            ["Company 0", "Company 1"],
+        )
+        self.assertEqual(user.interests.count(), 2)
+
+    def test_only_scraped_sections_are_replaced(self):
+        save_scraped_user_data(scraped_profile(3))
+        user = save_scraped_user_data(
+            {"linkedin_url": LINKEDIN_URL, "interests": [], "sections": ["interests"]}
+        )
+
+        self.assertEqual(user.experiences.count(), 3)
+        self.assertEqual(user.interests.count(), 0)
+        self.assertEqual(user.scraped_sections, ["interests"])
+
+    def test_failed_save_leaves_stored_profile_intact(self):
+        save_scraped_user_data(scraped_profile(3))
+
+        with mock.patch.object(
+            Education.objects, "bulk_create", side_effect=RuntimeError("db down")
+        ):
+            with self.assertRaises(RuntimeError):
+                save_scraped_user_data(scraped_profile(5, name="Someone Else"))
+
+        user = User.objects.get()
+        self.assertEqual(user.name, "Jane Doe")
+        self.assertEqual(user.experiences.count(), 3)
+        self.assertEqual(user.educations.count(), 3)
+
+
+class ProfileReadPathTests(ProfileCacheTestCase):
+    """Stored profiles load in a fixed number of queries"""
+
+    def test_single_profile_reads_snapshot(self):
+        save_scraped_user_data(scraped_profile(30))
+
+        with self.assertNumQueries(1):
+            user_data = get_user_data_by_linkedin_url("linkedin.com/in/Jane-Doe/")
+
+        self.assertEqual(user_data["name"], "Jane Doe")
+        self.assertEqual(len(user_data["experiences"]), 30)
+        self.assertEqual(user_data["experiences"][1]["institution_name"], "Company 1")
+        self.assertEqual(user_data["interests"][:2], ["Interest 0", "Interest 1"])
+        self.assertEqual(user_data["accomplishments"][0], "Award 0")
+
+    def test_profile_without_snapshot_is_read_from_tables(self):
+        save_scraped_user_data(scraped_profile(30))
+        snapshot = get_user_data_by_linkedin_url(LINKEDIN_URL)
+        User.objects.update(profile_snapshot=None)
+        profile_cache().clear()
+
+        # The user, then one query per section
+        with self.assertNumQueries(5):
+            user_data = get_user_data_by_linkedin_url(LINKEDIN_URL)
+
+        self.assertEqual(user_data, snapshot)
+
+    def test_snapshot_matches_tables_after_partial_save(self):
+        save_scraped_user_data(scraped_profile(3))
+        changed = scraped_profile(2, label="new")
+        changed["interests"].reverse()
+        save_scraped_user_data({**changed, "sections": ["interests"]}, incremental=True)
+
+        snapshot = get_user_data_by_linkedin_url(LINKEDIN_URL)
+        User.objects.update(profile_snapshot=None)
+        profile_cache().clear()
+
+        self.assertEqual(get_user_data_by_linkedin_url(LINKEDIN_URL), snapshot)
+        self.assertEqual(snapshot["interests"], ["Interest new1", "Interest new0"])
+        self.assertEqual(len(snapshot["experiences"]), 3)
+
+    def test_missing_profile(self):
+        with self.assertNumQueries(1):
+            self.assertIsNone(get_user_data_by_linkedin_url(LINKEDIN_URL))
+
+    def test_bulk_query_count_is_flat(self):
+        urls = [f"https://www.linkedin.com/in/person-{i}/" for i in range(10)]
+        for i, url in enumerate(urls):
+            save_scraped_user_data(scraped_profile(3, label=i, linkedin_url=url))
+        missing_url = "https://www.linkedin.com/in/not-stored/"
+
+        with self.assertNumQueries(1):
+            users_data = get_users_data_by_linkedin_urls(urls + [missing_url])
+
+        # Profiles without a snapshot add one query per section between them
+        User.objects.filter(linkedin_url__in=urls[::2]).update(profile_snapshot=None)
+        with self.assertNumQueries(5):
+            rebuilt = get_users_data_by_linkedin_urls(urls + [missing_url])
+
+        self.assertEqual(set(users_data), set(urls))
+        self.assertEqual(rebuilt, users_data)
+        self.assertEqual(
+            [e["institution_name"] for e in users_data[urls[4]]["experiences"]],
+            ["Company 40", "Company 41", "Company 42"],
+        )
+
+
+class ProfileCacheTests(ProfileCacheTestCase):
+    """Profile reads are served from the cache until the profile is saved again"""
+
+    def setUp(self):
+        super().setUp()
+        reset_profile_cache_stats()
+
+    def test_repeated_reads_hit_the_cache(self):
+        save_scraped_user_data(scraped_profile(3))
+
+        with self.assertNumQueries(1):
+            first = get_user_data_by_linkedin_url(LINKEDIN_URL)
+        with self.assertNumQueries(0):
+            second = get_user_data_by_linkedin_url("linkedin.com/in/Jane-Doe")
+            self.assertTrue(user_exists_in_db(LINKEDIN_URL))
+
+        self.assertEqual(first, second)
+        self.assertEqual(
+            get_profile_cache_stats(), {"hits": 2, "misses": 1, "hit_rate": 2 / 3}
+        )
+
+    def test_missing_profiles_are_cached_until_saved(self):
+        with self.assertNumQueries(1):
+            self.assertFalse(user_exists_in_db(LINKEDIN_URL))
+        with self.assertNumQueries(0):
+            self.assertFalse(user_exists_in_db(LINKEDIN_URL))
+
+        save_scraped_user_data(scraped_profile(1))
+        self.assertTrue(user_exists_in_db(LINKEDIN_URL))
+
+    def test_save_invalidates_cached_profile(self):
+        save_scraped_user_data(scraped_profile(3))
+        get_user_data_by_linkedin_url(LINKEDIN_URL)
+
+        save_scraped_user_data(scraped_profile(3, name="Jane Smith"))
+
+        self.assertEqual(
+            get_user_data_by_linkedin_url(LINKEDIN_URL)["name"], "Jane Smith"
+        )
+        self.assertEqual(get_profile_cache_stats()["misses"], 2)
+
+
+@override_settings(PROFILE_CACHE_VERIFY=True)
+class PerProcessProfileCacheTests(ProfileCacheTestCase):
+    """
+    A per-process cache never serves what another process's save replaced
+
+    Saves by other processes are simulated by saving without invalidation.
+    """
+
+    def save_elsewhere(self, data):
+        with mock.patch("users.utils.invalidate_profiles"):
+            return save_scraped_user_data(data)
+
+    def test_hits_are_checked_against_the_stored_fingerprint(self):
+        save_scraped_user_data(scraped_profile(3))
+        first = get_user_data_by_linkedin_url(LINKEDIN_URL)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(get_user_data_by_linkedin_url(LINKEDIN_URL), first)
+
+        self.save_elsewhere(scraped_profile(3, name="Jane Smith"))
+        self.assertEqual(
+            get_user_data_by_linkedin_url(LINKEDIN_URL)["name"], "Jane Smith"
+        )
+
+    def test_missing_profiles_are_not_cached(self):
+        self.assertFalse(user_exists_in_db(LINKEDIN_URL))
+
+        self.save_elsewhere(scraped_profile(1))
+
+        self.assertTrue(user_exists_in_db(LINKEDIN_URL))
+
+
+@override_settings(PROFILE_FRESH_TTL=60, PROFILE_STALE_TTL=600)
+class ProfileFreshnessTests(TestCase):
+    def test_freshness_policy(self):
+        for age, freshness in (
+            (None, "missing"),
+            (0, "fresh"),
+            (60, "fresh"),
+            (61, "stale"),
+            (600, "stale"),
+            (601, "expired"),
+        ):
+            with self.subTest(age=age):
+                profile_age = None if age is None else timedelta(seconds=age)
+                self.assertEqual(get_profile_freshness(profile_age), freshness)
+
+    def test_max_age_replaces_the_policy(self):
+        for age, max_age, freshness in (
+            (None, 3600, "missing"),
+            (300, 3600, "fresh"),
+            (300, 300, "fresh"),
+            (30, 10, "expired"),
+            (0, 0, "fresh"),
+            (1, 0, "expired"),
+        ):
+            with self.subTest(age=age, max_age=max_age):
+                profile_age = None if age is None else timedelta(seconds=age)
+                self.assertEqual(get_profile_freshness(profile_age, max_age), freshness)
+
+    def test_profile_age_is_measured_from_the_last_scrape(self):
+        self.assertIsNone(get_profile_age(LINKEDIN_URL))
+
+        user = save_scraped_user_data(scraped_profile(0))
+        User.objects.filter(pk=user.pk).update(
+            scraped_at=timezone.now() - timedelta(hours=2)
+        )
+
+        age = get_profile_age("https://de.linkedin.com/in/Jane-Doe")
+        self.assertAlmostEqual(age.total_seconds(), 2 * 60 * 60, delta=60)
+
+
+class UserAdminTests(ProfileCacheTestCase):
+    def setUp(self):
+        super().setUp()
+        admin_user = get_user_model().objects.create_superuser(
+            "admin", "admin@example.com", "secret"
+        )
+        self.client.force_login(admin_user)
+        self.user = save_scraped_user_data(scraped_profile(1))
+        self.change_url = reverse("admin:users_user_change", args=[self.user.pk])
+
+    def test_profiles_are_read_only(self):
+        response = self.client.get(self.change_url)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotContains(response, 'name="name"')
+        self.assertNotContains(response, 'name="experiences-0-position_title"')
+
+        with self.assertLogs("django.request", "WARNING"):
+            response = self.client.post(self.change_url, {"name": "Edited"})
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(User.objects.get(pk=self.user.pk).name, "Jane Doe")
+
+    def test_deleting_drops_the_cached_profile(self):
+        self.assertIsNotNone(get_user_data_by_linkedin_url(LINKEDIN_URL))
+
+        self.client.post(
+            reverse("admin:users_user_delete", args=[self.user.pk]), {"post": "yes"}
+        )
+
+        self.assertFalse(User.objects.exists())
+        self.assertIsNone(get_user_data_by_linkedin_url(LINKEDIN_URL))
+
+
+class CanonicalizeLinkedinUrlTests(SimpleTestCase):
+    def test_profile_url_variants_share_one_key(self):
+        for url in (
+            "https://www.linkedin.com/in/jane-doe/",
+            "https://www.linkedin.com/in/jane-doe",
+            "http://linkedin.com/in/Jane-Doe",
+            "https://de.linkedin.com/in/jane-doe/?trk=public_profile#about",
+            "https://m.linkedin.com/in/jane-doe/details/experience/",
+            "www.linkedin.com/in/jane-doe",
+            "  https://WWW.LinkedIn.com/in/JANE-DOE/  ",
+        ):
+            with self.subTest(url=url):
+                self.assertEqual(canonicalize_linkedin_url(url), LINKEDIN_URL)
+
+    def test_encoded_slugs_are_normalized(self):
+        self.assertEqual(
+            canonicalize_linkedin_url("https://www.linkedin.com/in/J%C3%BCrgen-M/"),
+            canonicalize_linkedin_url("https://www.linkedin.com/in/jürgen-m"),
+        )
+        self.assertEqual(
+            canonicalize_linkedin_url("https://www.linkedin.com/in/jürgen-m"),
+            "https://www.linkedin.com/in/j%C3%BCrgen-m/",
+        )
+
+    def test_other_urls_are_only_stripped(self):
+        self.assertEqual(canonicalize_linkedin_url(""), "")
+        self.assertIsNone(canonicalize_linkedin_url(None))
+        self.assertEqual(
+            canonicalize_linkedin_url(" https://example.com/in/jane-doe "),
+            "https://example.com/in/jane-doe",
+        )
+        self.assertEqual(
+            canonicalize_linkedin_url("https://www.linkedin.com/company/acme/"),
+            "https://www.linkedin.com/company/acme/",
+        )
+        self.assertEqual(
+            canonicalize_linkedin_url("https://notlinkedin.com/in/jane-doe"),
+            "https://notlinkedin.com/in/jane-doe",
+        )
+
+
+class CanonicalUrlMigrationTests(TransactionTestCase):
+    before = [("users", "0001_initial")]
+    after = [("users", "0002_canonical_linkedin_urls")]
+
+    def setUp(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.before)
+        self.apps = executor.loader.project_state(self.before).apps
+
+    def tearDown(self):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+    def migrate(self):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(self.after)
+        return executor.loader.project_state(self.after).apps
+
+    def create_user(self, linkedin_url, age, **fields):
+        User = self.apps.get_model("users", "User")
+        user = User.objects.create(linkedin_url=linkedin_url, **fields)
+        # updated_at is auto_now, so backdate it with an update
+        User.objects.filter(pk=user.pk).update(
+            updated_at=timezone.now() - timedelta(days=age)
+        )
+        return user
+
+    def test_urls_are_canonicalized(self):
+        user = self.create_user("http://de.linkedin.com/in/Jane-Doe?trk=x", 0)
+
+        apps = self.migrate()
+
+        User = apps.get_model("users", "User")
+        self.assertEqual(User.objects.get(pk=user.pk).linkedin_url, LINKEDIN_URL)
+
+    def test_duplicates_are_merged_into_the_newest_profile(self):
+        Experience = self.apps.get_model("users", "Experience")
+        Interest = self.apps.get_model("users", "Interest")
+        newest = self.create_user(
+            "https://www.linkedin.com/in/jane-doe", 1, name="Jane Doe", about=""
+        )
+        Experience.objects.create(user=newest, institution_name="Acme")
+        middle = self.create_user(
+            "https://de.linkedin.com/in/jane-doe/", 2, about="About Jane"
+        )
+        Experience.objects.create(user=middle, institution_name="Old Acme")
+        Interest.objects.create(user=middle, name="Chess")
+        oldest = self.create_user(
+            "https://linkedin.com/in/JANE-DOE", 3, name="J. Doe", about="Old about"
+        )
+        Interest.objects.create(user=oldest, name="Go")
+        other = self.create_user("https://www.linkedin.com/in/john-roe/", 0)
+
+        apps = self.migrate()
+
+        User = apps.get_model("users", "User")
+        Experience = apps.get_model("users", "Experience")
+        Interest = apps.get_model("users", "Interest")
+        self.assertQuerySetEqual(
+            User.objects.order_by("pk").values_list("pk", flat=True),
+            [newest.pk, other.pk],
+        )
+        merged = User.objects.get(pk=newest.pk)
+        self.assertEqual(merged.linkedin_url, LINKEDIN_URL)
+        self.assertEqual(merged.name, "Jane Doe")
+        self.assertEqual(merged.about, "About Jane")
+        # Sections the newest profile has keep its rows; the others take the
+        # rows of the newest duplicate that has some
+        self.assertQuerySetEqual(
+            Experience.objects.values_list("user_id", "institution_name"),
+            [(newest.pk, "Acme")],
+        )
+        self.assertQuerySetEqual(
+            Interest.objects.values_list("user_id", "name"), [(newest.pk, "Chess")]
+        )
@@ -1,120 +1,392 @@
-from .models import Accomplishment, Education, Experience, Interest, User
+import hashlib
+import json
+import re
+from collections import defaultdict
+from datetime import timedelta
+from urllib.parse import quote, unquote, urlsplit
 
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
 
-def save_scraped_user_data(scraped_data):
+from .cache import get_or_load_profile, invalidate_profiles
+from .models import (
+    PROFILE_SECTIONS,
+    Accomplishment,
+    Education,
+    Experience,
+    Interest,
+    User,
+)
+
+LINKEDIN_PROFILE_PATH_RE = re.compile(r"^/in/([^/]+)", re.IGNORECASE)
+
+# Top card fields of a User, as scraped
+PROFILE_FIELDS = ("name", "job_title", "company", "location", "about")
+
+# Section row fields that are not scraped content
+ROW_BOOKKEEPING_FIELDS = ("id", "user", "position", "created_at")
+
+
+def canonicalize_linkedin_url(linkedin_url):
+    """
+    Reduce a LinkedIn profile URL to the canonical form used as its storage key
+
+    Country and mobile subdomains, missing "www", http, tracking query
+    parameters, fragments, sub-pages and letter case all map to
+    ``https://www.linkedin.com/in/<slug>/``. URLs that are not LinkedIn
+    profile URLs are returned stripped but otherwise unchanged.
+
+    Args:
+        linkedin_url (str): The LinkedIn profile URL as submitted or scraped
+
+    Returns:
+        str: The canonical profile URL
+    """
+    if not linkedin_url:
+        return linkedin_url
+
+    url = linkedin_url.strip()
+    parts = urlsplit(url if "://" in url else f"https://{url}")
+
+    host = (parts.hostname or "").lower()
+    if host != "linkedin.com" and not host.endswith(".linkedin.com"):
+        return url
+
+    match = LINKEDIN_PROFILE_PATH_RE.match(parts.path)
+    if not match:
+        return url
+
+    slug = quote(unquote(match.group(1)).lower(), safe="-_.~")
+    return f"https://www.linkedin.com/in/{slug}/"
+
+
+def save_scraped_user_data(scraped_data, incremental=False):
     """
     Save scraped LinkedIn data to database models
 
+    Only the sections listed in ``scraped_data["sections"]`` (all
+    PROFILE_SECTIONS when absent) are considered; stored rows of the other
+    sections are kept. Each section's content is fingerprinted: unchanged
+    sections are not touched, and changed ones are diffed against the stored
+    rows so only added, removed or moved entries are written. Re-saving an
+    unchanged profile only records the scrape time.
+
+    Everything is written in one transaction, with a bounded number of
+    queries however long the profile is, together with the user's
+    profile_snapshot that the read path serves.
+
     Args:
         scraped_data (dict): The scraped data in the format returned by the scraper
+        incremental (bool): The scrape only filled in sections missing from a
+            fresh stored profile, so previously scraped sections stay marked as
+            scraped. Otherwise only the sections just scraped are marked.
 
     Returns:
         User: The created or updated User instance
     """
-    linkedin_url = scraped_data.get("linkedin_url")
+    linkedin_url = canonicalize_linkedin_url(scraped_data.get("linkedin_url"))
     if not linkedin_url:
         raise ValueError("LinkedIn URL is required")
 
-    # Create or update user
-    user, created = User.objects.get_or_create(
-        linkedin_url=linkedin_url,
-        defaults={
-            "name": scraped_data.get("name"),
-            "job_title": scraped_data.get("job_title"),
-            "company": scraped_data.get("company"),
-            "location": scraped_data.get("location"),
-            "about": scraped_data.get("about"),
-        },
-    )
+    sections = [
+        section
+        for section in PROFILE_SECTIONS
+        if section in scraped_data.get("sections", PROFILE_SECTIONS)
+    ]
+
+    # Build every section's rows up front; the user is attached once known
+    section_rows = {}
+    section_fingerprints = {}
+    for section in sections:
+        model, build_row = SECTION_ROW_BUILDERS[section]
+        rows = [build_row(None, item) for item in scraped_data.get(section) or []]
+        rows = [row for row in rows if row is not None]
+        for position, row in enumerate(rows):
+            row.position = position
+        section_rows[section] = rows
+        section_fingerprints[section] = content_fingerprint(
+            [_row_content(row) for row in rows]
+        )
+
+    with transaction.atomic():
+        invalidate_profiles([linkedin_url])
+
+        user = User.objects.filter(linkedin_url=linkedin_url).first()
+        created = user is None
+        if created:
+            user = User(linkedin_url=linkedin_url)
+
+        # Keep stored values the scrape came back without
+        for field in PROFILE_FIELDS:
+            setattr(user, field, scraped_data.get(field) or getattr(user, field))
+
+        changed_sections = [
+            section
+            for section in sections
+            if user.section_fingerprints.get(section) != section_fingerprints[section]
+        ]
+        user.section_fingerprints = {
+            **user.section_fingerprints,
+            **section_fingerprints,
+        }
+        user.scraped_sections = [
+            section
+            for section in PROFILE_SECTIONS
+            if section in sections or (incremental and section in user.scraped_sections)
+        ]
 
-    # If user already exists, update the basic info
-    if not created:
-        user.name = scraped_data.get("name") or user.name
-        user.job_title = scraped_data.get("job_title") or user.job_title
-        user.company = scraped_data.get("company") or user.company
-        user.location = scraped_data.get("location") or user.location
-        user.about = scraped_data.get("about") or user.about
+        fingerprint = profile_fingerprint(user)
+        if (
+            not created
+            and fingerprint == user.content_fingerprint
+            and user.profile_snapshot is not None
+        ):
+            # Nothing changed: only record that the profile was scraped
+            user.scraped_at = timezone.now()
+            User.objects.filter(pk=user.pk).update(scraped_at=user.scraped_at)
+            return user
+
+        user.content_fingerprint = fingerprint
+        user.profile_snapshot = _build_profile_snapshot(user, section_rows)
+        user.scraped_at = timezone.now()
         user.save()
 
-    # Clear existing related data to replace with new data
-    if not created:
-        user.experiences.all().delete()
-        user.educations.all().delete()
-        user.interests.all().delete()
-        user.accomplishments.all().delete()
-
-    # Save experiences
-    experiences_data = scraped_data.get("experiences", [])
-    for exp_data in experiences_data:
-        Experience.objects.create(
-            user=user,
-            institution_name=exp_data.get("institution_name"),
-            linkedin_url=exp_data.get("linkedin_url"),
-            website=exp_data.get("website"),
-            industry=exp_data.get("industry"),
-            type=exp_data.get("type"),
-            headquarters=exp_data.get("headquarters"),
-            company_size=exp_data.get("company_size"),
-            founded=exp_data.get("founded"),
-            position_title=exp_data.get("position_title"),
-            from_date=exp_data.get("from_date"),
-            to_date=exp_data.get("to_date"),
-            duration=exp_data.get("duration"),
-            location=exp_data.get("location"),
-            description=exp_data.get("description"),
-        )
+        for section in changed_sections:
+            rows = section_rows[section]
+            for row in rows:
+                row.user = user
 
-    # Save educations
-    educations_data = scraped_data.get("educations", [])
-    for edu_data in educations_data:
-        Education.objects.create(
-            user=user,
-            institution_name=edu_data.get("institution_name"),
-            linkedin_url=edu_data.get("linkedin_url"),
-            website=edu_data.get("website"),
-            industry=edu_data.get("industry"),
-            type=edu_data.get("type"),
-            headquarters=edu_data.get("headquarters"),
-            company_size=edu_data.get("company_size"),
-            founded=edu_data.get("founded"),
-            degree=edu_data.get("degree"),
-            from_date=edu_data.get("from_date"),
-            to_date=edu_data.get("to_date"),
-            description=edu_data.get("description"),
-        )
+            if created:
+                SECTION_ROW_BUILDERS[section][0].objects.bulk_create(rows)
+            else:
+                _apply_section_diff(user, section, rows)
 
-    # Save interests
-    interests_data = scraped_data.get("interests", [])
-    for interest_data in interests_data:
-        if isinstance(interest_data, dict):
-            name = interest_data.get("name", "")
-        else:
-            name = str(interest_data)
+    return user
 
-        if name:
-            Interest.objects.create(user=user, name=name)
 
-    # Save accomplishments
-    accomplishments_data = scraped_data.get("accomplishments", [])
-    for acc_data in accomplishments_data:
-        if isinstance(acc_data, dict):
-            title = acc_data.get("title", "")
-            description = acc_data.get("description", "")
+def _apply_section_diff(user, section, rows):
+    """
+    Bring a section's stored rows in line with the scraped ones
+
+    Stored rows with identical content are kept (and re-positioned when their
+    order changed); only the others are deleted or inserted.
+    """
+    model = SECTION_ROW_BUILDERS[section][0]
+
+    stored_by_content = defaultdict(list)
+    for stored in getattr(user, section).all():
+        stored_by_content[_row_content(stored)].append(stored)
+
+    to_create, to_move = [], []
+    for row in rows:
+        matches = stored_by_content.get(_row_content(row))
+        if not matches:
+            to_create.append(row)
+            continue
+
+        stored = matches.pop()
+        if stored.position != row.position:
+            stored.position = row.position
+            to_move.append(stored)
+
+    stale_ids = [
+        stored.pk for matches in stored_by_content.values() for stored in matches
+    ]
+    if stale_ids:
+        model.objects.filter(pk__in=stale_ids).delete()
+    if to_move:
+        model.objects.bulk_update(to_move, ["position"])
+    if to_create:
+        model.objects.bulk_create(to_create)
+
+
+def _build_profile_snapshot(user, section_rows):
+    """
+    Build the user's profile in scraper output format from the rows being saved
+
+    Sections not being saved are carried over from the previous snapshot,
+    or read from their tables when there is none.
+    """
+    previous = user.profile_snapshot or {}
+    unsaved = [
+        section
+        for section in PROFILE_SECTIONS
+        if section not in section_rows and section not in previous
+    ]
+    stored = {}
+    if unsaved and user.pk is not None:
+        stored = _load_sections({user.pk: {}}, unsaved)[user.pk]
+
+    snapshot = _profile_header(
+        {
+            **{field: getattr(user, field) for field in PROFILE_FIELDS},
+            "linkedin_url": user.linkedin_url,
+            "scraped_sections": user.scraped_sections,
+            "content_fingerprint": user.content_fingerprint,
+        }
+    )
+    for section in PROFILE_SECTIONS:
+        if section in section_rows:
+            fields = SECTION_OUTPUT_FIELDS[section]
+            snapshot[section] = [
+                _section_item(fields, [getattr(row, field) for field in fields])
+                for row in section_rows[section]
+            ]
+        elif section in previous:
+            snapshot[section] = previous[section]
         else:
-            title = str(acc_data)
-            description = ""
+            snapshot[section] = stored.get(section, [])
+    return snapshot
 
-        if title:
-            Accomplishment.objects.create(
-                user=user, title=title, description=description
-            )
 
-    return user
+def content_fingerprint(content):
+    """
+    Hash JSON-serializable content into a stable hex fingerprint
+
+    Args:
+        content: Lists, dicts and scalars; dict key order does not matter
+
+    Returns:
+        str: SHA-256 hex digest
+    """
+    serialized = json.dumps(content, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(serialized.encode("utf-8")).hexdigest()
+
+
+def profile_fingerprint(user):
+    """Fingerprint a user's top card and the fingerprints of its scraped sections"""
+    return content_fingerprint(
+        {
+            "profile": {field: getattr(user, field) for field in PROFILE_FIELDS},
+            "sections": {
+                section: user.section_fingerprints.get(section)
+                for section in user.scraped_sections
+            },
+        }
+    )
+
+
+def _row_content(row):
+    """The scraped values of a section row, without keys, user or position"""
+    return tuple(
+        getattr(row, field.attname)
+        for field in row._meta.concrete_fields
+        if field.name not in ROW_BOOKKEEPING_FIELDS
+    )
+
+
+def _experience_row(user, exp_data):
+    return Experience(
+        user=user,
+        institution_name=exp_data.get("institution_name"),
+        linkedin_url=exp_data.get("linkedin_url"),
+        website=exp_data.get("website"),
+        industry=exp_data.get("industry"),
+        type=exp_data.get("type"),
+        headquarters=exp_data.get("headquarters"),
+        company_size=exp_data.get("company_size"),
+        founded=exp_data.get("founded"),
+        position_title=exp_data.get("position_title"),
+        from_date=exp_data.get("from_date"),
+        to_date=exp_data.get("to_date"),
+        duration=exp_data.get("duration"),
+        location=exp_data.get("location"),
+        description=exp_data.get("description"),
+    )
+
+
+def _education_row(user, edu_data):
+    return Education(
+        user=user,
+        institution_name=edu_data.get("institution_name"),
+        linkedin_url=edu_data.get("linkedin_url"),
+        website=edu_data.get("website"),
+        industry=edu_data.get("industry"),
+        type=edu_data.get("type"),
+        headquarters=edu_data.get("headquarters"),
+        company_size=edu_data.get("company_size"),
+        founded=edu_data.get("founded"),
+        degree=edu_data.get("degree"),
+        from_date=edu_data.get("from_date"),
+        to_date=edu_data.get("to_date"),
+        description=edu_data.get("description"),
+    )
+
+
+def _interest_row(user, interest_data):
+    if isinstance(interest_data, dict):
+        name = interest_data.get("name", "")
+    else:
+        name = str(interest_data)
+
+    return Interest(user=user, name=name) if name else None
+
+
+def _accomplishment_row(user, acc_data):
+    if isinstance(acc_data, dict):
+        title = acc_data.get("title", "")
+        description = acc_data.get("description", "")
+    else:
+        title = str(acc_data)
+        description = ""
+
+    if not title:
+        return None
+    return Accomplishment(user=user, title=title, description=description)
+
+
+# Model and row builder per profile section, for bulk inserts
+SECTION_ROW_BUILDERS = {
+    "experiences": (Experience, _experience_row),
+    "educations": (Education, _education_row),
+    "interests": (Interest, _interest_row),
+    "accomplishments": (Accomplishment, _accomplishment_row),
+}
+
+# Row fields returned per section by the read path, in output order
+SECTION_OUTPUT_FIELDS = {
+    "experiences": (
+        "institution_name",
+        "linkedin_url",
+        "website",
+        "industry",
+        "type",
+        "headquarters",
+        "company_size",
+        "founded",
+        "position_title",
+        "from_date",
+        "to_date",
+        "duration",
+        "location",
+        "description",
+    ),
+    "educations": (
+        "institution_name",
+        "linkedin_url",
+        "website",
+        "industry",
+        "type",
+        "headquarters",
+        "company_size",
+        "founded",
+        "degree",
+        "from_date",
+        "to_date",
+        "description",
+    ),
+    "interests": ("name",),
+    "accomplishments": ("title",),
+}
 
 
 def get_user_data_by_linkedin_url(linkedin_url):
     """
-    Retrieve user data from database by LinkedIn URL
+    Retrieve user data by LinkedIn URL, through the profile cache
+
+    Cache misses load the profile in a fixed number of queries (see
+    get_users_data_by_linkedin_urls).
 
     Args:
         linkedin_url (str): The LinkedIn profile URL
@@ -122,84 +394,196 @@ def get_user_data_by_linkedin_url(linkedin_url):
     Returns:
         dict: User data in the same format as scraper output, or None if not found
     """
-    try:
-        user = User.objects.get(linkedin_url=linkedin_url)
-    except User.DoesNotExist:
-        return None
+    return get_or_load_profile(
+        canonicalize_linkedin_url(linkedin_url),
+        lambda url: get_users_data_by_linkedin_urls([url]).get(url),
+    )
+
+
+def get_users_data_by_linkedin_urls(linkedin_urls):
+    """
+    Retrieve many users' data from database in one pass
+
+    Profiles are served from their stored snapshot, so profiles that have one
+    cost a single query between them. Profiles without one are rebuilt from
+    the section tables with one more query per section, reading only the
+    columns the output needs.
+
+    Args:
+        linkedin_urls (iterable): LinkedIn profile URLs
+
+    Returns:
+        dict: User data in the same format as scraper output, keyed by
+            canonical LinkedIn URL; profiles that are not stored are absent
+    """
+    canonical_urls = {canonicalize_linkedin_url(url) for url in linkedin_urls}
+    if not canonical_urls:
+        return {}
+
+    users = User.objects.filter(linkedin_url__in=canonical_urls).values(
+        "id",
+        "linkedin_url",
+        "scraped_sections",
+        "content_fingerprint",
+        "profile_snapshot",
+        *PROFILE_FIELDS,
+    )
+
+    users_data = {}
+    unsnapshotted = {}
+    for user in users:
+        if user["profile_snapshot"] is not None:
+            users_data[user["linkedin_url"]] = user["profile_snapshot"]
+        else:
+            unsnapshotted[user["id"]] = _profile_header(user)
 
     # Convert database data back to scraper format
-    user_data = {
-        "name": user.name,
-        "job_title": user.job_title,
-        "company": user.company,
-        "location": user.location,
-        "about": user.about,
-        "linkedin_url": user.linkedin_url,
-        "experiences": [],
-        "educations": [],
-        "interests": [],
-        "accomplishments": [],
+    if unsnapshotted:
+        for user_data in _load_sections(unsnapshotted, PROFILE_SECTIONS).values():
+            users_data[user_data["linkedin_url"]] = user_data
+
+    return users_data
+
+
+def _profile_header(user):
+    """The top card part of the scraper output format, from User values"""
+    return {
+        **{field: user[field] for field in PROFILE_FIELDS},
+        "linkedin_url": user["linkedin_url"],
+        "sections": user["scraped_sections"],
+        "fingerprint": user["content_fingerprint"],
     }
 
-    # Add experiences
-    for exp in user.experiences.all():
-        user_data["experiences"].append(
-            {
-                "institution_name": exp.institution_name,
-                "linkedin_url": exp.linkedin_url,
-                "website": exp.website,
-                "industry": exp.industry,
-                "type": exp.type,
-                "headquarters": exp.headquarters,
-                "company_size": exp.company_size,
-                "founded": exp.founded,
-                "position_title": exp.position_title,
-                "from_date": exp.from_date,
-                "to_date": exp.to_date,
-                "duration": exp.duration,
-                "location": exp.location,
-                "description": exp.description,
-            }
-        )
 
-    # Add educations
-    for edu in user.educations.all():
-        user_data["educations"].append(
-            {
-                "institution_name": edu.institution_name,
-                "linkedin_url": edu.linkedin_url,
-                "website": edu.website,
-                "industry": edu.industry,
-                "type": edu.type,
-                "headquarters": edu.headquarters,
-                "company_size": edu.company_size,
-                "founded": edu.founded,
-                "degree": edu.degree,
-                "from_date": edu.from_date,
-                "to_date": edu.to_date,
-                "description": edu.description,
-            }
+def _load_sections(users_data, sections):
+    """
+    Add the given sections' stored rows, in profile order, to users' data
+
+    Args:
+        users_data (dict): User data dicts keyed by user ID, filled in place
+        sections (iterable): PROFILE_SECTIONS to load, one query each
+
+    Returns:
+        dict: ``users_data``
+    """
+    for user_data in users_data.values():
+        for section in sections:
+            user_data[section] = []
+
+    for section in sections:
+        model = SECTION_ROW_BUILDERS[section][0]
+        fields = SECTION_OUTPUT_FIELDS[section]
+        rows = model.objects.filter(user_id__in=users_data).values_list(
+            "user_id", *fields
         )
+        for user_id, *values in rows:
+            users_data[user_id][section].append(_section_item(fields, values))
 
-    # Add interests
-    for interest in user.interests.all():
-        user_data["interests"].append(interest.name)
+    return users_data
 
-    # Add accomplishments
-    for acc in user.accomplishments.all():
-        user_data["accomplishments"].append(acc.title)
 
-    return user_data
+def _section_item(fields, values):
+    if len(fields) == 1:
+        # Interests and accomplishments are returned as plain strings
+        return values[0]
+    return dict(zip(fields, values))
 
 
 def user_exists_in_db(linkedin_url):
     """
     Check if a user with the given LinkedIn URL already exists in the database
 
+    Answered from the profile cache when the profile, or its absence, is cached.
+
     Args:
         linkedin_url (str): The LinkedIn profile URL to check
 
     Returns:
         bool: True if user exists, False otherwise
     """
-    return User.objects.filter(linkedin_url=linkedin_url).exists()
+    return get_user_data_by_linkedin_url(linkedin_url) is not None
+
+
+def get_scraped_sections(linkedin_url):
+    """
+    Get which PROFILE_SECTIONS are stored for a LinkedIn URL
+
+    Args:
+        linkedin_url (str): The LinkedIn profile URL to check
+
+    Returns:
+        list: The scraped section names, empty if the profile is not stored
+    """
+    scraped_sections = (
+        User.objects.filter(linkedin_url=canonicalize_linkedin_url(linkedin_url))
+        .values_list("scraped_sections", flat=True)
+        .first()
+    )
+    return scraped_sections or []
+
+
+def get_profile_reference(linkedin_url):
+    """
+    Get what a task result needs to point at the stored profile for a LinkedIn URL
+
+    Args:
+        linkedin_url (str): The LinkedIn profile URL
+
+    Returns:
+        tuple: (user ID, content fingerprint), or (None, "") if not stored
+    """
+    reference = (
+        User.objects.filter(linkedin_url=canonicalize_linkedin_url(linkedin_url))
+        .values_list("pk", "content_fingerprint")
+        .first()
+    )
+    return reference or (None, "")
+
+
+def get_profile_age(linkedin_url):
+    """
+    Get how long ago the stored profile for a LinkedIn URL was last scraped
+
+    Args:
+        linkedin_url (str): The LinkedIn profile URL to check
+
+    Returns:
+        timedelta: Age of the stored profile, or None if it is not stored
+    """
+    scraped_at = (
+        User.objects.filter(linkedin_url=canonicalize_linkedin_url(linkedin_url))
+        .values_list("scraped_at", flat=True)
+        .first()
+    )
+    if scraped_at is None:
+        return None
+    return timezone.now() - scraped_at
+
+
+def get_profile_freshness(profile_age, max_age=None):
+    """
+    Classify a stored profile's age against the freshness policy
+
+    Profiles younger than PROFILE_FRESH_TTL are "fresh". Older ones are
+    "stale" (served while a refresh scrape runs) until PROFILE_STALE_TTL, after
+    which they are "expired" and must be re-scraped before being served. A
+    per-request ``max_age`` replaces the policy: anything older is "expired".
+
+    Args:
+        profile_age (timedelta): Age from get_profile_age, or None if not stored
+        max_age (int): Optional maximum acceptable age in seconds
+
+    Returns:
+        str: "missing", "fresh", "stale" or "expired"
+    """
+    if profile_age is None:
+        return "missing"
+
+    if max_age is not None:
+        return "fresh" if profile_age <= timedelta(seconds=max_age) else "expired"
+
+    if profile_age <= timedelta(seconds=settings.PROFILE_FRESH_TTL):
+        return "fresh"
+    if profile_age <= timedelta(seconds=settings.PROFILE_STALE_TTL):
+        return "stale"
+    return "expired"